@@ -22,8 +22,8 @@
 #         self.cache[key] = response
 #         return response.strip()
 # app/agents/base_agent.py
-from app.services.llm_service import call_llm
-from typing import Dict
+from typing import AsyncIterator
+from app.services.llm_service import call_llm, call_llm_stream
 
 AGENT_DEFAULT_LLM = {
     "SocioEconomicAgent": "groq",
@@ -37,6 +37,19 @@ AGENT_DEFAULT_LLM = {
     "RecommenderAgent": "openai"
 }
 
+# Agent → key in AGENT_LLM_MAPPING (failover preference list)
+AGENT_ROUTING_KEYS = {
+    "SocioEconomicAgent": "socio",
+    "LearningRoadmapAgent": "learning",
+    "AptitudeInterestAgent": "aptitude",
+    "ResumeAnalyzerAgent": "resume",
+
+    "CrossExamAgent": "cross_exam",
+    "GapAnalyzerAgent": "gap_analysis",
+
+    "RecommenderAgent": "recommender"
+}
+
 class BaseAgent:
     def __init__(self, llm_provider=None):
         # If manually provided → use it.
@@ -50,14 +63,29 @@ class BaseAgent:
                 "groq"   # fallback LLM
             )
 
-        self.cache: Dict[str, str] = {}
-
-    async def call_llm_cached(self, key: str, prompt: str) -> str:
-        if key in self.cache:
-            return self.cache[key]
+        self.routing_key = AGENT_ROUTING_KEYS.get(self.__class__.__name__)
 
-        response = await call_llm(self.llm_provider, prompt)
-        cleaned = response.strip()
+    async def call_llm_cached(
+        self, prompt: str, prompt_version: str = None, cache_json: str = "object", **params
+    ) -> str:
+        """
+        Call the LLM through the shared response cache.
+        The cache is keyed on the prompt content (+ template version), so
+        different users never share an entry.
+        Only replies holding a complete JSON value of kind `cache_json` are cached.
+        `params` override generation settings (temperature, max_tokens).
+        """
+        response = await call_llm(
+            self.llm_provider, prompt, cache=True, agent=self.routing_key,
+            prompt_version=prompt_version, cache_json=cache_json, **params
+        )
+        return response.strip()
 
-        self.cache[key] = cleaned
-        return cleaned
+    def stream_llm_cached(
+        self, prompt: str, prompt_version: str = None, cache_json: str = "object", **params
+    ) -> AsyncIterator[str]:
+        """Streaming counterpart of call_llm_cached (same cache entries)."""
+        return call_llm_stream(
+            self.llm_provider, prompt, cache=True, agent=self.routing_key,
+            prompt_version=prompt_version, cache_json=cache_json, **params
+        )
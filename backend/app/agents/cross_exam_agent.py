@@ -1,24 +1,10 @@
 from app.services.llm_service import call_llm, safe_json_parse
+from app.services.prompt_builder import PromptTemplate
 from app.schemas.user_data import UserData
-from typing import List, Dict, Any
+from app.services.identity_map import parse_user
+from typing import List, Dict, Any, Union
 
-
-class CrossExamAgent:
-    def __init__(self, provider: str = "groq"):
-        self.provider = provider
-        self.previous_rounds: Dict[str, List[str]] = {}
-
-    async def call_llm(self, prompt: str) -> str:
-        return await call_llm(self.provider, prompt)
-
-    async def generate_questions(self, user_data: dict) -> List[str]:
-        """
-        Generate 5–6 deeply personalized cross-examination questions.
-        """
-        user = UserData(**user_data)
-        email = user.email or "anonymous"
-
-        prompt = f"""
+CROSS_EXAM_PROMPT = PromptTemplate("cross_exam", "cross_exam/v2", """
 You are acting like a human career counselor who knows this person personally.
 
 Generate EXACTLY 5–6 short, reflective questions.
@@ -29,17 +15,6 @@ Each question MUST explicitly reference at least ONE concrete user detail
 (name, finances, city, strengths, weaknesses, preferred role, risk style).
 If a detail is missing, do NOT invent it.
 
-USER PROFILE:
-Name: {user.personalInfo.fullName if user.personalInfo else ""}
-Strengths: {user.strengthsAndWeaknesses.strengths if user.strengthsAndWeaknesses else ""}
-Weaknesses: {user.strengthsAndWeaknesses.struggleWith if user.strengthsAndWeaknesses else ""}
-Preferred Role: {user.interests.preferredRole if user.interests else ""}
-Risk-taking: {user.learningRoadmap.riskTaking if user.learningRoadmap else ""}
-Leadership: {user.optionalFields.leadershipRole if user.optionalFields else ""}
-Field of Study: {user.personalInfo.fieldOfStudy if user.personalInfo else ""}
-City: {user.personalInfo.city if user.personalInfo else ""}
-Financial Status: {user.personalInfo.financialStatus if user.personalInfo else ""}
-
 QUESTION RULES:
 1. Every question must combine 2–3 real traits  
    (example: career goal + finances, weakness + role, city + opportunity).
@@ -57,11 +32,49 @@ OUTPUT FORMAT:
   "question 2",
   ...
 ]
-"""
+""")
+
+
+class CrossExamAgent:
+    def __init__(self, provider: str = "groq"):
+        self.provider = provider
+        self.previous_rounds: Dict[str, List[str]] = {}
+
+    async def call_llm(self, prompt: str) -> str:
+        return await call_llm(self.provider, prompt, agent="cross_exam", prompt_version=CROSS_EXAM_PROMPT.version)
+
+    async def generate_questions(self, user_data: Union[dict, UserData]) -> List[str]:
+        """
+        Generate 5–6 deeply personalized cross-examination questions.
+        Accepts the user document or an already parsed UserData.
+        """
+        user = parse_user(user_data)
+        email = user.email or "anonymous"
+
+        info = user.personalInfo
+        sw = user.strengthsAndWeaknesses
+        # Missing details are dropped rather than sent as blank lines
+        profile = {
+            "Name": info.fullName if info else None,
+            "Strengths": sw.strengths if sw else None,
+            "Weaknesses": sw.struggleWith if sw else None,
+            "Preferred Role": user.interests.preferredRole if user.interests else None,
+            "Risk-taking": user.learningRoadmap.riskTaking if user.learningRoadmap else None,
+            "Leadership": user.optionalFields.leadershipRole if user.optionalFields else None,
+            "Field of Study": info.fieldOfStudy if info else None,
+            "City": info.city if info else None,
+            "Financial Status": info.financialStatus if info else None,
+        }
+
+        prompt = (
+            CROSS_EXAM_PROMPT.builder()
+            .section("USER PROFILE", profile, budget=250)
+            .build()
+        )
 
 
         raw = await self.call_llm(prompt)
-        questions = safe_json_parse(raw, fallback=[])
+        questions = safe_json_parse(raw, fallback=[], expect="array")
 
         if not isinstance(questions, list):
             questions = []
@@ -158,25 +158,19 @@
 
 #     return [str(value)]
 from .base_agent import BaseAgent
-from typing import Dict
-from app.services.llm_service import safe_json_parse
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.services.json_stream import JSONParseResult, JSONStreamParser, extract_json
+from app.services.prompt_builder import PromptBuilder, PromptTemplate
+from app.schemas.final_report import ReportCheck, check_report
+from app.config import FINAL_REPORT_MODE, FINAL_REPORT_SECTION_MAX_TOKENS, FINAL_REPORT_REPAIR_ENABLED
 
-class GapAnalyzerAgent(BaseAgent):
-    async def generate_final_report(
-        self,
-        socio_summary: Dict,
-        resume_summary: Dict,
-        learning_summary: Dict,
-        aptitude_summary: Dict,
-        cross_summary: Dict,
-        personal_info: Dict,
-        optional_fields: Dict,
-        constraints: Dict | None = None
-    ) -> Dict:
-        
+logger = logging.getLogger("gap_analyzer")
 
-        # Updated prompt with clear market trends instruction
-        prompt = f"""
+# ---------- Prompt blocks (shared by the single and sectioned report modes) ----------
+
+_COUNSELOR_PREAMBLE = """
 You are a senior human career counselor AI.
 
 Your task is NOT to be generic.
@@ -186,18 +180,16 @@ First, internally identify:
 - Conflicting signals across data (skills vs aptitude, interests vs reality, ambition vs constraints)
 - Overused strengths
 - Hidden risks
+""".strip("\n")
 
-Then generate a JSON career guidance report with the following rules:
-
-================ REQUIRED OUTPUT =================
-
-1. friendly_summary
+_SECTION_SPECS = {
+    "friendly_summary": """friendly_summary
 - 5–6 lines
 - Mention ONE uncomfortable truth gently
 - Mention ONE hidden advantage
-- Mention ONE practical limitation (finance, location, personality, or learning speed)
+- Mention ONE practical limitation (finance, location, personality, or learning speed)""",
 
-2. top_careers (EXACTLY 3)
+    "top_careers": """top_careers (EXACTLY 3)
 Each career must include:
 - name
 - category (one of: SAFE, NON_OBVIOUS, HIGH_RISK)
@@ -210,38 +202,28 @@ RULES FOR CAREERS:
 • Only 1 career can be a “safe/common” choice
 • At least 1 career must be NON-OBVIOUS
 • At least 1 career must be HIGH-RISK / HIGH-EFFORT
-• If two careers are similar, downgrade one
-
-3. strengths
-- Only strengths that are ACTUALLY proven by data
-
-4. weaknesses
-- Include at least 1 internal weakness (habits, confidence, communication, indecision)
-
-5. skill_gaps
-- Gaps that BLOCK progress (not generic learning suggestions)
+• If two careers are similar, downgrade one""",
 
-6. suggestions
-- Actions that REDUCE risk or CONFIRM fit
+    "strengths": """strengths
+- Only strengths that are ACTUALLY proven by data""",
 
-7. next_steps
-- Concrete 30–60–90 day actions
+    "weaknesses": """weaknesses
+- Include at least 1 internal weakness (habits, confidence, communication, indecision)""",
 
-8. key_conflicts
-- 2–3 bullet points describing major contradictions in the user's profile
+    "skill_gaps": """skill_gaps
+- Gaps that BLOCK progress (not generic learning suggestions)""",
 
+    "suggestions": """suggestions
+- Actions that REDUCE risk or CONFIRM fit""",
 
-================ USER DATA =================
-personal_info={personal_info}
-optional_fields={optional_fields}
-socio_summary={socio_summary}
-resume_summary={resume_summary}
-learning_summary={learning_summary}
-aptitude_summary={aptitude_summary}
-cross_summary={cross_summary}
-constraints={constraints}
+    "next_steps": """next_steps
+- Concrete 30–60–90 day actions""",
 
+    "key_conflicts": """key_conflicts
+- 2–3 bullet points describing major contradictions in the user's profile""",
+}
 
+_STRICT_RULES = """
 ================ STRICT RULES =================
 - Do NOT repeat standard career lists blindly
 - Do NOT recommend all tech roles
@@ -249,70 +231,232 @@ constraints={constraints}
 - Do NOT assume high confidence or clarity
 - Every section must feel SPECIFIC to THIS person
 - Return ONLY valid JSON
-"""
+""".strip("\n")
 
 
-        raw = await self.call_llm_cached("final_gap_report", prompt)
-        result = safe_json_parse(raw, fallback={})
-        
-        # Normalize lists to ensure consistency
-        for key in ["strengths", "weaknesses", "skill_gaps", "suggestions", "next_steps"]:
-            val = result.get(key)
-            if not val:
-                result[key] = ["No data available"]
-            elif isinstance(val, dict):
-                result[key] = [str(v) if v else "No data available" for v in val.values()]
-            elif isinstance(val, list):
-                result[key] = [str(v) if v else "No data available" for v in val]
-            else:
-                result[key] = [str(val)]
-
-        # Ensure top_careers exist and each field is filled
-        if "top_careers" not in result or not result["top_careers"]:
-            result["top_careers"] = [
-                {"name": "Career 1", "merits": [], "demerits": [], "trends": []},
-                {"name": "Career 2", "merits": [], "demerits": [], "trends": []},
-                {"name": "Career 3", "merits": [], "demerits": [], "trends": []},
-            ]
-
-        for career in result["top_careers"]:
-            career["name"] = career.get("name") or "Unknown Career"
-            career["merits"] = career.get("merits") or ["No merits info available"]
-            career["demerits"] = career.get("demerits") or ["No demerits info available"]
-            career["trends"] = career.get("trends") or ["No market trends info available"]
-
-        # Ensure friendly summary exists
-        result["friendly_summary"] = str(result.get(
-            "friendly_summary",
-            "Here is your friendly career summary based on your profile."
-        ))
-        
-        # Enforce category diversity
-        categories = [c.get("category") for c in result.get("top_careers", [])]
+def _report_instructions(sections, intro: str) -> str:
+    specs = "\n\n".join(f"{n}. {_SECTION_SPECS[key]}" for n, key in enumerate(sections, 1))
+    return f"{_COUNSELOR_PREAMBLE}\n\n{intro}\n\n================ REQUIRED OUTPUT =================\n\n{specs}\n\n{_STRICT_RULES}"
 
-        if len(set(categories)) < 3:
-        # Soft correction instead of failure
-            result["top_careers"][0]["category"] = "SAFE"
-            result["top_careers"][1]["category"] = "NON_OBVIOUS"
-            result["top_careers"][2]["category"] = "HIGH_RISK"
 
+# Top-level keys of the report, in prompt order (anything else the model emits is not streamed)
+REPORT_SECTIONS = (
+    "friendly_summary", "top_careers", "strengths", "weaknesses",
+    "skill_gaps", "suggestions", "next_steps", "key_conflicts",
+)
 
-        return result
+# Updated prompt with clear market trends instruction
+GAP_REPORT_PROMPT = PromptTemplate("gap_analysis", "gap_analysis/v2", _report_instructions(
+    REPORT_SECTIONS, "Then generate a JSON career guidance report with the following rules:"
+))
+
+# Sectioned mode: three independent parts, merged in this order
+REPORT_PARTS = {
+    "summary": ("friendly_summary", "key_conflicts"),
+    "careers": ("top_careers",),
+    "profile": ("strengths", "weaknesses", "skill_gaps", "suggestions", "next_steps"),
+}
+REPORT_PART_PROMPTS = {
+    part: PromptTemplate("gap_analysis", f"gap_analysis.{part}/v1", _report_instructions(
+        sections,
+        "Then generate a JSON object with EXACTLY these keys (other report sections are produced separately):"
+    ))
+    for part, sections in REPORT_PARTS.items()
+}
+
+# Follow-up prompt that only writes the sections that failed validation
+GAP_REPAIR_PROMPT = PromptTemplate("gap_analysis", "gap_analysis.repair/v1", f"""
+{_COUNSELOR_PREAMBLE}
 
-def normalize_to_list(value):
-    """
-    Convert AI output into a clean list of strings.
-    """
-    if value is None:
-        return []
+An earlier answer for this user's career report was cut off or incomplete.
+ACCEPTED REPORT SECTIONS are final: stay consistent with them and do NOT repeat them.
+Write ONLY the sections listed under SECTIONS TO WRITE, as one JSON object keyed by section name.
 
-    if isinstance(value, list):
-        return [str(v) for v in value if v]
+{_STRICT_RULES}
+""")
+REPAIR_MAX_TOKENS = {"friendly_summary": 250, "top_careers": 300}  # top_careers: per missing career
 
-    if isinstance(value, dict):
-        return [str(v) for v in value.values() if v]
+# on_section(path, value): ("friendly_summary",) → str, ("top_careers", 0) → dict, ...
+SectionCallback = Callable[[Tuple[Any, ...], Any], Awaitable[None]]
 
-    if isinstance(value, str):
-        return [value]
 
-    return [str(value)]
+class GapAnalyzerAgent(BaseAgent):
+    async def generate_final_report(
+        self,
+        socio_summary: Dict,
+        resume_summary: Dict,
+        learning_summary: Dict,
+        aptitude_summary: Dict,
+        cross_summary: Dict,
+        personal_info: Dict,
+        optional_fields: Dict,
+        constraints: Dict | None = None,
+        on_section: Optional[SectionCallback] = None
+    ) -> Dict:
+        """
+        Build the final report. With on_section, the completion is streamed and
+        each section is handed to the callback as soon as it is complete.
+        FINAL_REPORT_MODE="sectioned" splits the report into REPORT_PARTS that
+        run concurrently over the same (once rendered) user context.
+        """
+
+        # User data is rendered once and appended after each static prefix
+        context = (
+            PromptBuilder("gap_analysis")
+            .section("personal_info", personal_info, budget=200)
+            .section("optional_fields", optional_fields, budget=150)
+            .section("socio_summary", socio_summary, budget=350)
+            .section("resume_summary", resume_summary, budget=350)
+            .section("learning_summary", learning_summary, budget=300)
+            .section("aptitude_summary", aptitude_summary, budget=300)
+            .section("cross_summary", cross_summary, budget=400)
+            .section("constraints", constraints or {}, budget=150)
+            .render()
+        )
+
+        if FINAL_REPORT_MODE == "sectioned":
+            result = await self._generate_sectioned(context, on_section)
+        else:
+            parsed = await self._generate(GAP_REPORT_PROMPT, context, REPORT_SECTIONS, on_section)
+            result = parsed.value if parsed.ok and isinstance(parsed.value, dict) else {}
+            result["_meta"] = {"mode": "single", "parts": {"report": parsed.status}}
+
+        check = check_report(result)
+        repaired: List[str] = []
+        if not check.ok and FINAL_REPORT_REPAIR_ENABLED:
+            check, repaired = await self._repair(context, check, on_section)
+
+        # Only validated content is returned; what is still missing stays empty (no invented placeholders)
+        report = {
+            "friendly_summary": check.valid.get("friendly_summary", ""),
+            "top_careers": check.careers,
+            **{key: check.valid.get(key, []) for key in REPORT_SECTIONS if key not in ("friendly_summary", "top_careers")},
+        }
+
+        # Enforce category diversity
+        categories = [c.get("category") for c in report["top_careers"]]
+
+        if len(categories) >= 3 and len(set(categories)) < 3:
+        # Soft correction instead of failure
+            report["top_careers"][0]["category"] = "SAFE"
+            report["top_careers"][1]["category"] = "NON_OBVIOUS"
+            report["top_careers"][2]["category"] = "HIGH_RISK"
+
+        report["_meta"] = {**result.get("_meta", {}), "repaired": repaired, "missing": sorted(check.problems)}
+        return report
+
+    async def _generate(
+        self,
+        template: PromptTemplate,
+        context: str,
+        sections: Tuple[str, ...],
+        on_section: Optional[SectionCallback] = None,
+        **params
+    ) -> JSONParseResult:
+        """One report call; streamed (firing on_section for `sections`) when a callback is given."""
+        prompt = template.builder().text(context).build()
+
+        if on_section is None:
+            raw = await self.call_llm_cached(prompt, template.version, **params)
+            parsed = extract_json(raw, expect="object")
+        else:
+            parser = JSONStreamParser(expect="object")
+            async for chunk in self.stream_llm_cached(prompt, template.version, **params):
+                for path, value in parser.feed(chunk):
+                    if path[0] not in sections:
+                        continue
+                    # sections as a whole, except careers which go out entry by entry
+                    if (len(path) == 1) != (path[0] == "top_careers"):
+                        await on_section(path, value)
+            parsed = parser.finish()
+
+        if parsed.status == "repaired":
+            logger.warning(f"{template.version} output was truncated: {parsed.report()}")
+        return parsed
+
+    async def _repair(
+        self, context: str, check: ReportCheck, on_section: Optional[SectionCallback]
+    ) -> Tuple[ReportCheck, List[str]]:
+        """
+        One small follow-up call for just the fields that failed validation.
+        The accepted sections go along with it, so a truncated answer is
+        continued where it stopped rather than regenerated from scratch.
+        """
+        wanted = list(check.problems)
+        specs = []
+        for key in wanted:
+            if key == "top_careers":
+                taken = ", ".join(c["name"] for c in check.careers) or "none"
+                specs.append(
+                    f"top_careers: EXACTLY {check.careers_needed} more career(s), different from: {taken}\n"
+                    + _SECTION_SPECS[key]
+                )
+            else:
+                specs.append(_SECTION_SPECS[key])
+
+        accepted = {**check.valid, "top_careers": check.careers}
+        prompt = (
+            GAP_REPAIR_PROMPT.builder()
+            .text(context)
+            .section("ACCEPTED REPORT SECTIONS", accepted, budget=700)
+            .section("SECTIONS TO WRITE", "\n\n".join(specs))
+            .build()
+        )
+        max_tokens = sum(
+            REPAIR_MAX_TOKENS.get(key, 150) * (check.careers_needed if key == "top_careers" else 1)
+            for key in wanted
+        )
+
+        try:
+            raw = await self.call_llm_cached(prompt, GAP_REPAIR_PROMPT.version, max_tokens=max_tokens)
+        except Exception as e:
+            logger.error(f"Report repair call failed: {e}")
+            return check, []
+        patch = extract_json(raw, expect="object").value
+        if not isinstance(patch, dict):
+            return check, []
+
+        candidate = {**check.valid, **{key: patch[key] for key in wanted if key in patch}}
+        new_careers = patch.get("top_careers") if "top_careers" in wanted else None
+        candidate["top_careers"] = check.careers + (new_careers if isinstance(new_careers, list) else [])
+
+        fixed = check_report(candidate)
+        repaired = [key for key in wanted if key not in fixed.problems]
+        logger.info(f"Report repair: fixed {repaired}, still missing {sorted(fixed.problems)}")
+
+        if on_section is not None:
+            for key in wanted:
+                if key == "top_careers" and len(fixed.careers) > len(check.careers):
+                    await on_section((key,), fixed.careers)
+                elif key in repaired:
+                    await on_section((key,), fixed.valid[key])
+        return fixed, repaired
+
+    async def _generate_sectioned(self, context: str, on_section: Optional[SectionCallback]) -> Dict:
+        """Run every REPORT_PARTS prompt concurrently and merge their keys in a fixed order."""
+        outcomes = await asyncio.gather(
+            *(
+                self._generate(
+                    REPORT_PART_PROMPTS[part], context, sections, on_section,
+                    max_tokens=FINAL_REPORT_SECTION_MAX_TOKENS[part]
+                )
+                for part, sections in REPORT_PARTS.items()
+            ),
+            return_exceptions=True
+        )
+
+        result: Dict[str, Any] = {}
+        statuses: Dict[str, str] = {}
+        for (part, sections), outcome in zip(REPORT_PARTS.items(), outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Report part '{part}' failed: {outcome}")
+                statuses[part] = "failed"
+                continue
+            statuses[part] = outcome.status
+            value = outcome.value if isinstance(outcome.value, dict) else {}
+            for key in sections:
+                if key in value:
+                    result[key] = value[key]
+
+        result["_meta"] = {"mode": "sectioned", "parts": statuses}
+        return result
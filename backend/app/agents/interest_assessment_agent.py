@@ -2,11 +2,10 @@
 from .base_agent import BaseAgent
 from typing import Dict
 from app.services.llm_service import safe_json_parse
+from app.services.prompt_builder import PromptTemplate
 from app.schemas.user_data import UserData
 
-class AptitudeInterestAgent(BaseAgent):
-    async def analyze_tests(self, tests: Dict, interests: Dict, personal_info: Dict = None) -> Dict:
-        prompt = f"""
+APTITUDE_PROMPT = PromptTemplate("aptitude", "aptitude/v2", """
 You are a career psychologist AI.
 
 Your task is to analyze the user's TEST RESULTS and INTERESTS separately,
@@ -18,17 +17,6 @@ Use these rules:
 3. Interests show WHAT the user wants, not what is optimal.
 4. If tests and interests conflict, highlight the conflict clearly.
 
-User Data:
-Personal Info: {personal_info}
-
-Tests:
-- Aptitude Test: {tests.get("aptitude")}
-- RIASEC Test: {tests.get("riasec")}
-- Big Five (if present): {tests.get("bigFive")}
-
-Interests:
-{interests}
-
 Return ONLY JSON with:
 - dominant_aptitudes
 - dominant_riasec_types
@@ -36,10 +24,25 @@ Return ONLY JSON with:
 - conflicts (if any)
 - suggested_domains (ranked)
 - recommendations (actionable, test-driven)
-"""
+""")
 
-        raw = await self.call_llm_cached("aptitude_interest_summary", prompt)
-        return safe_json_parse(raw, fallback={})
+class AptitudeInterestAgent(BaseAgent):
+    async def analyze_tests(self, tests: Dict, interests: Dict, personal_info: Dict = None) -> Dict:
+        # Only tests that were actually taken reach the prompt
+        prompt = (
+            APTITUDE_PROMPT.builder()
+            .section("Personal Info", personal_info or {}, budget=150)
+            .section("Tests", {
+                "Aptitude Test": tests.get("aptitude"),
+                "RIASEC Test": tests.get("riasec"),
+                "Big Five": tests.get("bigFive"),
+            }, budget=400)
+            .section("Interests", interests, budget=250)
+            .build()
+        )
+
+        raw = await self.call_llm_cached(prompt, APTITUDE_PROMPT.version)
+        return safe_json_parse(raw, fallback={}, expect="object")
 
 # prompt = f"""
 #         Analyze user's tests and interests to suggest career domains.
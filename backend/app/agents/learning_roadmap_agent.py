@@ -1,6 +1,12 @@
 from .base_agent import BaseAgent
 from typing import Dict
 from app.services.llm_service import safe_json_parse
+from app.services.prompt_builder import PromptTemplate
+
+LEARNING_PROMPT = PromptTemplate("learning", "learning/v2", """
+Provide a JSON summary of the user's learning roadmap.
+JSON keys: learning_gaps, recommendations, next_steps.
+""")
 
 class LearningRoadmapAgent(BaseAgent):
     async def analyze_learning(self, learning_data: Dict, strengths_and_weaknesses: Dict, user_name: str = "User") -> Dict:
@@ -13,13 +19,13 @@ class LearningRoadmapAgent(BaseAgent):
             ]
         }
 
-        # Optimized prompt
-        prompt = f"""
-        Provide a JSON summary for {user_name}'s learning roadmap:
-        Learning: {selected}
-        Strengths/Weaknesses: {strengths_and_weaknesses}
-        JSON keys: learning_gaps, recommendations, next_steps.
-        """
+        prompt = (
+            LEARNING_PROMPT.builder()
+            .section("Name", user_name or "User")
+            .section("Learning", selected, budget=250)
+            .section("Strengths/Weaknesses", strengths_and_weaknesses, budget=250)
+            .build()
+        )
 
-        raw = await self.call_llm_cached("learning_summary", prompt)
-        return safe_json_parse(raw, fallback={})
+        raw = await self.call_llm_cached(prompt, LEARNING_PROMPT.version)
+        return safe_json_parse(raw, fallback={}, expect="object")
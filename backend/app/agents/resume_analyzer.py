@@ -2,15 +2,26 @@
 from .base_agent import BaseAgent
 from typing import Dict
 from app.services.llm_service import safe_json_parse
+from app.services.resume_compressor import compress_resume
+from app.services.prompt_builder import PromptTemplate
+from app.config import RESUME_PROMPT_TOKEN_BUDGET
+
+RESUME_PROMPT = PromptTemplate("resume", "resume/v2", """
+Extract skills, projects, and gaps from the resume.
+Compare them with the user's claimed strengths/weaknesses and preferred role.
+Return JSON summary with: skills, projects, gaps.
+""")
 
 class ResumeAnalyzerAgent(BaseAgent):
     async def analyze_resume(self, resume_text: str, strengths_and_weaknesses: Dict, preferred_role: str = "") -> Dict:
-        prompt = f"""
-        Extract skills, projects, and gaps from the resume.
-        Compare with claimed strengths/weaknesses: {strengths_and_weaknesses}.
-        Consider preferred role: {preferred_role}
-        Resume: {resume_text[:500]}...
-        Return JSON summary with: skills, projects, gaps.
-        """
-        raw = await self.call_llm_cached("resume_summary", prompt)
-        return safe_json_parse(raw, fallback={})
+        # Most informative sentences per section, packed into the token budget (no extra LLM call)
+        resume_digest = compress_resume(resume_text, token_budget=RESUME_PROMPT_TOKEN_BUDGET)
+        prompt = (
+            RESUME_PROMPT.builder()
+            .section("Claimed strengths/weaknesses", strengths_and_weaknesses, budget=200)
+            .section("Preferred role", preferred_role, budget=40)
+            .section("Resume (key sections)", resume_digest)
+            .build()
+        )
+        raw = await self.call_llm_cached(prompt, RESUME_PROMPT.version)
+        return safe_json_parse(raw, fallback={}, expect="object")
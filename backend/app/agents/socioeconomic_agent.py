@@ -1,36 +1,14 @@
 from .base_agent import BaseAgent
 from typing import Dict
 from app.services.llm_service import safe_json_parse
+from app.services.prompt_builder import PromptTemplate
 
-class SocioEconomicAgent(BaseAgent):
-    async def generate_summary(self, personal_info: Dict, optional_fields: Dict) -> Dict:
-        selected_optional = {k: optional_fields.get(k) for k in [
-            "favoriteSubjects", "activitiesThatMakeYouLoseTime",
-            "onlineContent", "preferredRole", "preferredCompany", "jobPriorities"
-        ]}
-
-        user_name = personal_info.get("name", "User")
-        location = personal_info.get("location", "Unknown")
-        financial_status = personal_info.get("financialStatus", "Not specified")
-
-        # Optimized prompt
-        prompt = f"""
+SOCIO_PROMPT = PromptTemplate("socio", "socio/v2", """
 You are a practical career counselor AI.
 
 Your task is to analyze the user's socio-economic background and determine
 REAL-WORLD CONSTRAINTS on career choices.
 
-User Details:
-Name: {user_name}
-Location: {location}
-Financial Status: {financial_status}
-
-Personal Info:
-{personal_info}
-
-Preferences:
-{selected_optional}
-
 Analyze and return ONLY JSON with the following keys:
 
 1. location_constraints
@@ -62,11 +40,25 @@ STRICT RULES:
 - Explicitly state limitations
 - Avoid generic advice
 - Return JSON only
-"""
+""")
+
+class SocioEconomicAgent(BaseAgent):
+    async def generate_summary(self, personal_info: Dict, optional_fields: Dict) -> Dict:
+        selected_optional = {k: optional_fields.get(k) for k in [
+            "favoriteSubjects", "activitiesThatMakeYouLoseTime",
+            "onlineContent", "preferredRole", "preferredCompany", "jobPriorities"
+        ]}
 
+        # Name / location / finances are part of personal_info → rendered once
+        prompt = (
+            SOCIO_PROMPT.builder()
+            .section("User Details", personal_info, budget=200)
+            .section("Preferences", selected_optional, budget=200)
+            .build()
+        )
 
-        raw = await self.call_llm_cached("socioeconomic_summary", prompt)
-        return safe_json_parse(raw, fallback={})
+        raw = await self.call_llm_cached(prompt, SOCIO_PROMPT.version)
+        return safe_json_parse(raw, fallback={}, expect="object")
 
 # prompt = f"""
 #         JSON summary for {user_name}:
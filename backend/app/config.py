@@ -7,15 +7,171 @@
 #     "gap_analysis": "gemini",   # deep analysis
 #     "recommender": "openai"     # balanced recommendations
 # }
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One shared Mongo client (app/database.py) for every route, service and the worker.
+# read_preference applies to all reads: keep "primary" unless stale reads are
+# acceptable everywhere (the job queue and SSE snapshots read right after writing).
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "pathwise_db")
+MONGO_CLIENT_SETTINGS = {
+    "max_pool_size": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+    "min_pool_size": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    "max_idle_time_ms": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    "connect_timeout_ms": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+    "server_selection_timeout_ms": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")),
+    "socket_timeout_ms": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")),    # 0 = no socket timeout
+    "read_preference": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+    "write_concern": os.getenv("MONGO_WRITE_CONCERN", ""),                # e.g. "majority" or "1"; empty = server default
+    "write_timeout_ms": int(os.getenv("MONGO_WRITE_TIMEOUT_MS", "0")),     # 0 = wait indefinitely
+}
+
+# Failover preference list per agent, used by the LLM router when a provider's
+# circuit breaker is open or a call fails (the agent's own provider is tried first)
 AGENT_LLM_MAPPING = {
-    "cross_exam": "gemini_flash",         # MUST be Gemini (deep reasoning)
-    "gap_analysis": "gemini",       # MUST be Gemini (multi-layer logic)
+    "cross_exam": ["groq", "gemini", "openai"],      # Gemini as reasoning backup
+    "gap_analysis": ["groq", "gemini", "openai"],    # Gemini handles multi-layer logic well
+
+    "resume": ["groq", "openai", "gemini"],          # Groq is PERFECT here (cheap + fast)
+    "learning": ["groq", "openai", "gemini"],        # simple summarization
+    "aptitude": ["groq", "openai", "gemini"],        # basic logic only
+    "socio": ["groq", "openai", "gemini"],           # summarization only
+    "optional_fields": ["groq", "openai", "gemini"], # small extraction
+    "recommender": ["openai", "groq", "gemini"]      # writing + polish
+}
+
+# HTTP connection pool used by every LLM provider client (one pool per provider)
+LLM_HTTP_SETTINGS = {
+    "http2": os.getenv("LLM_HTTP2", "true").lower() == "true",
+    "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+    "max_keepalive_connections": int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    "keepalive_expiry": float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+    "timeout": float(os.getenv("LLM_TIMEOUT", "60")),
+    "connect_timeout": float(os.getenv("LLM_CONNECT_TIMEOUT", "30")),
+}
+
+# LLM response cache: in-process LRU tier + shared Mongo tier (collection "llm_cache")
+LLM_CACHE_SETTINGS = {
+    "enabled": os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+    "memory_max_entries": int(os.getenv("LLM_CACHE_MEMORY_MAX_ENTRIES", "512")),
+    "memory_ttl_seconds": int(os.getenv("LLM_CACHE_MEMORY_TTL", "900")),
+    "shared_enabled": os.getenv("LLM_CACHE_SHARED_ENABLED", "true").lower() == "true",
+    "shared_ttl_seconds": int(os.getenv("LLM_CACHE_SHARED_TTL", "86400")),
+}
+
+# Coalesce concurrent identical LLM calls into a single upstream request
+LLM_SINGLE_FLIGHT_ENABLED = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# CareerGuidanceOrchestrator: independent agents run concurrently under this cap
+ORCHESTRATOR_SETTINGS = {
+    "max_concurrency": int(os.getenv("ORCHESTRATOR_MAX_CONCURRENCY", "5")),
+    "stage_timeout": float(os.getenv("ORCHESTRATOR_STAGE_TIMEOUT", "90")),
+    "final_stage_timeout": float(os.getenv("ORCHESTRATOR_FINAL_STAGE_TIMEOUT", "180")),
+}
+
+
+def _provider_limits(provider: str, max_concurrency: int, rpm: int, tpm: int) -> dict:
+    """Per-provider bulkhead limits, overridable with e.g. LLM_GROQ_RPM=60 (0 disables a bucket)."""
+    prefix = f"LLM_{provider.upper()}_"
+    return {
+        "max_concurrency": int(os.getenv(prefix + "MAX_CONCURRENCY", str(max_concurrency))),
+        "rpm": int(os.getenv(prefix + "RPM", str(rpm))),
+        "tpm": int(os.getenv(prefix + "TPM", str(tpm))),
+    }
 
-    "resume": "groq",               # Groq is PERFECT here (cheap + fast)
-    "learning": "groq",             # simple summarization
-    "aptitude": "groq",             # basic logic only
-    "socio": "groq",                # summarization only
-    "optional_fields": "groq",      # small extraction
-    "recommender": "openai"         # writing + polish
+# Concurrency + requests/tokens per minute for each provider
+LLM_PROVIDER_LIMITS = {
+    "groq": _provider_limits("groq", max_concurrency=8, rpm=30, tpm=12000),
+    "gemini": _provider_limits("gemini", max_concurrency=8, rpm=60, tpm=250000),
+    "openai": _provider_limits("openai", max_concurrency=16, rpm=500, tpm=200000),
 }
+# Background waiters older than this are served before new interactive work
+LLM_BACKGROUND_PROMOTE_AFTER = float(os.getenv("LLM_BACKGROUND_PROMOTE_AFTER", "30"))
+
+# Health-aware routing: rolling window per provider + circuit breaker thresholds
+LLM_ROUTER_SETTINGS = {
+    "window_seconds": float(os.getenv("LLM_ROUTER_WINDOW_SECONDS", "60")),
+    "min_calls": int(os.getenv("LLM_ROUTER_MIN_CALLS", "5")),
+    "error_rate_threshold": float(os.getenv("LLM_ROUTER_ERROR_RATE", "0.5")),
+    "slow_call_seconds": float(os.getenv("LLM_ROUTER_SLOW_CALL_SECONDS", "30")),
+    "slow_call_rate_threshold": float(os.getenv("LLM_ROUTER_SLOW_CALL_RATE", "0.5")),
+    "open_seconds": float(os.getenv("LLM_ROUTER_OPEN_SECONDS", "30")),
+    # a half-open probe that never reports back (lost task, hung stream) stops blocking after this
+    "probe_timeout_seconds": float(os.getenv("LLM_ROUTER_PROBE_TIMEOUT_SECONDS", "120")),
+}
+
+# Hedged requests (opt-in): if an agent's call is slower than its latency percentile,
+# send a backup request (to `alternate` or the same provider); first answer wins.
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+LLM_HEDGING_POLICIES = {
+    "socio": {"percentile": 95, "alternate": None},
+    "learning": {"percentile": 95, "alternate": None},
+    "gap_analysis": {"percentile": 90, "alternate": "gemini"},
+}
+LLM_HEDGING_SETTINGS = {
+    "min_samples": int(os.getenv("LLM_HEDGING_MIN_SAMPLES", "20")),    # below this, use default_delay
+    "default_delay_seconds": float(os.getenv("LLM_HEDGING_DEFAULT_DELAY", "8")),
+    "min_delay_seconds": float(os.getenv("LLM_HEDGING_MIN_DELAY", "1")),
+    "window_size": int(os.getenv("LLM_HEDGING_WINDOW_SIZE", "200")),    # latencies kept per agent
+    "budget_ratio": float(os.getenv("LLM_HEDGING_BUDGET_RATIO", "0.1")),  # extra calls / total calls
+    "budget_burst": int(os.getenv("LLM_HEDGING_BUDGET_BURST", "5")),
+}
+
+# Durable career finalization queue (backed by the career_tasks collection).
+# mode "inprocess": the API process runs the workers; "external": run `python -m app.worker`.
+JOB_QUEUE_SETTINGS = {
+    "mode": os.getenv("JOB_QUEUE_MODE", "inprocess"),
+    "workers": int(os.getenv("JOB_QUEUE_WORKERS", "2")),
+    "lease_seconds": float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "120")),
+    "heartbeat_seconds": float(os.getenv("JOB_QUEUE_HEARTBEAT_SECONDS", "30")),
+    "poll_interval_seconds": float(os.getenv("JOB_QUEUE_POLL_INTERVAL", "2")),
+    "max_attempts": int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "3")),
+    "backoff_base_seconds": float(os.getenv("JOB_QUEUE_BACKOFF_BASE", "5")),
+    "backoff_max_seconds": float(os.getenv("JOB_QUEUE_BACKOFF_MAX", "300")),
+    "drain_timeout_seconds": float(os.getenv("JOB_QUEUE_DRAIN_TIMEOUT", "30")),
+}
+
+# How finalization progress reaches SSE clients:
+# "memory" (in-process pub/sub, worker in the same process) or
+# "changestream" (Mongo change streams, needed with JOB_QUEUE_MODE=external; requires a replica set)
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "memory")
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Stream the final report from the provider and publish each section
+# (partial_report.<section>) as soon as it is complete
+FINAL_REPORT_STREAMING = os.getenv("FINAL_REPORT_STREAMING", "true").lower() == "true"
+
+# "single": one call for the whole report.
+# "sectioned": summary + conflicts, careers, and strengths/gaps/next steps are
+# generated by three smaller concurrent calls over the same user context.
+FINAL_REPORT_MODE = os.getenv("FINAL_REPORT_MODE", "single")
+# Fields that fail schema validation are regenerated by one small follow-up call
+FINAL_REPORT_REPAIR_ENABLED = os.getenv("FINAL_REPORT_REPAIR_ENABLED", "true").lower() == "true"
+FINAL_REPORT_SECTION_MAX_TOKENS = {
+    "summary": int(os.getenv("FINAL_REPORT_SUMMARY_MAX_TOKENS", "450")),
+    "careers": int(os.getenv("FINAL_REPORT_CAREERS_MAX_TOKENS", "900")),
+    "profile": int(os.getenv("FINAL_REPORT_PROFILE_MAX_TOKENS", "700")),
+}
+
+# Resume parsing runs in a bounded process pool so pdfplumber/python-docx never block the event loop
+RESUME_PARSER_SETTINGS = {
+    "workers": int(os.getenv("RESUME_PARSER_WORKERS", "2")),
+    "timeout_seconds": float(os.getenv("RESUME_PARSER_TIMEOUT", "20")),
+    "memory_limit_mb": int(os.getenv("RESUME_PARSER_MEMORY_LIMIT_MB", "512")),
+    "max_tasks_per_child": int(os.getenv("RESUME_PARSER_MAX_TASKS_PER_CHILD", "50")),
+    "max_file_bytes": int(os.getenv("RESUME_MAX_FILE_BYTES", str(5 * 1024 * 1024))),
+    # uploads above this size are spooled to a temp file instead of memory
+    "spool_memory_bytes": int(os.getenv("RESUME_SPOOL_MEMORY_BYTES", str(512 * 1024))),
+    # extraction stops early once either budget is reached
+    "max_pages": int(os.getenv("RESUME_MAX_PAGES", "10")),
+    "max_chars": int(os.getenv("RESUME_MAX_CHARS", "40000")),
+}
+
+# Parsed resumes + analyses cached by file content hash (collection "resumes")
+RESUME_CACHE_TTL_SECONDS = int(os.getenv("RESUME_CACHE_TTL", str(30 * 24 * 3600)))
 
+# Resume text sent to ResumeAnalyzerAgent is compressed extractively to this many tokens
+RESUME_PROMPT_TOKEN_BUDGET = int(os.getenv("RESUME_PROMPT_TOKEN_BUDGET", "700"))
@@ -1,13 +1,96 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
+# app/database.py
+# The one Mongo client for the whole app: opened on startup, closed on shutdown.
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+from app.config import RESUME_CACHE_TTL_SECONDS, MONGO_URI, MONGO_DB_NAME, MONGO_CLIENT_SETTINGS
 
-load_dotenv()
+_client: Optional[AsyncIOMotorClient] = None
 
-MONGO_URI = os.getenv("MONGO_URI")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["pathwise_db"]  # Your main database
 
-# Ensure index on email inside "personal" field
+def _client_options() -> dict:
+    settings = MONGO_CLIENT_SETTINGS
+    options = {
+        "maxPoolSize": settings["max_pool_size"],
+        "minPoolSize": settings["min_pool_size"],
+        "maxIdleTimeMS": settings["max_idle_time_ms"],
+        "connectTimeoutMS": settings["connect_timeout_ms"],
+        "serverSelectionTimeoutMS": settings["server_selection_timeout_ms"],
+        "readPreference": settings["read_preference"],
+    }
+    if settings["socket_timeout_ms"]:
+        options["socketTimeoutMS"] = settings["socket_timeout_ms"]
+    write_concern = settings["write_concern"]
+    if write_concern:
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    if settings["write_timeout_ms"]:
+        options["wTimeoutMS"] = settings["write_timeout_ms"]
+    return options
+
+
+def open_client() -> AsyncIOMotorClient:
+    """Create the shared, pooled Mongo client (idempotent)."""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(MONGO_URI, **_client_options())
+    return _client
+
+
+def close_client():
+    """Close the shared client and its connection pool."""
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
+
+
+def get_db() -> AsyncIOMotorDatabase:
+    """The app database on the shared client (opens it on first use, e.g. in CLI tools)."""
+    return open_client()[MONGO_DB_NAME]
+
+
+class LazyCollection:
+    """
+    Module-level collection handle that resolves against the shared client at call
+    time, so importing a service never opens a connection and every caller uses
+    the same pool.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get(self):
+        return get_db()[self.name]
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+
+USER_EMAIL_INDEX = "email_1"
+LEGACY_USER_EMAIL_INDEX = "personal.email_1"
+
+# Canonical user lookup key: normalized top-level email. Sparse so documents that
+# predate the key do not block the build; the migration backfills them.
+async def create_user_email_index():
+    await get_db().user_data.create_index("email", unique=True, sparse=True, name=USER_EMAIL_INDEX)
+
+# Serves the personal.email fallback lookup while documents without the canonical key remain
+async def create_legacy_user_email_index():
+    await get_db().user_data.create_index("personal.email", name=LEGACY_USER_EMAIL_INDEX)
+
 async def create_indexes():
-    await db.user_data.create_index("personal.email", unique=True)
+    db = get_db()
+    try:
+        await create_user_email_index()
+    except OperationFailure as e:
+        print(f"[MongoDB] ⚠️ Could not build {USER_EMAIL_INDEX} ({e}); run `python -m app.migrations.user_email`")
+
+    # Shared LLM response cache: Mongo removes entries once expiresAt has passed
+    await db.llm_cache.create_index("expiresAt", expireAfterSeconds=0)
+
+    # Resume cache keyed by content hash; entries unused for RESUME_CACHE_TTL expire
+    await db.resumes.create_index("last_seen_at", expireAfterSeconds=RESUME_CACHE_TTL_SECONDS)
+
+    # Career task queue: claim by status + due time, recover by lease expiry
+    await db.career_tasks.create_index([("status", 1), ("available_at", 1)])
+    await db.career_tasks.create_index([("status", 1), ("lease_expires_at", 1)])
@@ -1,9 +1,11 @@
 # services/gemini_service.py
 import os
-import asyncio
+import json
 import logging
-import google.generativeai as genai
+from typing import AsyncIterator, Optional
+import httpx
 from dotenv import load_dotenv
+from .http_pool import create_http_client
 
 logger = logging.getLogger("gemini_service")
 logging.basicConfig(level=logging.INFO)
@@ -14,30 +16,95 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise EnvironmentError("GEMINI_API_KEY not found in .env file.")
 
-genai.configure(api_key=GEMINI_API_KEY)
-
 # ✨ Use correct model from your ListModels output
 MODEL_NAME = "models/gemini-2.5-pro"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/"
+
+# Gemini is called over its REST API so it shares the same pooled HTTP/2
+# transport as the other providers (the SDK builds a model + channel per call).
+_client: Optional[httpx.AsyncClient] = None
+
+
+def open_client() -> httpx.AsyncClient:
+    """Create the pooled Gemini client (idempotent)."""
+    global _client
+    if _client is None:
+        _client = create_http_client(
+            base_url=GEMINI_BASE_URL,
+            headers={"x-goog-api-key": GEMINI_API_KEY},
+        )
+    return _client
+
+
+async def close_client():
+    """Close the Gemini connection pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+
+def _extract_text(data: dict) -> str:
+    candidates = data.get("candidates") or []
+    if not candidates:
+        raise RuntimeError(f"Gemini returned no candidates: {data.get('promptFeedback')}")
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
 
 async def ask_gemini(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
     try:
         logger.info("Sending prompt to Gemini API...")
 
-        def sync_call():
-            model = genai.GenerativeModel(MODEL_NAME)
-            response = model.generate_content(
-                prompt,
-                generation_config={
+        response = await open_client().post(
+            f"{MODEL_NAME}:generateContent",
+            json={
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "generationConfig": {
                     "temperature": temperature,
-                    "max_output_tokens": max_tokens
+                    "maxOutputTokens": max_tokens
                 }
-            )
-            return response.text.strip()
-
-        result = await asyncio.to_thread(sync_call)
+            }
+        )
+        response.raise_for_status()
+        result = _extract_text(response.json()).strip()
         logger.info("Received response from Gemini API")
         return result
 
     except Exception as e:
         logger.error(f"Gemini API call failed: {e}")
         raise RuntimeError(str(e))
+
+
+async def stream_gemini(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> AsyncIterator[str]:
+    """streamGenerateContent over SSE, yielding text deltas as they arrive."""
+    try:
+        logger.info("Streaming prompt to Gemini API...")
+
+        async with open_client().stream(
+            "POST",
+            f"{MODEL_NAME}:streamGenerateContent",
+            params={"alt": "sse"},
+            json={
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": temperature,
+                    "maxOutputTokens": max_tokens
+                }
+            }
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = json.loads(line[5:])
+                if not data.get("candidates") and not data.get("promptFeedback"):
+                    continue  # usage-only chunk
+                text = _extract_text(data)
+                if text:
+                    yield text
+        logger.info("Gemini stream finished")
+
+    except Exception as e:
+        logger.error(f"Gemini streaming call failed: {e}")
+        raise RuntimeError(str(e))
@@ -1,8 +1,10 @@
 import os
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
-from groq import Groq
-import asyncio, httpx
+from groq import AsyncGroq
+import httpx
 import logging
+from .http_pool import create_http_client
 
 logger = logging.getLogger("groq_service")
 logging.basicConfig(level=logging.INFO)
@@ -12,29 +14,73 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise EnvironmentError("GROQ_API_KEY not found in .env file.")
 
-client = Groq(api_key=GROQ_API_KEY, http_client=httpx.Client(timeout=httpx.Timeout(60.0, connect=30.0)))
 MODEL_NAME = "llama-3.3-70b-versatile"
 
+_http_client: Optional[httpx.AsyncClient] = None
+_client: Optional[AsyncGroq] = None
+
+
+def open_client() -> AsyncGroq:
+    """Create the pooled Groq client (idempotent)."""
+    global _http_client, _client
+    if _client is None:
+        _http_client = create_http_client()
+        _client = AsyncGroq(api_key=GROQ_API_KEY, http_client=_http_client)
+    return _client
+
+
+async def close_client():
+    """Close the Groq connection pool."""
+    global _http_client, _client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _client = None
+
+
 async def ask_groq(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
     try:
         logger.info("Sending prompt to Groq API...")
 
-        def sync_call():
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI career counselor."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content.strip()
-
-        response_text = await asyncio.to_thread(sync_call)
+        response = await open_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI career counselor."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        response_text = response.choices[0].message.content.strip()
         logger.info("Received response from Groq API")
         return response_text
 
     except Exception as e:
         logger.error(f"Groq API call failed: {e}")
         raise RuntimeError(f"Groq API call failed: {str(e)}")
+
+
+async def stream_groq(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> AsyncIterator[str]:
+    """Same request as ask_groq, yielding text deltas as they arrive."""
+    try:
+        logger.info("Streaming prompt to Groq API...")
+
+        stream = await open_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI career counselor."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+        logger.info("Groq stream finished")
+
+    except Exception as e:
+        logger.error(f"Groq streaming call failed: {e}")
+        raise RuntimeError(f"Groq streaming call failed: {str(e)}")
@@ -0,0 +1,22 @@
+# app/llm/http_pool.py
+import httpx
+from app.config import LLM_HTTP_SETTINGS
+
+
+def create_http_client(base_url: str = "", headers: dict = None) -> httpx.AsyncClient:
+    """
+    Build a long-lived pooled async HTTP client for one LLM provider.
+    Pool size, keepalive and HTTP/2 come from LLM_HTTP_SETTINGS.
+    """
+    settings = LLM_HTTP_SETTINGS
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers or {},
+        http2=settings["http2"],
+        limits=httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"]),
+    )
@@ -1,9 +1,11 @@
 # services/openai_service.py
 import os
-import asyncio
 import logging
-from openai import OpenAI
+from typing import AsyncIterator, Optional
+import httpx
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from .http_pool import create_http_client
 
 logger = logging.getLogger("openai_service")
 logging.basicConfig(level=logging.INFO)
@@ -13,29 +15,73 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise EnvironmentError("OPENAI_API_KEY not found in .env file.")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 MODEL_NAME = "gpt-4o-mini"  # fast + cheap, you can swap to "gpt-4o"
 
+_http_client: Optional[httpx.AsyncClient] = None
+_client: Optional[AsyncOpenAI] = None
+
+
+def open_client() -> AsyncOpenAI:
+    """Create the pooled OpenAI client (idempotent)."""
+    global _http_client, _client
+    if _client is None:
+        _http_client = create_http_client()
+        _client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=_http_client)
+    return _client
+
+
+async def close_client():
+    """Close the OpenAI connection pool."""
+    global _http_client, _client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _client = None
+
+
 async def ask_openai(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
     try:
         logger.info("Sending prompt to OpenAI API...")
 
-        def sync_call():
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI career counselor."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content.strip()
-
-        response_text = await asyncio.to_thread(sync_call)
+        response = await open_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI career counselor."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        response_text = response.choices[0].message.content.strip()
         logger.info("Received response from OpenAI API")
         return response_text
 
     except Exception as e:
         logger.error(f"OpenAI API call failed: {e}")
         raise RuntimeError(f"OpenAI API call failed: {str(e)}")
+
+
+async def stream_openai(prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> AsyncIterator[str]:
+    """Same request as ask_openai, yielding text deltas as they arrive."""
+    try:
+        logger.info("Streaming prompt to OpenAI API...")
+
+        stream = await open_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI career counselor."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+        logger.info("OpenAI stream finished")
+
+    except Exception as e:
+        logger.error(f"OpenAI streaming call failed: {e}")
+        raise RuntimeError(f"OpenAI streaming call failed: {str(e)}")
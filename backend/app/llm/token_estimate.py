@@ -0,0 +1,15 @@
+# app/llm/token_estimate.py
+import re
+
+# Rough BPE behaviour: ~4 characters per token for English prose, but every
+# word / punctuation run costs at least one token.
+_PIECES = re.compile(r"\w+|[^\w\s]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate, good enough for budgets and rate limits."""
+    if not text:
+        return 0
+    by_chars = len(text) / 4
+    by_pieces = len(_PIECES.findall(text)) * 0.75
+    return int(max(by_chars, by_pieces)) + 1
@@ -2,12 +2,21 @@ from fastapi import FastAPI, Request, HTTPException  #“FastAPI is a Python web
 from fastapi.responses import JSONResponse      #fastapi-package, fastapi.respones-modules(files), JSONResponse-Class
 from fastapi.middleware.cors import CORSMiddleware
 from app.utils.logger import logger   #server-side debugging
-from app.database import create_indexes
+from app.database import create_indexes, open_client as open_mongo_client, close_client as close_mongo_client
+from app.services.llm_service import open_llm_clients, close_llm_clients
+from app.services.job_queue import JobWorkerPool
+from app.services.task_events import watch_career_task_changes
+from app.services import mongo_service
+from app.services.resume_parser_pool import shutdown_parser_pool
+from app.services.identity_map import UserIdentityMapMiddleware
+from app.config import JOB_QUEUE_SETTINGS, TASK_EVENTS_BACKEND
+import asyncio
 from app.routes.submit_info import router as submit_info_router  #features
 from app.routes.cross_exam import router as cross_exam_router
 from app.routes.tests import router as tests_router
 from app.routes.upload_resume import router as upload_resume_router
-from app.routes.final_analysis import router as final_analysis_router
+from app.routes.final_analysis import router as final_analysis_router, finalization_job
+from app.routes.metrics import router as metrics_router
 
 app = FastAPI(         #server brain object/instance and app is a FastAPI application object and ASGI server(uvicorn) runs the app.
     title="AI Career Guidance System",  #sets the API name used in swagger ui/ openapi docs
@@ -32,6 +41,8 @@ app.add_middleware(
     allow_headers=["*"],   #allow all headers, content-type, authorization and content headers, without this, many apis break
 )
 
+app.add_middleware(UserIdentityMapMiddleware)  #per-request user cache: each user document is loaded (and parsed) once per request
+
 # Default route - for simple API check and monitoring 
 @app.get("/")  #route is not called it is registered, and fastapi call later when request arrives 
 async def read_root():
@@ -43,6 +54,7 @@ app.include_router(cross_exam_router)
 app.include_router(tests_router)
 app.include_router(upload_resume_router)
 app.include_router(final_analysis_router)
+app.include_router(metrics_router)
 
 # Custom error handler, 5consistent error format 422-unprocessable entity
 @app.exception_handler(422)
@@ -55,7 +67,27 @@ async def validation_exception_handler(request: Request, exc: HTTPException):
 
 @app.on_event("startup")
 async def startup():
+    open_mongo_client()  #one pooled Mongo client shared by every route, service and job worker
     await create_indexes()  #first start app. then prepare database, then accepts requests
+    await mongo_service.detect_legacy_user_emails()  #match personal.email too until the email backfill has run
+    await open_llm_clients()  #pooled HTTP/2 connections to groq/gemini/openai, reused by every request
+    if JOB_QUEUE_SETTINGS["mode"] == "inprocess":  #otherwise run `python -m app.worker` separately
+        app.state.job_pool = JobWorkerPool(finalization_job)
+        await app.state.job_pool.start()
+    if TASK_EVENTS_BACKEND == "changestream":  #SSE progress written by an external worker
+        app.state.task_watcher = asyncio.create_task(watch_career_task_changes(mongo_service.career_tasks))
+
+@app.on_event("shutdown")
+async def shutdown():
+    task_watcher = getattr(app.state, "task_watcher", None)
+    if task_watcher:
+        task_watcher.cancel()
+    job_pool = getattr(app.state, "job_pool", None)
+    if job_pool:
+        await job_pool.drain()  #finish running finalizations, re-queue the rest
+    await close_llm_clients()  #drain and close provider connection pools
+    shutdown_parser_pool()  #stop resume parser processes
+    close_mongo_client()  #last: job workers and the task watcher no longer use it
 
 # 1. Python loads this file
 # 2. Imports are executed
@@ -66,5 +98,8 @@ async def startup():
 # 7. Startup events are registered (NOT executed yet)
 # 8. Uvicorn starts the server
 # 9. FastAPI fires startup events
-#    → create_indexes() runs
+#    → open_mongo_client() creates the shared Mongo pool, create_indexes() runs
+#    → open_llm_clients() opens provider connection pools
+#    → job workers start (in-process mode) and re-queue stale tasks
 # 10. Application starts accepting requests
+# 11. On shutdown → job workers drain, close_llm_clients() closes the pools, then the Mongo client closes
@@ -0,0 +1 @@
+# Makes migrations a package
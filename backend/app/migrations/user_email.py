@@ -0,0 +1,227 @@
+# app/migrations/user_email.py
+# Backfill the canonical top-level `email` on every user document and verify lookups hit its index.
+#
+#   python -m app.migrations.user_email              # build the index, backfill, check
+#   python -m app.migrations.user_email --dry-run    # report what would change (writes nothing)
+#   python -m app.migrations.user_email --check      # explain() check only
+#   python -m app.migrations.user_email --drop-legacy-index
+#
+# Online: documents are scanned in _id order in small batches and each update is
+# conditional on the value that was read, so it can run while the API is serving.
+# Running API processes keep matching personal.email (mongo_service.user_filter) until
+# they restart; drop the legacy index that serves those lookups only after that.
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.database import (
+    LazyCollection, get_db, close_client, create_user_email_index, USER_EMAIL_INDEX, LEGACY_USER_EMAIL_INDEX,
+)
+from app.services.mongo_service import user_filter, LEGACY_EMAIL_QUERY
+
+DUPLICATE_KEY = 11000
+MISSING_EMAIL = "nobody@example.invalid"   # lookup of a user that does not exist must use the index too
+
+users = LazyCollection("user_data")
+
+
+def canonical_email(doc: dict) -> Optional[str]:
+    for value in (doc.get("email"), (doc.get("personal") or {}).get("email")):
+        if isinstance(value, str) and value.strip():
+            return value.strip().lower()
+    return None
+
+
+async def find_duplicate_emails(limit: int = 20) -> List[dict]:
+    """Normalized emails held by more than one document (they block the unique index)."""
+    pipeline = [
+        {"$project": {"key": {"$toLower": {"$trim": {"input": {"$ifNull": ["$email", "$personal.email"]}}}}}},
+        {"$match": {"key": {"$type": "string", "$ne": ""}}},
+        {"$group": {"_id": "$key", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ]
+    return await users.aggregate(pipeline).to_list(length=limit)
+
+
+async def backfill(batch_size: int, dry_run: bool) -> dict:
+    stats = {"scanned": 0, "updated": 0, "conflicts": [], "no_email": []}
+    last_id = None
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await users.find(
+            query, {"email": 1, "personal.email": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        stats["scanned"] += len(batch)
+
+        ops = []
+        for doc in batch:
+            email = canonical_email(doc)
+            if email is None:
+                stats["no_email"].append(doc["_id"])
+            elif doc.get("email") != email:
+                # only if nobody changed the field since it was read
+                ops.append(UpdateOne({"_id": doc["_id"], "email": doc.get("email")}, {"$set": {"email": email}}))
+
+        if not ops:
+            continue
+        if dry_run:
+            stats["updated"] += len(ops)
+            continue
+        try:
+            result = await users.bulk_write(ops, ordered=False)
+            stats["updated"] += result.modified_count
+        except BulkWriteError as e:
+            stats["updated"] += e.details.get("nModified", 0)
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != DUPLICATE_KEY:
+                    raise
+                op = error["op"]
+                stats["conflicts"].append({"_id": op["q"]["_id"], "email": op["u"]["$set"]["email"]})
+
+        print(f"[migrate] scanned {stats['scanned']}, updated {stats['updated']}")
+
+    return stats
+
+
+async def drop_legacy_index() -> int:
+    if await users.find_one(LEGACY_EMAIL_QUERY, {"_id": 1}):
+        print("[migrate] ❌ documents without the canonical email key remain; run the backfill first")
+        return 1
+    indexes = await users.index_information()
+    if LEGACY_USER_EMAIL_INDEX in indexes:
+        await users.drop_index(LEGACY_USER_EMAIL_INDEX)
+        print(f"[migrate] dropped legacy index {LEGACY_USER_EMAIL_INDEX}")
+    return 0
+
+
+# ------------------- explain() check -------------------
+def _plan_stages(node):
+    if isinstance(node, dict):
+        if "stage" in node:
+            yield node
+        for value in node.values():
+            yield from _plan_stages(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _plan_stages(value)
+
+
+def _explain_commands(email: str) -> dict:
+    """
+    The three query shapes mongo_service uses for users: find, update (upsert) and
+    findAndModify, with the canonical filter the API uses once no legacy document is left.
+    """
+    query = user_filter(email, legacy=False)
+    return {
+        "find": {"find": "user_data", "filter": query, "limit": 1},
+        "update": {"update": "user_data", "updates": [
+            {"q": query, "u": {"$set": {"_explain": 1}}, "upsert": True}
+        ]},
+        "findAndModify": {"findAndModify": "user_data", "query": query,
+                          "update": {"$set": {"_explain": 1}}, "upsert": True, "new": True},
+    }
+
+
+async def check_email_lookups(sample_size: int = 20) -> List[str]:
+    """
+    explain() every user lookup shape for a sample of real emails (plus a missing one).
+    Returns the failures; empty means every winning plan is an IXSCAN on the email index.
+    """
+    sampled = await users.aggregate([
+        {"$match": {"email": {"$type": "string"}}},
+        {"$sample": {"size": sample_size}},
+        {"$project": {"email": 1}},
+    ]).to_list(length=sample_size)
+    emails = [doc["email"] for doc in sampled] + [MISSING_EMAIL]
+
+    failures = []
+    for email in emails:
+        for name, command in _explain_commands(email).items():
+            explained = await get_db().command("explain", command, verbosity="queryPlanner")
+            stages = list(_plan_stages(explained["queryPlanner"]["winningPlan"]))
+            uses_index = any(
+                s["stage"] == "IXSCAN" and s.get("indexName") == USER_EMAIL_INDEX for s in stages
+            )
+            if not uses_index or any(s["stage"] == "COLLSCAN" for s in stages):
+                plan = " → ".join(s["stage"] for s in stages)
+                failures.append(f"{name} {email}: {plan or 'no plan'}")
+    return failures
+
+
+# ------------------- CLI -------------------
+async def run(batch_size: int, dry_run: bool, check_only: bool, drop_legacy: bool = False) -> int:
+    if drop_legacy:
+        return await drop_legacy_index()
+
+    if not check_only:
+        if dry_run:
+            # read-only: report what would block the index instead of building it
+            for dup in await find_duplicate_emails():
+                print(f"[migrate] ⚠️ {dup['_id']} is used by {dup['count']} documents: {dup['ids']}")
+        else:
+            try:
+                await create_user_email_index()
+            except OperationFailure as e:
+                print(f"[migrate] ❌ cannot build {USER_EMAIL_INDEX}: {e}")
+                for dup in await find_duplicate_emails():
+                    print(f"[migrate]    {dup['_id']} is used by {dup['count']} documents: {dup['ids']}")
+                print("[migrate] merge or remove the duplicates above, then run again")
+                return 1
+
+        stats = await backfill(batch_size, dry_run)
+        print(
+            f"[migrate] {'would update' if dry_run else 'updated'} {stats['updated']} "
+            f"of {stats['scanned']} documents"
+        )
+        for doc in stats["no_email"]:
+            print(f"[migrate] ⚠️ {doc} has no email at all (not reachable by any lookup)")
+        for conflict in stats["conflicts"]:
+            print(f"[migrate] ❌ {conflict['_id']}: {conflict['email']} already belongs to another document")
+        if dry_run:
+            return 0
+        if stats["conflicts"]:
+            print("[migrate] resolve the conflicts above, then run again")
+            return 1
+        print(
+            "[migrate] backfill done: restart the API and workers (they stop matching personal.email), "
+            "then run with --drop-legacy-index"
+        )
+
+    failures = await check_email_lookups()
+    for failure in failures:
+        print(f"[migrate] ❌ not an index hit: {failure}")
+    if failures:
+        return 1
+    print(f"[migrate] ✅ every user lookup uses {USER_EMAIL_INDEX}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill and verify the canonical user email key")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    parser.add_argument("--check", action="store_true", help="only run the explain() index check")
+    parser.add_argument("--drop-legacy-index", action="store_true",
+                        help=f"drop {LEGACY_USER_EMAIL_INDEX} once every document has the canonical key")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run_and_close(args)))
+
+
+async def _run_and_close(args) -> int:
+    try:
+        return await run(args.batch_size, args.dry_run, args.check, args.drop_legacy_index)
+    finally:
+        close_client()
+
+
+if __name__ == "__main__":
+    main()
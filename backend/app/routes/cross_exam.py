@@ -21,7 +21,7 @@ async def generate_questions(payload: GenerateQuestionsRequest):
     email = payload.email
 
     # Fetch user data
-    user_data = await mongo_service.get_user_by_email(email)
+    user_data = await mongo_service.get_user_by_email(email, fields="cross_exam")
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -46,14 +46,15 @@ async def submit_answers(req: SubmitAnswersRequest):
     email = req.email
     answers = req.answers
 
-    # Fetch user
-    user_data = await mongo_service.get_user_by_email(email)
+    # Save answers only (analysis can be done in next step); never creates a user,
+    # so a missing user comes back as None from the same round trip
+    user_data = await mongo_service.find_and_update_user(
+        email,
+        {"aiInsights.partials.crossExam.answers": answers},
+        create_if_missing=False,
+        fields="exists",
+    )
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Save answers only (analysis can be done in next step)
-    await mongo_service.update_user_by_email(email, {
-        "aiInsights.partials.crossExam.answers": answers
-    })
-
     return {"message": "Answers submitted successfully"}
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
 from uuid import uuid4
+from typing import Any, Dict
 import asyncio
-from typing import Dict
+import json
 
 from app.services import mongo_service
 from app.agents.gap_analyzer import GapAnalyzerAgent
+from app.services.rate_limiter import set_llm_priority, BACKGROUND
+from app.services.job_queue import enqueue_career_task, PermanentJobError
+from app.services.task_events import task_events
+from app.schemas.final_report import REQUIRED_CAREERS, as_str_list, as_text, coerce_career
+from app.config import SSE_HEARTBEAT_SECONDS, FINAL_REPORT_STREAMING
 
 router = APIRouter()
 gap_agent = GapAnalyzerAgent()
@@ -15,17 +22,34 @@ class FinalizeCareerRequest(BaseModel):
     email: EmailStr
 
 
-# --------------------- Helper: Force list ---------------------
-def force_list(value):
-    if value is None:
-        return []
-    if isinstance(value, list):
-        return [str(v) for v in value if v]
-    if isinstance(value, dict):
-        return [str(v) for v in value.values() if v]
-    if isinstance(value, str):
-        return [value]
-    return [str(value)]
+# --------------------- Helper: stream sections ---------------------
+def section_publisher(task_id: str):
+    """
+    on_section callback for GapAnalyzerAgent: write each finished section to
+    partial_report.<section> (→ SSE update) while the rest is still generating.
+    """
+    careers = []
+
+    async def publish(path, value):
+        section = path[0]
+        if section == "top_careers":
+            if len(path) == 1:
+                # whole list (end of stream or after a repair) replaces the entries sent so far
+                careers[:] = [coerce_career(c) for c in value] if isinstance(value, list) else careers
+            else:
+                careers.append(coerce_career(value))
+            updates = {"partial_report.top_careers": list(careers)}
+        elif section == "friendly_summary":
+            updates = {"partial_report.friendly_summary": as_text(value)}
+        else:
+            updates = {f"partial_report.{section}": as_str_list(value)}
+        try:
+            await mongo_service.update_career_task(task_id, updates)
+        except Exception as e:
+            # Progress is best effort; the full report is still written at the end
+            print(f"[Finalization] ⚠️ Could not publish {section} for {task_id}: {e}")
+
+    return publish
 
 
 # --------------------- POST: Start Finalization ---------------------
@@ -34,24 +58,13 @@ async def start_finalization(req: FinalizeCareerRequest):
     email = req.email
 
     # 1. Fetch user
-    user_data = await mongo_service.get_user_by_email(email)
+    user_data = await mongo_service.get_user_by_email(email, fields="exists")
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # 2. Create persistent task
+    # 2. Create persistent task — picked up by the job worker pool (survives restarts)
     task_id = str(uuid4())
-
-    await mongo_service.create_career_task({
-        "_id": task_id,
-        "email": email,
-        "status": "running",
-        "current_stage": 0,
-        "partial_report": None,
-        "error": None
-    })
-
-    # 3. Run background job
-    asyncio.create_task(run_finalization(task_id, user_data))
+    await enqueue_career_task(task_id, email)
 
     return {"task_id": task_id}
 
@@ -66,8 +79,94 @@ async def get_finalization_status(task_id: str):
     return task
 
 
+# --------------------- GET: Stream Status (SSE) ---------------------
+TERMINAL_STATUSES = ("completed", "failed")
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Task fields the result page renders (lease / attempt bookkeeping changes without being published)
+CLIENT_TASK_FIELDS = ("status", "current_stage", "partial_report", "error")
+
+def _client_view(task: Dict) -> Dict:
+    return {field: task.get(field) for field in CLIENT_TASK_FIELDS}
+
+def _merge_updates(task: Dict, updates: Dict):
+    """Apply $set-style updates (dotted keys) to a task dict, like the client does."""
+    for path, value in updates.items():
+        keys = path.split(".")
+        node = task
+        for key in keys[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node[keys[-1]] = value
+
+@router.get("/finalize-career-path/stream/{task_id}")
+async def stream_finalization_status(task_id: str, request: Request):
+    """
+    Server-Sent Events instead of polling: one snapshot read, then every
+    task update ($set fields) is pushed as an `update` event. The stream ends
+    with a `done` event once the task is completed or failed.
+
+    Updates only arrive through this process's broker. When another process
+    runs the job (several API workers with the memory backend), nothing is
+    published here, so every idle heartbeat re-reads the task and sends it as
+    a fresh `snapshot` when it changed; the stream still ends with `done`.
+    """
+    # Subscribe before reading so no update between read and subscribe is lost
+    queue = task_events.subscribe(task_id)
+    task = await mongo_service.get_career_task(task_id)
+    if not task:
+        task_events.unsubscribe(task_id, queue)
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def event_stream():
+        current = dict(task)     # task as the client currently sees it
+        try:
+            yield _sse("snapshot", task)
+            status = task.get("status")
+            while status not in TERMINAL_STATUSES:
+                try:
+                    updates = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    latest = await mongo_service.get_career_task(task_id)
+                    if latest and _client_view(latest) != _client_view(current):
+                        current.clear()
+                        current.update(latest)
+                        status = latest.get("status", status)
+                        yield _sse("snapshot", latest)
+                    else:
+                        yield ": keep-alive\n\n"
+                    continue
+                _merge_updates(current, updates)
+                status = updates.get("status", status)
+                yield _sse("update", updates)
+            yield _sse("done", {"status": status})
+        finally:
+            task_events.unsubscribe(task_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # --------------------- Background Task ---------------------
+async def finalization_job(task: Dict[str, Any]):
+    """Job-queue handler: load the user fresh (only what the report uses) and run the finalization."""
+    user_data = await mongo_service.get_user_by_email(task["email"], fields="finalization")
+    if not user_data:
+        raise PermanentJobError("User not found")
+    await run_finalization(task["_id"], user_data)
+
+
 async def run_finalization(task_id: str, user_data: Dict):
+    # Background work: interactive routes get provider capacity first
+    set_llm_priority(BACKGROUND)
     try:
         # ---------------- Step 1: Collect partial summaries ----------------
         await mongo_service.update_career_task(task_id, {
@@ -105,36 +204,20 @@ async def run_finalization(task_id: str, user_data: Dict):
             cross_summary=cross_summary,
             personal_info=user_data.get("personalInfo", {}),
             optional_fields=user_data.get("optionalFields", {}),
-            constraints=constraints
-        )
-
-        # ---------------- Step 4: HARD normalize for frontend ----------------
-
-        final_report["friendly_summary"] = str(
-            final_report.get("friendly_summary", "")
+            constraints=constraints,
+            on_section=section_publisher(task_id) if FINAL_REPORT_STREAMING else None
         )
 
-        # Normalize simple list fields
-        for key in ["strengths", "weaknesses", "skill_gaps", "suggestions", "next_steps"]:
-            final_report[key] = force_list(final_report.get(key))
-
-        # CRITICAL FIX: normalize top_careers completely
-        normalized_careers = []
-
-        for career in final_report.get("top_careers", []):
-            normalized_careers.append({
-                "name": str(career.get("name", "Unknown Career")),
-                "category": career.get("category", "SAFE"),
-                "merits": force_list(career.get("merits")),
-                "demerits": force_list(career.get("demerits")),
-                "trends": force_list(career.get("trends")),
-            })
-
-        final_report["top_careers"] = normalized_careers
-
+        # ---------------- Step 4: Quality flag ----------------
+        # The agent returns a schema-validated report (missing fields were
+        # repaired where possible); mode, per-part status and repairs are in _meta.
+        # A failed repair can leave fewer than REQUIRED_CAREERS careers: never "ok" then
+        generation = final_report.get("_meta", {})
+        complete = not generation.get("missing") and len(final_report.get("top_careers", [])) >= REQUIRED_CAREERS
         final_report["_meta"] = {
+            **generation,
             "generated_by": "GapAnalyzerAgent",
-            "quality": "ok" if normalized_careers else "degraded"
+            "quality": "ok" if complete else "degraded"
         }
 
         # ---------------- Step 5: Persist results ----------------
@@ -143,13 +226,14 @@ async def run_finalization(task_id: str, user_data: Dict):
             final_report
         )
 
+        # The job queue writes "completed" itself, and only while this worker holds the lease
         await mongo_service.update_career_task(task_id, {
-            "status": "completed",
             "partial_report": {"final_report": final_report}
         })
 
     except Exception as e:
+        # The job queue decides between retry (status back to "queued") and "failed"
         await mongo_service.update_career_task(task_id, {
-            "status": "failed",
             "error": str(e)
         })
+        raise
@@ -0,0 +1,19 @@
+# app/routes/metrics.py
+from fastapi import APIRouter
+from app.services.llm_cache import llm_cache
+from app.services.llm_service import llm_single_flight, provider_limiters, llm_router, llm_hedger
+from app.services.prompt_builder import prompt_size_stats
+
+router = APIRouter()
+
+@router.get("/metrics/llm")
+async def llm_metrics():
+    """Runtime counters for the LLM layer (per worker process)."""
+    return {
+        "cache": llm_cache.stats(),
+        "single_flight": llm_single_flight.stats(),
+        "providers": {name: limiter.stats() for name, limiter in provider_limiters.items()},
+        "routing": llm_router.stats(),
+        "hedging": llm_hedger.stats(),
+        "prompts": prompt_size_stats(),
+    }
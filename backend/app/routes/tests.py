@@ -1,6 +1,6 @@
 # app/routes/tests.py
 from fastapi import APIRouter, HTTPException
-from app.services.mongo_service import update_user_by_email, get_user_by_email
+from app.services.mongo_service import update_user_by_email, find_and_update_user
 from app.schemas.user_data import BigFivePayload, RiasecPayload, AptiPayload
 from app.agents.interest_assessment_agent import AptitudeInterestAgent
 import asyncio
@@ -9,12 +9,13 @@ router = APIRouter()
 aptitude_agent = AptitudeInterestAgent()
 
 async def save_test(email: str, test_name: str, scores: dict):
+    """Store one test's scores; returns the user's tests/interests after the write."""
     update_data = {f"tests.{test_name}": scores}
-    await update_user_by_email(email, update_data)
-    return {test_name: scores}
+    return await find_and_update_user(email, update_data, fields="aptitude")
 
-async def analyze_aptitude(email: str):
-    user_data = await get_user_by_email(email)
+async def analyze_aptitude(email: str, user_data: dict):
+    """`user_data` is the document returned by the write that stored the test (no re-read)."""
+    user_data = user_data or {}
     tests = user_data.get("tests", {})
     interests = user_data.get("interests", {})
     summary = await aptitude_agent.analyze_tests(tests, interests)
@@ -34,12 +35,14 @@ async def submit_big_five(payload: BigFivePayload):
             "tests.big_five": payload.scores
         }
 
-        # Atomic upsert: create if missing and update test scores
-        await update_user_by_email(email, update_data, create_if_missing=True)
+        # Atomic upsert: create if missing, update test scores and read back what the analysis needs
+        user_data = await find_and_update_user(
+            email, update_data, create_if_missing=True, fields="aptitude"
+        )
         print(f"Big Five test saved for {email}")
 
         # Run aptitude analysis after saving test
-        await analyze_aptitude(email)
+        await analyze_aptitude(email, user_data)
         print(f"Aptitude analysis completed for {email}")
 
         return {"message": "Big Five stored & analyzed", "email": email}
@@ -52,8 +55,8 @@ async def submit_big_five(payload: BigFivePayload):
 @router.post("/riasec")
 async def submit_riasec(payload: RiasecPayload):
     try:
-        await save_test(payload.email, "riasec", payload.scores)
-        await analyze_aptitude(payload.email)
+        user_data = await save_test(payload.email, "riasec", payload.scores)
+        await analyze_aptitude(payload.email, user_data)
         return {"message": "RIASEC stored & analyzed", "email": payload.email}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -61,8 +64,8 @@ async def submit_riasec(payload: RiasecPayload):
 @router.post("/apti")
 async def submit_apti(payload: AptiPayload):
     try:
-        await save_test(payload.email, "aptitude", payload.scores)
-        await analyze_aptitude(payload.email)
+        user_data = await save_test(payload.email, "aptitude", payload.scores)
+        await analyze_aptitude(payload.email, user_data)
         return {"message": "Aptitude stored & analyzed", "email": payload.email}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,39 +1,90 @@
 # app/routes/upload_resume.py
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.services import mongo_service
-from app.services.resume_parser import parse_resume
-from app.agents.resume_analyzer import ResumeAnalyzerAgent
+from app.services.resume_parser_pool import parse_resume_in_pool, ResumeParseError
+from app.services.upload_spool import spool_multipart, UploadTooLarge, BadUpload
+from app.agents.resume_analyzer import ResumeAnalyzerAgent, RESUME_PROMPT
+from app.config import RESUME_PARSER_SETTINGS
 
 router = APIRouter()
 resume_agent = ResumeAnalyzerAgent()
 
-@router.post("/upload-resume")
-async def upload_resume(email: str = Form(...), resume: UploadFile = File(...)):
+# The form is parsed from the raw stream (not Form/File params, which would buffer the whole body first)
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["email", "resume"],
+            "properties": {"email": {"type": "string"}, "resume": {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
+
+@router.post("/upload-resume", openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_resume(request: Request):
+    upload = None
     try:
-        file_bytes = await resume.read()
-        parsed_data = parse_resume(file_bytes, resume.content_type)
-
-        raw_resume = {
-            "extractedText": parsed_data.get("parsed_text_preview", ""),
-            "skills": parsed_data.get("skills", []),
-            "projects": parsed_data.get("projects", []),
-            "certifications": parsed_data.get("certifications", []),
-            "hasExperience": parsed_data.get("has_experience", "No")
-        }
-
-        await mongo_service.update_user_by_email(email, {"rawResume": raw_resume})
-
-        # Call Resume Analyzer agent only once
-        resume_summary = await resume_agent.analyze_resume(
-            parsed_data.get("parsed_text_preview", ""),
-            strengths_and_weaknesses={}  # optional: can pull from DB
+        # Stream the body into a size-capped spool (memory for small files, temp file for large ones)
+        fields, upload = await spool_multipart(
+            request,
+            file_field="resume",
+            max_bytes=RESUME_PARSER_SETTINGS["max_file_bytes"],
+            spool_bytes=RESUME_PARSER_SETTINGS["spool_memory_bytes"],
         )
+        email = fields.get("email", "").strip()
+        if not email:
+            raise BadUpload("Missing form field 'email'", status_code=422)
+        content_hash = upload.sha256
+
+        # Same bytes seen before (this user or any other): reuse parse + analysis
+        cached = await mongo_service.get_cached_resume(content_hash)
+        if cached:
+            raw_resume = cached["parsed"]
+        else:
+            # Parsing runs in a separate process: a heavy PDF never blocks the event loop
+            parsed_data = await parse_resume_in_pool(upload.source(), upload.content_type)
+
+            raw_resume = {
+                "extractedText": parsed_data.get("extractedText", ""),
+                "skills": parsed_data.get("skills", []),
+                "projects": parsed_data.get("projects", []),
+                "certifications": parsed_data.get("certifications", []),
+                "hasExperience": parsed_data.get("hasExperience", "No")
+            }
+
+        # An analysis made with an older prompt template is redone; the parse is still reused
+        if cached and cached.get("analysis_version") == RESUME_PROMPT.version:
+            resume_summary = cached["analysis"]
+        else:
+            # Call Resume Analyzer agent only once per distinct file (and template version)
+            resume_summary = await resume_agent.analyze_resume(
+                raw_resume["extractedText"],
+                strengths_and_weaknesses={}  # optional: can pull from DB
+            )
+
+            if resume_summary and "error" not in resume_summary:
+                await mongo_service.save_cached_resume(
+                    content_hash, raw_resume, resume_summary, upload.content_type, upload.size,
+                    analysis_version=RESUME_PROMPT.version,
+                )
 
         await mongo_service.update_user_by_email(email, {
+            "rawResume": {**raw_resume, "contentHash": content_hash},
             "aiInsights.partials.resume": resume_summary
         })
 
-        return {"message": "Resume uploaded & analyzed", "email": email}
+        return {"message": "Resume uploaded & analyzed", "email": email, "cached": bool(cached)}
 
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BadUpload as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ResumeParseError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if upload:
+            upload.close()
@@ -0,0 +1,123 @@
+from pydantic import BaseModel, BeforeValidator, Field, TypeAdapter, ValidationError
+from typing import Annotated, Any, Dict, List, Literal
+
+# ------------------- Coercion helpers -------------------
+def as_str_list(value: Any) -> List[str]:
+    """LLM list fields sometimes arrive as a string or a dict: keep the non-empty items as strings."""
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        value = list(value.values())
+    elif not isinstance(value, list):
+        value = [value]
+    return [str(v).strip() for v in value if v is not None and str(v).strip()]
+
+def as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(as_str_list(value))
+    return str(value).strip()
+
+def as_category(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip().upper().replace("-", "_").replace(" ", "_")
+    return value
+
+def first_three(value: Any) -> Any:
+    return value[:3] if isinstance(value, list) else value
+
+def coerce_career(value: Any) -> Dict[str, Any]:
+    """Best-effort shape for a career entry (used for streamed previews, no validation)."""
+    if not isinstance(value, dict):
+        value = {"name": value}
+    return {
+        "name": as_text(value.get("name")),
+        "category": as_category(value.get("category")),
+        "merits": as_str_list(value.get("merits")),
+        "demerits": as_str_list(value.get("demerits")),
+        "trends": as_str_list(value.get("trends")),
+    }
+
+Text = Annotated[str, BeforeValidator(as_text), Field(min_length=1)]
+TextList = Annotated[List[str], BeforeValidator(as_str_list), Field(min_length=1)]
+
+# ------------------- Report -------------------
+class CareerOption(BaseModel):
+    name: Text
+    category: Annotated[Literal["SAFE", "NON_OBVIOUS", "HIGH_RISK"], BeforeValidator(as_category)]
+    merits: TextList
+    demerits: TextList
+    trends: TextList
+
+Careers = Annotated[List[CareerOption], BeforeValidator(first_three), Field(min_length=3)]
+
+# Every top-level report field and its validator (the report itself stays a plain dict)
+REPORT_FIELDS = {
+    "friendly_summary": TypeAdapter(Text),
+    "top_careers": TypeAdapter(Careers),
+    "strengths": TypeAdapter(TextList),
+    "weaknesses": TypeAdapter(TextList),
+    "skill_gaps": TypeAdapter(TextList),
+    "suggestions": TypeAdapter(TextList),
+    "next_steps": TypeAdapter(TextList),
+    "key_conflicts": TypeAdapter(TextList),
+}
+_CAREER = TypeAdapter(CareerOption)
+REQUIRED_CAREERS = 3
+
+# ------------------- Validation -------------------
+class ReportCheck:
+    """
+    Field-level result of validating a generated report.
+    valid    – normalized values of every field that passed
+    problems – field → short reason, for every field that is missing or malformed
+    careers  – valid top_careers entries (kept even when the list as a whole fails)
+    """
+
+    def __init__(self):
+        self.valid: Dict[str, Any] = {}
+        self.problems: Dict[str, str] = {}
+        self.careers: List[Dict[str, Any]] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    @property
+    def careers_needed(self) -> int:
+        return max(REQUIRED_CAREERS - len(self.careers), 0)
+
+
+def _reason(error: ValidationError) -> str:
+    first = error.errors()[0]
+    loc = ".".join(str(part) for part in first["loc"])
+    return f"{loc}: {first['msg']}" if loc else first["msg"]
+
+
+def check_report(report: Any) -> ReportCheck:
+    check = ReportCheck()
+    report = report if isinstance(report, dict) else {}
+
+    for name, adapter in REPORT_FIELDS.items():
+        if name not in report:
+            check.problems[name] = "missing"
+            continue
+        try:
+            value = adapter.validate_python(report[name])
+        except ValidationError as e:
+            check.problems[name] = _reason(e)
+            continue
+        check.valid[name] = [c.model_dump() for c in value] if name == "top_careers" else value
+
+    if "top_careers" in check.valid:
+        check.careers = check.valid["top_careers"]
+    else:
+        # Salvage the entries that are complete; only the rest needs regenerating
+        careers = report.get("top_careers")
+        for career in careers[:REQUIRED_CAREERS] if isinstance(careers, list) else []:
+            try:
+                check.careers.append(_CAREER.validate_python(career).model_dump())
+            except ValidationError:
+                continue
+    return check
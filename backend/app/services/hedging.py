@@ -0,0 +1,100 @@
+# app/services/hedging.py
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services.llm_router import percentile
+
+
+class Hedger:
+    """
+    Tracks per-agent latency and decides when a backup ("hedge") request is sent.
+
+    The hedge delay is the configured latency percentile of the agent's recent
+    calls. Extra calls are capped by a budget: at most `budget_ratio` of all
+    hedge-eligible calls (plus a small burst) may send a backup.
+    """
+
+    def __init__(self, policies: Dict[str, Dict[str, Any]], settings: Dict[str, Any]):
+        self.policies = policies
+        self.settings = settings
+        self.latencies: Dict[str, deque] = {}
+        self.counters = {"eligible": 0, "fired": 0, "won": 0, "budget_denied": 0}
+
+    def policy_for(self, agent: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self.policies.get(agent) if agent else None
+
+    def observe(self, agent: str, seconds: float):
+        window = self.latencies.setdefault(agent, deque(maxlen=self.settings["window_size"]))
+        window.append(seconds)
+
+    def delay_for(self, agent: str) -> float:
+        window = self.latencies.get(agent) or ()
+        if len(window) < self.settings["min_samples"]:
+            return self.settings["default_delay_seconds"]
+        delay = percentile(list(window), self.policies[agent]["percentile"])
+        return max(self.settings["min_delay_seconds"], delay)
+
+    def _take_budget(self) -> bool:
+        allowed = self.counters["eligible"] * self.settings["budget_ratio"] + self.settings["budget_burst"]
+        if self.counters["fired"] + 1 > allowed:
+            self.counters["budget_denied"] += 1
+            return False
+        self.counters["fired"] += 1
+        return True
+
+    async def run(
+        self,
+        agent: str,
+        primary: Callable[[], Awaitable[Any]],
+        backup: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Run `primary`; if it has not finished after the agent's hedge delay
+        (and budget allows), start `backup`. The first successful result wins
+        and the other call is cancelled.
+        """
+        self.counters["eligible"] += 1
+
+        def start(fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+            started = time.perf_counter()
+            task = asyncio.create_task(fn())
+
+            def done(t: asyncio.Task):
+                if not t.cancelled() and t.exception() is None:
+                    self.observe(agent, time.perf_counter() - started)
+
+            task.add_done_callback(done)
+            return task
+
+        first = start(primary)
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.delay_for(agent))
+            if done or not self._take_budget():
+                return await first
+
+            second = start(backup)
+            pending.add(second)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.counters["won"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        fired = self.counters["fired"]
+        return {
+            **self.counters,
+            "win_rate": round(self.counters["won"] / fired, 4) if fired else 0.0,
+            "delay_seconds": {agent: round(self.delay_for(agent), 3) for agent in self.policies},
+        }
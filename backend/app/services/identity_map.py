@@ -0,0 +1,180 @@
+# app/services/identity_map.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Optional, Set
+
+from app.schemas.user_data import UserData
+
+MISS = object()
+
+
+def _get_path(doc: dict, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(doc, dict) or key not in doc:
+            return MISS
+        doc = doc[key]
+    return doc
+
+
+def _set_path(doc: dict, path: str, value: Any):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        child = doc.get(key)
+        if not isinstance(child, dict):
+            child = doc[key] = {}
+        doc = child
+    doc[keys[-1]] = value
+
+
+def _unset_path(doc: dict, path: str):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        doc = doc.get(key)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(keys[-1], None)
+
+
+class _UserEntry:
+    """
+    One user's document as loaded in this request.
+    paths – dotted paths whose values are known (None: the whole document)
+    model – UserData parsed from `doc`, built on first use and dropped on any change
+    """
+
+    def __init__(self, doc: Optional[dict], paths: Optional[Set[str]]):
+        self.doc = doc
+        self.paths = paths
+        self.model: Optional[UserData] = None
+
+    def covers(self, fields: Optional[Iterable[str]]) -> bool:
+        if self.doc is None or self.paths is None:
+            return True     # missing user, or whole document known
+        if fields is None:
+            return False
+        return all(
+            any(path == known or path.startswith(known + ".") for known in self.paths)
+            for path in fields
+        )
+
+    def merge(self, doc: dict, fields: Optional[Iterable[str]]):
+        """Fold a fresh read into the cached dict in place (callers keep the same object)."""
+        self.model = None
+        if self.doc is None or fields is None:
+            if self.doc is None:
+                self.doc = {}
+            self.doc.clear()
+            self.doc.update(doc)
+            self.paths = None if fields is None else set(fields)
+            return
+        for path in fields:
+            value = _get_path(doc, path)
+            if value is MISS:
+                _unset_path(self.doc, path)
+            else:
+                _set_path(self.doc, path, value)
+        if "_id" in doc:
+            self.doc["_id"] = doc["_id"]
+        if self.paths is not None:
+            self.paths.update(fields)
+
+    def apply_set(self, fields: Dict[str, Any]):
+        self.model = None
+        for path, value in fields.items():
+            _set_path(self.doc, path, value)
+        if self.paths is not None:
+            self.paths.update(fields)
+
+
+class UserIdentityMap:
+    """
+    Request-scoped identity map for user documents (keyed by normalized email).
+
+    mongo_service reads through it, so a user is loaded at most once per request
+    (again only if a later read needs fields the first projection left out), and
+    every read returns the same dict. Successful $set writes are applied to that
+    dict in place; parse_user() turns it into a UserData once.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, _UserEntry] = {}
+
+    def lookup(self, email: str, fields: Optional[Iterable[str]]):
+        """Cached document (None for a user known to be missing), or MISS."""
+        entry = self.entries.get(email)
+        if entry is None or not entry.covers(fields):
+            return MISS
+        return entry.doc
+
+    def store(self, email: str, doc: Optional[dict], fields: Optional[Iterable[str]]) -> Optional[dict]:
+        """Record a read; returns the canonical dict for this user."""
+        entry = self.entries.get(email)
+        if doc is None:
+            # a projection-less "not found" is the same answer for every projection
+            self.entries[email] = _UserEntry(None, None)
+            return None
+        if entry is None:
+            entry = self.entries[email] = _UserEntry(None, None)
+        entry.merge(doc, fields)
+        return entry.doc
+
+    def record_write(self, email: str, fields: Dict[str, Any], created: bool):
+        entry = self.entries.get(email)
+        if entry is None:
+            return
+        if created or entry.doc is None:
+            # only the written fields of a new document are known: load it again when read
+            del self.entries[email]
+            return
+        entry.apply_set(fields)
+
+    def model_for(self, doc: dict) -> Optional[UserData]:
+        for entry in self.entries.values():
+            if entry.doc is doc:
+                if entry.model is None:
+                    entry.model = UserData(**doc)
+                return entry.model
+        return None
+
+
+_identity_map: ContextVar[Optional[UserIdentityMap]] = ContextVar("user_identity_map", default=None)
+
+
+def current_identity_map() -> Optional[UserIdentityMap]:
+    return _identity_map.get()
+
+
+@contextmanager
+def identity_map_scope():
+    """Give the current task (and the tasks it starts) a fresh identity map."""
+    token = _identity_map.set(UserIdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+def parse_user(user_data) -> UserData:
+    """
+    UserData for a user document: the request's already-parsed model when the
+    dict came from mongo_service in this request, otherwise a fresh parse.
+    """
+    if isinstance(user_data, UserData):
+        return user_data
+    identity_map = current_identity_map()
+    model = identity_map.model_for(user_data) if identity_map else None
+    return model if model is not None else UserData(**user_data)
+
+
+class UserIdentityMapMiddleware:
+    """ASGI middleware: every HTTP request gets its own user identity map."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with identity_map_scope():
+            await self.app(scope, receive, send)
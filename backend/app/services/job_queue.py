@@ -0,0 +1,191 @@
+# app/services/job_queue.py
+import asyncio
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.services import mongo_service
+from app.config import JOB_QUEUE_SETTINGS
+
+logger = logging.getLogger("job_queue")
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+# Pools running in this process, woken immediately when a job is enqueued here
+_local_pools: Set["JobWorkerPool"] = set()
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (e.g. the user was deleted)."""
+
+
+async def enqueue_career_task(task_id: str, email: str) -> Dict[str, Any]:
+    """Persist a new finalization job; any worker (this process or another) may claim it."""
+    now = datetime.now(timezone.utc)
+    task = await mongo_service.create_career_task({
+        "_id": task_id,
+        "email": email,
+        "status": "queued",
+        "current_stage": 0,
+        "partial_report": None,
+        "error": None,
+        "attempts": 0,
+        "max_attempts": JOB_QUEUE_SETTINGS["max_attempts"],
+        "available_at": now,
+        "created_at": now,
+    })
+    for pool in _local_pools:
+        pool.wake()
+    return task
+
+
+class JobWorkerPool:
+    """
+    Fixed-size pool of workers claiming career tasks from Mongo.
+
+    Each claimed task holds a lease that is renewed by a heartbeat while the
+    handler runs. If the process dies, the lease expires and another worker
+    re-claims the task. Failures are retried with exponential backoff up to
+    max_attempts; drain() stops claiming and lets running jobs finish.
+    """
+
+    def __init__(self, handler: JobHandler, settings: Dict[str, Any] = None):
+        self.handler = handler
+        self.settings = settings or JOB_QUEUE_SETTINGS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers: Set[asyncio.Task] = set()
+        self._running_jobs: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def start(self):
+        recovered = await mongo_service.recover_stale_career_tasks()
+        if recovered:
+            logger.info(f"Recovered {recovered} stale career tasks")
+
+        _local_pools.add(self)
+        for index in range(self.settings["workers"]):
+            self._workers.add(asyncio.create_task(self._worker_loop(index)))
+        logger.info(f"Started {self.settings['workers']} job workers ({self.worker_id})")
+
+    async def _worker_loop(self, index: int):
+        worker_id = f"{self.worker_id}#{index}"
+        while not self._stopping.is_set():
+            try:
+                task = await mongo_service.claim_career_task(
+                    worker_id, self.settings["lease_seconds"], self.settings["max_attempts"]
+                )
+            except Exception as e:
+                logger.error(f"Claiming career task failed: {e}")
+                task = None
+
+            if task is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.settings["poll_interval_seconds"])
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = asyncio.create_task(self._run_job(task, worker_id))
+            self._running_jobs.add(job)
+            try:
+                # shield: stopping a worker loop must not cancel a running job (drain decides that)
+                await asyncio.shield(job)
+            except asyncio.CancelledError:
+                if self._stopping.is_set():
+                    return
+                raise
+            finally:
+                if job.done():
+                    self._running_jobs.discard(job)
+
+    async def _heartbeat(self, task_id: str, worker_id: str, job: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.settings["heartbeat_seconds"])
+            try:
+                still_owned = await mongo_service.renew_career_task_lease(
+                    task_id, worker_id, self.settings["lease_seconds"]
+                )
+            except Exception as e:
+                # Transient: the lease is still ours until Mongo says otherwise, retry next tick
+                logger.warning(f"Renewing lease on career task {task_id} failed: {e}")
+                continue
+            if not still_owned:
+                logger.warning(f"Lost lease on career task {task_id}; cancelling local run")
+                job.cancel()
+                return
+
+    async def _run_job(self, task: Dict[str, Any], worker_id: str):
+        task_id = task["_id"]
+        handler_task = asyncio.create_task(self.handler(task))
+        heartbeat = asyncio.create_task(self._heartbeat(task_id, worker_id, handler_task))
+        try:
+            await handler_task
+        except asyncio.CancelledError:
+            # Drained or lease lost: give the task back so another worker can run it
+            await mongo_service.finish_career_task(task_id, worker_id, {
+                "status": "queued",
+                "available_at": datetime.now(timezone.utc),
+            })
+            return
+        except Exception as e:
+            await self._handle_failure(task, worker_id, e)
+            return
+        finally:
+            heartbeat.cancel()
+
+        await mongo_service.finish_career_task(task_id, worker_id, {"status": "completed", "error": None})
+
+    async def _handle_failure(self, task: Dict[str, Any], worker_id: str, error: Exception):
+        attempts = task.get("attempts", 1)
+        max_attempts = task.get("max_attempts", self.settings["max_attempts"])
+
+        if isinstance(error, PermanentJobError) or attempts >= max_attempts:
+            logger.error(f"Career task {task['_id']} failed after {attempts} attempts: {error}")
+            await mongo_service.finish_career_task(task["_id"], worker_id, {
+                "status": "failed",
+                "error": str(error),
+            })
+            return
+
+        delay = min(
+            self.settings["backoff_max_seconds"],
+            self.settings["backoff_base_seconds"] * (2 ** (attempts - 1)),
+        )
+        delay *= random.uniform(0.8, 1.2)  # jitter, so retries of a burst spread out
+        logger.warning(f"Career task {task['_id']} attempt {attempts} failed, retrying in {delay:.1f}s: {error}")
+        await mongo_service.finish_career_task(task["_id"], worker_id, {
+            "status": "queued",
+            "error": str(error),
+            "available_at": datetime.now(timezone.utc) + timedelta(seconds=delay),
+        })
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Stop claiming new tasks, wait for running ones, then re-queue whatever is left."""
+        timeout = self.settings["drain_timeout_seconds"] if timeout is None else timeout
+        self._stopping.set()
+        self._wakeup.set()
+        _local_pools.discard(self)
+
+        running = [job for job in self._running_jobs if not job.done()]
+        if running:
+            logger.info(f"Draining {len(running)} running career tasks (timeout {timeout}s)")
+            _, still_running = await asyncio.wait(running, timeout=timeout)
+            for job in still_running:
+                job.cancel()
+            if still_running:
+                await asyncio.gather(*still_running, return_exceptions=True)
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        logger.info("Job workers stopped")
@@ -0,0 +1,369 @@
+# app/services/json_stream.py
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+_OPENERS = {"object": "{", "array": "["}
+_CLOSERS = {"{": "}", "[": "]"}
+_PARTIAL_UNICODE_ESCAPE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+_STRING_SPECIAL = re.compile(r'["\\]')
+# a valid escape (2 or 6 chars), or a 1-char match: bare backslash / raw control character
+_STRING_ESCAPE = re.compile(r'\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}|)|[\x00-\x1f]')
+_SCALAR = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null")
+_STRUCTURAL = frozenset(' \t\r\n",:{}[]')
+
+# JSON grammar inside a container: (kind, state, token) → next state; anything else is invalid
+_GRAMMAR = {
+    ("{", "start", "key"): "key",
+    ("{", ",", "key"): "key",
+    ("{", "key", ":"): ":",
+    ("{", ":", "value"): "value",
+    ("{", "value", ","): ",",
+    ("[", "start", "value"): "value",
+    ("[", ",", "value"): "value",
+    ("[", "value", ","): ",",
+}
+
+Path = Tuple[Any, ...]
+
+
+def _valid_string_body(buf: str, start: int, end: int) -> bool:
+    return all(len(m.group()) > 1 for m in _STRING_ESCAPE.finditer(buf, start, end))
+
+
+class _Frame:
+    def __init__(self, kind: str, start: int):
+        self.kind = kind            # "{" or "["
+        self.start = start
+        self.state = "start"        # grammar state, see _GRAMMAR
+        self.valid = True           # everything so far (nested containers included) is valid JSON
+        self.key: Any = None        # current member key (objects) …
+        self.index = 0              # … or index (arrays)
+        self.expect_key = kind == "{"
+        self.key_start: Optional[int] = None
+        self.value_start: Optional[int] = None
+        self.emitted = False
+
+    def member(self) -> Any:
+        return self.key if self.kind == "{" else self.index
+
+
+class JSONParseResult:
+    """
+    Outcome of extracting one JSON value from LLM output.
+
+    status:
+        complete  – a full JSON value was found
+        repaired  – output was cut off; value was closed / trimmed to the last
+                    consistent point (see `truncated_at`, `dropped_chars`)
+        failed    – no JSON value could be recovered
+    completed   – paths (up to `event_depth`) whose values were fully received
+    truncated_at – path of the member that was being written when the text ended
+    trailing_text – a value was followed by prose / a closing fence
+    """
+
+    def __init__(self, value: Any, status: str, completed: List[Path],
+                 truncated_at: Optional[Path] = None, dropped_chars: int = 0,
+                 trailing_text: bool = False):
+        self.value = value
+        self.status = status
+        self.completed = completed
+        self.truncated_at = truncated_at
+        self.dropped_chars = dropped_chars
+        self.trailing_text = trailing_text
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "completed": [list(p) for p in self.completed],
+            "truncated_at": list(self.truncated_at) if self.truncated_at is not None else None,
+            "dropped_chars": self.dropped_chars,
+            "trailing_text": self.trailing_text,
+        }
+
+
+class JSONStreamParser:
+    """
+    Incremental extractor for the first JSON value in streamed LLM output.
+
+    feed() scans only the new characters (one linear pass over the whole
+    output), skipping prose and ``` fences before the value and ignoring
+    whatever follows it. Every time a member up to `event_depth` levels deep
+    is complete it is returned as a (path, value) event, e.g.
+        ("friendly_summary",) → "..."
+        ("top_careers", 0)    → {...}
+    so callers can act on sections before the stream ends.
+
+    A balanced value that is not valid JSON (single quotes, trailing comma,
+    `{placeholder}` in prose) is skipped. Validity is tracked per container
+    during the same pass, so the earliest valid container inside it is taken
+    instead (only that span is scanned again), else scanning resumes after it.
+
+    finish() returns a JSONParseResult, repairing truncated output by closing
+    an open string value and the open containers, or by trimming back to the
+    last complete member. It never raises: unrecoverable text is "failed".
+    """
+
+    def __init__(self, expect: Optional[str] = None, event_depth: int = 2):
+        self.openers = _OPENERS[expect] if expect else "{["
+        self._opener_re = re.compile("[" + re.escape(self.openers) + "]")
+        self.event_depth = event_depth
+
+        self.buf = ""
+        self.pos = 0
+        self.root_start: Optional[int] = None
+        self.end: Optional[int] = None
+        self.frames: List[_Frame] = []
+        self.closers: List[str] = []    # closing brackets of `frames`, kept in step with it
+        self.in_string = False
+        self.string_is_key = False
+        self.escape = False
+        self.scalar_start: Optional[int] = None
+        self.completed: List[Path] = []
+        # last point where buf[root_start:pos] + the closers of the first safe_depth frames is valid JSON
+        self.safe_pos: Optional[int] = None
+        self.safe_depth = 0
+        # earliest valid container closed inside the current root: (start, end)
+        self.best: Optional[Tuple[int, int]] = None
+        self.value: Any = None
+
+    @property
+    def done(self) -> bool:
+        return self.end is not None
+
+    def _path(self) -> Path:
+        return tuple(f.member() for f in self.frames)
+
+    def _mark_safe(self, pos: int):
+        self.safe_pos = pos
+        self.safe_depth = len(self.frames)
+
+    @staticmethod
+    def _step(frame: _Frame, token: Optional[str]):
+        state = _GRAMMAR.get((frame.kind, frame.state, token))
+        if state is None:
+            frame.valid = False
+        else:
+            frame.state = state
+
+    def _end_scalar(self, frame: _Frame, end: int):
+        valid = _SCALAR.fullmatch(self.buf, self.scalar_start, end) is not None
+        self._step(frame, "value" if valid else None)
+        self.scalar_start = None
+
+    def _finish_member(self, end: int, events: list):
+        """Current member of the innermost frame ends at `end` (exclusive)."""
+        frame = self.frames[-1]
+        if frame.value_start is None or frame.emitted:
+            return
+        frame.emitted = True
+        self._mark_safe(end)
+        if len(self.frames) <= self.event_depth:
+            path = self._path()
+            try:
+                value = json.loads(self.buf[frame.value_start:end])
+            except (json.JSONDecodeError, RecursionError):
+                return
+            self.completed.append(path)
+            events.append((path, value))
+
+    def _find_root(self) -> bool:
+        match = self._opener_re.search(self.buf, self.pos)
+        if match is None:
+            self.pos = len(self.buf)
+            return False
+        self.root_start = match.start()
+        self.pos = self.root_start
+        return True
+
+    def _restart(self, start: int) -> bool:
+        """The candidate root was not valid JSON (e.g. `{name}` in prose): look for the next one."""
+        self.frames = []
+        self.closers = []
+        self.in_string = False
+        self.string_is_key = False
+        self.escape = False
+        self.scalar_start = None
+        self.completed = []
+        self.safe_pos = None
+        self.safe_depth = 0
+        self.best = None
+        self.root_start = None
+        self.pos = start
+        return self._find_root()
+
+    def feed(self, chunk: str) -> List[Tuple[Path, Any]]:
+        """Consume a chunk; return the members completed by it."""
+        events: List[Tuple[Path, Any]] = []
+        if not chunk:
+            return events
+        # Append through a local with a single reference: CPython then grows
+        # the string in place instead of copying the whole buffer per chunk.
+        buf, self.buf = self.buf, ""
+        buf += chunk
+        self.buf = buf
+        if self.done:
+            return events
+
+        if self.root_start is None and not self._find_root():
+            return events
+
+        i, n = self.pos, len(buf)
+        while i < n:
+            ch = buf[i]
+
+            if self.in_string:
+                if not self.escape and ch not in '"\\':
+                    # jump straight to the next quote / backslash
+                    match = _STRING_SPECIAL.search(buf, i)
+                    i = match.start() if match else n
+                    continue
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    frame = self.frames[-1]
+                    start = frame.key_start if self.string_is_key else frame.value_start
+                    if not _valid_string_body(buf, start + 1, i):
+                        frame.valid = False
+                    if self.string_is_key:
+                        self._step(frame, "key")
+                        try:
+                            frame.key = json.loads(buf[frame.key_start:i + 1])
+                        except json.JSONDecodeError:
+                            frame.key = buf[frame.key_start + 1:i]
+                    else:
+                        self._step(frame, "value")
+                        self._finish_member(i + 1, events)
+                i += 1
+                continue
+
+            frame = self.frames[-1] if self.frames else None
+
+            if ch not in _STRUCTURAL:
+                # number / true / false / null: completes at the next , ] or }
+                if self.scalar_start is None:
+                    self.scalar_start = i
+                if frame.value_start is None:
+                    frame.value_start = i
+                i += 1
+                continue
+            if self.scalar_start is not None:
+                self._end_scalar(frame, i)
+
+            if ch in " \t\r\n":
+                pass
+            elif ch == '"':
+                self.in_string = True
+                if frame.kind == "{" and frame.expect_key:
+                    self.string_is_key = True
+                    frame.key_start = i
+                else:
+                    self.string_is_key = False
+                    frame.value_start = i
+            elif ch == ":":
+                self._step(frame, ":")
+                frame.expect_key = False
+            elif ch == ",":
+                self._step(frame, ",")
+                self._finish_member(i, events)
+                frame.value_start = None
+                frame.emitted = False
+                if frame.kind == "{":
+                    frame.key = None
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif ch in "{[":
+                if frame is not None:
+                    self._step(frame, "value")
+                    frame.value_start = i
+                self.frames.append(_Frame(ch, i))
+                self.closers.append(_CLOSERS[ch])
+                self._mark_safe(i + 1)
+            else:  # } or ]
+                if ch != self.closers[-1] or frame.state not in ("start", "value"):
+                    frame.valid = False
+                if frame.value_start is not None:
+                    self._finish_member(i, events)
+                self.frames.pop()
+                self.closers.pop()
+                if not self.frames:
+                    if frame.valid:
+                        try:
+                            self.value = json.loads(buf[self.root_start:i + 1])
+                            self.end = i + 1
+                            self.pos = self.end
+                            return events
+                        except json.JSONDecodeError:
+                            pass
+                        except RecursionError:
+                            self.best = None    # too deeply nested for json to decode: skip all of it
+                    # balanced but not JSON ({'a': 1}, {"a": 1,}, `{name}`): take the earliest
+                    # valid container inside it, else go on after it (nothing is rescanned twice)
+                    if not self._restart(self.best[0] if self.best else i + 1):
+                        return events
+                    i = self.pos
+                    continue
+                parent = self.frames[-1]
+                if not frame.valid:
+                    parent.valid = False
+                elif frame.kind in self.openers and (self.best is None or frame.start < self.best[0]):
+                    self.best = (frame.start, i + 1)
+                self._finish_member(i + 1, events)
+            i += 1
+
+        self.pos = i
+        return events
+
+    def snapshot(self) -> Any:
+        """Best-effort value of everything received so far (None before the value starts)."""
+        return self._repair()[0]
+
+    def _repair(self) -> Tuple[Any, int]:
+        if self.root_start is None:
+            return None, 0
+        text = self.buf[self.root_start:self.pos]
+
+        # 1) keep a partially received string value: close it and the containers
+        if self.in_string and not self.string_is_key:
+            head = text[:-1] if self.escape else _PARTIAL_UNICODE_ESCAPE.sub("", text)
+            closers = "".join(reversed(self.closers))
+            try:
+                return json.loads(head + '"' + closers), len(text) - len(head)
+            except (json.JSONDecodeError, RecursionError):
+                pass
+
+        # 2) trim back to the last complete member
+        if self.safe_pos is None:
+            return None, len(text)
+        head = self.buf[self.root_start:self.safe_pos]
+        try:
+            closers = "".join(reversed(self.closers[:self.safe_depth]))
+            return json.loads(head + closers), len(text) - len(head)
+        except (json.JSONDecodeError, RecursionError):
+            return None, len(text)
+
+    def finish(self) -> JSONParseResult:
+        if self.done:
+            trailing = bool(self.buf[self.end:].strip())
+            return JSONParseResult(self.value, "complete", self.completed, trailing_text=trailing)
+
+        value, dropped = self._repair()
+        if value is None:
+            return JSONParseResult(None, "failed", self.completed, dropped_chars=dropped)
+        truncated_at = self._path() if self.frames else None
+        return JSONParseResult(value, "repaired", self.completed, truncated_at, dropped)
+
+
+def extract_json(text: str, expect: Optional[str] = None) -> JSONParseResult:
+    """Parse the first JSON value out of a complete LLM response."""
+    parser = JSONStreamParser(expect=expect)
+    parser.feed(text or "")
+    return parser.finish()
@@ -0,0 +1,150 @@
+# app/services/llm_cache.py
+import hashlib
+import json
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from app.config import LLM_CACHE_SETTINGS
+from app.database import get_db
+
+logger = logging.getLogger("llm_cache")
+
+CACHE_COLLECTION = "llm_cache"
+
+
+def make_cache_key(
+    provider: str, model: str, params: Dict[str, Any], prompt: str, prompt_version: Optional[str] = None
+) -> str:
+    """
+    Content-addressed key: identical provider + model + generation params + prompt
+    always map to the same key, whoever sends them.
+    The prompt template version is part of the key, so bumping a template
+    invalidates its cached responses even if the rendered text is unchanged.
+    """
+    body = {"provider": provider, "model": model, "params": params, "prompt": prompt}
+    if prompt_version:
+        body["prompt_version"] = prompt_version
+    payload = json.dumps(
+        body,
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Small in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache for LLM responses.
+    Memory tier is per worker; the Mongo tier is shared across uvicorn workers
+    and expires through a TTL index on expiresAt.
+    """
+
+    def __init__(self, settings: Dict[str, Any]):
+        self.settings = settings
+        self.memory = LRUCache(settings["memory_max_entries"], settings["memory_ttl_seconds"])
+        self.counters = {
+            "memory_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "shared_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings["enabled"]
+
+    def _collection(self):
+        return get_db()[CACHE_COLLECTION]
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return value
+
+        if self.settings["shared_enabled"]:
+            try:
+                doc = await self._collection().find_one(
+                    {"_id": key, "expiresAt": {"$gt": datetime.now(timezone.utc)}},
+                    {"response": 1},
+                )
+            except Exception as e:
+                self.counters["shared_errors"] += 1
+                logger.warning(f"Shared LLM cache read failed: {e}")
+                doc = None
+
+            if doc:
+                self.counters["shared_hits"] += 1
+                self.memory.set(key, doc["response"])
+                return doc["response"]
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str, meta: Dict[str, Any] = None):
+        self.memory.set(key, value)
+        self.counters["writes"] += 1
+
+        if not self.settings["shared_enabled"]:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            await self._collection().update_one(
+                {"_id": key},
+                {"$set": {
+                    "response": value,
+                    "meta": meta or {},
+                    "createdAt": now,
+                    "expiresAt": now + timedelta(seconds=self.settings["shared_ttl_seconds"]),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            self.counters["shared_errors"] += 1
+            logger.warning(f"Shared LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["memory_hits"] + self.counters["shared_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "memory_entries": len(self.memory),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+llm_cache = LLMResponseCache(LLM_CACHE_SETTINGS)
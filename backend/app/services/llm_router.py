@@ -0,0 +1,160 @@
+# app/services/llm_router.py
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("llm_router")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class ProviderHealth:
+    """
+    Rolling window of recent calls for one provider plus its circuit breaker.
+
+    The breaker opens when, within the window, the error rate or the share of
+    slow calls crosses its threshold. After `open_seconds` it lets a single
+    probe through (half-open); the probe's outcome closes or re-opens it.
+    A probe that reports nothing within `probe_timeout_seconds` is written off.
+    """
+
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        self.name = name
+        self.settings = settings
+        self.calls: deque = deque()  # (timestamp, latency_seconds, ok)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started_at = 0.0
+        self.times_opened = 0
+
+    def _trim(self, now: float):
+        horizon = now - self.settings["window_seconds"]
+        while self.calls and self.calls[0][0] < horizon:
+            self.calls.popleft()
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.settings["open_seconds"]:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if (
+            self.state == HALF_OPEN and self.probe_in_flight
+            and now - self.probe_started_at >= self.settings["probe_timeout_seconds"]
+        ):
+            # the probe never reported back: don't let it wedge the breaker
+            logger.warning(f"Probe for {self.name} timed out, allowing a new one")
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            self.probe_started_at = now
+            return True
+        return False
+
+    def record(self, latency: float, ok: bool):
+        now = time.monotonic()
+        self.calls.append((now, latency, ok))
+        self._trim(now)
+
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+            if ok and latency < self.settings["slow_call_seconds"]:
+                self.state = CLOSED
+                self.calls.clear()
+                logger.info(f"Circuit for {self.name} closed after successful probe")
+            else:
+                self._open(now)
+            return
+
+        if self.state == CLOSED and self._degraded():
+            self._open(now)
+
+    def release_probe(self):
+        """A half-open probe ended without an outcome (cancelled, or failed before reaching the provider)."""
+        self.probe_in_flight = False
+
+    def _degraded(self) -> bool:
+        total = len(self.calls)
+        if total < self.settings["min_calls"]:
+            return False
+        failures = sum(1 for _, _, ok in self.calls if not ok)
+        slow = sum(1 for _, latency, _ in self.calls if latency >= self.settings["slow_call_seconds"])
+        return (
+            failures / total >= self.settings["error_rate_threshold"]
+            or slow / total >= self.settings["slow_call_rate_threshold"]
+        )
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        logger.warning(f"Circuit for {self.name} opened")
+
+    def latencies(self) -> List[float]:
+        self._trim(time.monotonic())
+        return [latency for _, latency, ok in self.calls if ok]
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim(time.monotonic())
+        total = len(self.calls)
+        latencies = self.latencies()
+        return {
+            "state": self.state,
+            "window_calls": total,
+            "error_rate": round(sum(1 for _, _, ok in self.calls if not ok) / total, 4) if total else 0.0,
+            "p50_seconds": round(percentile(latencies, 50), 3),
+            "p95_seconds": round(percentile(latencies, 95), 3),
+            "times_opened": self.times_opened,
+        }
+
+
+class LLMRouter:
+    """Orders providers for a call: requested provider first, then the agent's failover list."""
+
+    def __init__(self, providers: List[str], agent_preferences: Dict[str, List[str]], settings: Dict[str, Any]):
+        self.providers = list(providers)
+        self.agent_preferences = agent_preferences
+        self.health = {p: ProviderHealth(p, settings) for p in self.providers}
+        self.failovers = 0
+
+    def candidates(self, provider: str, agent: Optional[str] = None) -> List[str]:
+        ordered = [provider] + self.agent_preferences.get(agent, []) + self.providers
+        seen, result = set(), []
+        for p in ordered:
+            if p in self.health and p not in seen:
+                seen.add(p)
+                result.append(p)
+        return result or [provider]
+
+    def allow(self, provider: str) -> bool:
+        health = self.health.get(provider)
+        return health.allow() if health else True
+
+    def record(self, provider: str, latency: float, ok: bool):
+        health = self.health.get(provider)
+        if health:
+            health.record(latency, ok)
+
+    def release(self, provider: str):
+        health = self.health.get(provider)
+        if health:
+            health.release_probe()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "failovers": self.failovers,
+            "providers": {p: h.stats() for p, h in self.health.items()},
+        }
@@ -1,10 +1,28 @@
 # app/services/llm_service.py
-from ..llm.groq_service import ask_groq
-from ..llm.gemini_service import ask_gemini
-from ..llm.openai_service import ask_openai
+from ..llm import groq_service, gemini_service, openai_service
+from ..llm.groq_service import ask_groq, stream_groq
+from ..llm.gemini_service import ask_gemini, stream_gemini
+from ..llm.openai_service import ask_openai, stream_openai
+from .llm_cache import llm_cache, make_cache_key
+from .single_flight import SingleFlight
+from .rate_limiter import build_limiters
+from .llm_router import LLMRouter
+from .hedging import Hedger
+from .json_stream import extract_json
+from ..llm.token_estimate import estimate_tokens
+from app.config import (
+    LLM_SINGLE_FLIGHT_ENABLED, LLM_PROVIDER_LIMITS, LLM_BACKGROUND_PROMOTE_AFTER,
+    AGENT_LLM_MAPPING, LLM_ROUTER_SETTINGS,
+    LLM_HEDGING_ENABLED, LLM_HEDGING_POLICIES, LLM_HEDGING_SETTINGS,
+)
 import re
-import json
-from typing import Any, Dict
+import time
+import asyncio
+import logging
+from contextlib import aclosing, nullcontext
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger("llm_service")
 
 def _clean_response(text: str) -> str:
     if not text:
@@ -20,38 +38,314 @@ def _clean_response(text: str) -> str:
 
     return text
 
-def safe_json_parse(text: str, fallback: Dict[str, Any] = None) -> Dict[str, Any]:
+def safe_json_parse(text: str, fallback: Any = None, expect: Optional[str] = None) -> Any:
     """
-    Tries to parse JSON from LLM output safely.
-    Cleans markdown fences and falls back to default dict if parsing fails.
+    Parse the first JSON value (object or array) out of LLM output.
+    Fences, leading / trailing prose and truncated output are handled by
+    the linear extractor in json_stream; falls back to default if nothing
+    can be recovered.
+    expect="object" / "array" skips values of the other kind (e.g. "[1]" in prose).
     """
     if not text:
         return fallback or {}
 
-    cleaned = _clean_response(text)
+    result = extract_json(text, expect=expect)
+    if result.status == "repaired":
+        logger.warning(f"Recovered truncated LLM JSON: {result.report()}")
+    if result.ok:
+        return result.value
 
-    try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        # Try to extract JSON inside curly braces
-        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group())
-            except json.JSONDecodeError:
-                pass
+    return fallback or {"error": f"Invalid JSON: {text.strip()[:200]}"}
+
+_PROVIDER_MODULES = {
+    "groq": groq_service,
+    "gemini": gemini_service,
+    "openai": openai_service,
+}
+
+_STREAMERS = {
+    "groq": stream_groq,
+    "gemini": stream_gemini,
+    "openai": stream_openai,
+}
+
+async def open_llm_clients():
+    """Open the pooled provider clients (called on app startup)."""
+    for module in _PROVIDER_MODULES.values():
+        module.open_client()
 
-        return fallback or {"error": f"Invalid JSON: {cleaned[:200]}"}
+async def close_llm_clients():
+    """Close every provider connection pool (called on app shutdown)."""
+    for module in _PROVIDER_MODULES.values():
+        await module.close_client()
 
-async def call_llm(provider: str, prompt: str, **kwargs) -> str:
+# Coalesces identical in-flight prompts (e.g. /big-five, /riasec and /apti landing together)
+llm_single_flight = SingleFlight()
+
+# Per-provider bulkheads: concurrency cap + RPM/TPM buckets with a priority queue
+provider_limiters = build_limiters(LLM_PROVIDER_LIMITS, LLM_BACKGROUND_PROMOTE_AFTER)
+
+# Health-aware provider routing with circuit breakers and per-agent failover
+llm_router = LLMRouter(list(_PROVIDER_MODULES), AGENT_LLM_MAPPING, LLM_ROUTER_SETTINGS)
+
+# Opt-in hedged requests for slow tail calls
+llm_hedger = Hedger(LLM_HEDGING_POLICIES, LLM_HEDGING_SETTINGS)
+
+DEFAULT_GENERATION_PARAMS = {"temperature": 0.7, "max_tokens": 1024}
+
+async def _dispatch(provider: str, prompt: str, params: Dict[str, Any]) -> str:
     if provider == "groq":
-        return _clean_response(await ask_groq(prompt, **kwargs))
+        return _clean_response(await ask_groq(prompt, **params))
 
     elif provider == "gemini":
-        return _clean_response(await ask_gemini(prompt, **kwargs))
+        return _clean_response(await ask_gemini(prompt, **params))
 
     elif provider == "openai":
-        return _clean_response(await ask_openai(prompt, **kwargs))
+        return _clean_response(await ask_openai(prompt, **params))
 
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
+
+async def _limited_dispatch(provider: str, prompt: str, params: Dict[str, Any]) -> str:
+    """
+    Rate-limited provider call. The caller has passed llm_router.allow(), so every
+    exit either records an outcome or releases the (possible) half-open probe —
+    including a cancellation while still queued for a limiter slot.
+    """
+    limiter = provider_limiters.get(provider)
+    prompt_tokens = estimate_tokens(prompt)
+    recorded = False
+
+    async def timed_dispatch() -> str:
+        nonlocal recorded
+        started = time.perf_counter()
+        try:
+            response = await _dispatch(provider, prompt, params)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            recorded = True
+            llm_router.record(provider, time.perf_counter() - started, ok=False)
+            raise
+        recorded = True
+        llm_router.record(provider, time.perf_counter() - started, ok=True)
+        return response
+
+    try:
+        if limiter is None:
+            return await timed_dispatch()
+
+        async with limiter.slot(prompt_tokens + params["max_tokens"]) as reservation:
+            response = await timed_dispatch()
+            reservation["used_tokens"] = prompt_tokens + estimate_tokens(response)
+            return response
+    finally:
+        if not recorded:
+            llm_router.release(provider)
+
+def _cacheable(response: str, cache_json: Optional[str]) -> bool:
+    """
+    With cache_json ("object" / "array") only replies holding a complete JSON value
+    of that kind are stored: a malformed or truncated reply must not be replayed
+    to every retry for the lifetime of the cache entry.
+    """
+    if cache_json is None:
+        return True
+    if extract_json(response, expect=cache_json).status == "complete":
+        return True
+    logger.warning("Not caching LLM reply without a complete JSON value")
+    return False
+
+def _cache_key(provider: str, prompt: str, params: Dict[str, Any], prompt_version: Optional[str]):
+    module = _PROVIDER_MODULES.get(provider)
+    model = module.MODEL_NAME if module else provider
+    return make_cache_key(provider, model, params, prompt, prompt_version), model
+
+async def _call_provider(
+    provider: str,
+    prompt: str,
+    params: Dict[str, Any],
+    use_cache: bool,
+    prompt_version: Optional[str] = None,
+    cache_json: Optional[str] = None,
+) -> str:
+    """Rate-limited provider call → cache store, for one provider (cache already checked, circuit allowed)."""
+    response = await _limited_dispatch(provider, prompt, params)
+    if use_cache and _cacheable(response, cache_json):
+        key, model = _cache_key(provider, prompt, params, prompt_version)
+        await llm_cache.set(key, response, meta={"provider": provider, "model": model, "prompt_version": prompt_version})
+    return response
+
+async def _call_routed(
+    provider: str,
+    prompt: str,
+    params: Dict[str, Any],
+    use_cache: bool,
+    agent: Optional[str],
+    prompt_version: Optional[str] = None,
+    cache_json: Optional[str] = None,
+) -> str:
+    """Try the requested provider, failing over along the agent's preference list."""
+    errors = []
+    for candidate in llm_router.candidates(provider, agent):
+        # Cache first: a hit must not take (and then strand) a half-open probe
+        if use_cache:
+            cached = await llm_cache.get(_cache_key(candidate, prompt, params, prompt_version)[0])
+            if cached is not None:
+                return cached
+        if not llm_router.allow(candidate):
+            errors.append(f"{candidate}: circuit open")
+            continue
+        if candidate != provider:
+            llm_router.failovers += 1
+            logger.warning(f"Failing over from {provider} to {candidate} (agent={agent})")
+        try:
+            return await _call_provider(candidate, prompt, params, use_cache, prompt_version, cache_json)
+        except Exception as e:
+            errors.append(f"{candidate}: {e}")
+
+    raise RuntimeError(f"All LLM providers failed: {'; '.join(errors)}")
+
+async def call_llm(
+    provider: str,
+    prompt: str,
+    cache: bool = False,
+    agent: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    cache_json: Optional[str] = None,
+    **kwargs,
+) -> str:
+    """
+    Send a prompt to the given provider.
+    With cache=True the response is looked up in / stored to the shared LLM cache,
+    keyed on provider + model + generation params + prompt.
+    Concurrent identical calls are coalesced into one upstream request.
+    If the provider is unhealthy or fails, the call fails over along the
+    agent's AGENT_LLM_MAPPING preference list.
+    With hedging enabled, slow calls for agents in LLM_HEDGING_POLICIES get a
+    backup request once they pass the agent's latency percentile.
+    prompt_version (the agent's PromptTemplate version) is stored with cached
+    responses and is part of the cache key.
+    cache_json ("object" / "array") stores only replies that contain a complete
+    JSON value of that kind.
+    """
+    if provider not in _PROVIDER_MODULES:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    params = {**DEFAULT_GENERATION_PARAMS, **kwargs}
+    use_cache = cache and llm_cache.enabled
+
+    async def run() -> str:
+        policy = llm_hedger.policy_for(agent) if LLM_HEDGING_ENABLED else None
+        if not policy:
+            return await _call_routed(provider, prompt, params, use_cache, agent, prompt_version, cache_json)
+
+        alternate = policy.get("alternate") or provider
+        return await llm_hedger.run(
+            agent,
+            primary=lambda: _call_routed(provider, prompt, params, use_cache, agent, prompt_version, cache_json),
+            backup=lambda: _call_routed(alternate, prompt, params, use_cache, agent, prompt_version, cache_json),
+        )
+
+    if not LLM_SINGLE_FLIGHT_ENABLED:
+        return await run()
+    # cached and uncached callers may not share a flight (only one of them may hit the cache)
+    model = _PROVIDER_MODULES[provider].MODEL_NAME
+    key = make_cache_key(provider, model, params, prompt, prompt_version)
+    return await llm_single_flight.do(f"{key}:{int(use_cache)}:{agent}", run)
+
+
+async def _limited_stream(provider: str, prompt: str, params: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of _limited_dispatch: the limiter slot is held until the stream ends,
+    and an exit without an outcome (cancelled while queued, closed early) releases the probe.
+    """
+    limiter = provider_limiters.get(provider)
+    prompt_tokens = estimate_tokens(prompt)
+    slot = limiter.slot(prompt_tokens + params["max_tokens"]) if limiter else nullcontext({})
+    recorded = False
+
+    try:
+        async with slot as reservation:
+            started = time.perf_counter()
+            received = []
+            try:
+                async for piece in _STREAMERS[provider](prompt, **params):
+                    received.append(piece)
+                    yield piece
+            except (asyncio.CancelledError, GeneratorExit):
+                raise
+            except Exception:
+                recorded = True
+                llm_router.record(provider, time.perf_counter() - started, ok=False)
+                raise
+            recorded = True
+            llm_router.record(provider, time.perf_counter() - started, ok=True)
+            reservation["used_tokens"] = prompt_tokens + estimate_tokens("".join(received))
+    finally:
+        if not recorded:
+            llm_router.release(provider)
+
+async def call_llm_stream(
+    provider: str,
+    prompt: str,
+    cache: bool = False,
+    agent: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    cache_json: Optional[str] = None,
+    **kwargs,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of call_llm: yields text chunks as the provider produces them.
+    Shares the cache with call_llm (a cached response is replayed as one chunk,
+    a finished stream is stored under the same key), plus rate limits and
+    circuit breakers. Failover only happens before the first chunk; once text
+    has been yielded a provider error is raised to the caller.
+    Streams are neither coalesced (single-flight) nor hedged.
+    """
+    if provider not in _PROVIDER_MODULES:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    params = {**DEFAULT_GENERATION_PARAMS, **kwargs}
+    use_cache = cache and llm_cache.enabled
+    errors = []
+
+    for candidate in llm_router.candidates(provider, agent):
+        key, model = _cache_key(candidate, prompt, params, prompt_version)
+        # Cache first: a hit must not take (and then strand) a half-open probe
+        if use_cache:
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        if not llm_router.allow(candidate):
+            errors.append(f"{candidate}: circuit open")
+            continue
+        if candidate != provider:
+            llm_router.failovers += 1
+            logger.warning(f"Failing over stream from {provider} to {candidate} (agent={agent})")
+
+        received = []
+        try:
+            # aclosing: if our caller stops early, the provider stream (and its probe) is released now, not at GC
+            async with aclosing(_limited_stream(candidate, prompt, params)) as stream:
+                async for piece in stream:
+                    received.append(piece)
+                    yield piece
+        except Exception as e:
+            if received:
+                raise
+            errors.append(f"{candidate}: {e}")
+            continue
+
+        response = _clean_response("".join(received))
+        if use_cache and _cacheable(response, cache_json):
+            await llm_cache.set(
+                key,
+                response,
+                meta={"provider": candidate, "model": model, "prompt_version": prompt_version},
+            )
+        return
+
+    raise RuntimeError(f"All LLM providers failed: {'; '.join(errors)}")
@@ -1,15 +1,76 @@
 # app/services/mongo_service.py
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta, timezone
+from app.config import TASK_EVENTS_BACKEND
+from app.database import LazyCollection, create_legacy_user_email_index
+from app.services.identity_map import current_identity_map, MISS
+from app.services.task_events import task_events
 
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["pathwise_db"]
-user_collection = db["user_data"]
-career_tasks = db["career_tasks"]
+# Handles on the shared client (app/database.py), resolved on use
+user_collection = LazyCollection("user_data")
+career_tasks = LazyCollection("career_tasks")
+resume_cache = LazyCollection("resumes")
 
 # ---------- Generic Helpers ----------
 
+# Documents that predate the canonical key (only personal.email set), until the backfill has run
+LEGACY_EMAIL_QUERY = {"email": {"$not": {"$type": "string"}}, "personal.email": {"$type": "string"}}
+
+# Also match personal.email until no legacy document is left (see detect_legacy_user_emails)
+legacy_email_lookup = True
+
+def user_filter(email: str, legacy: bool = None) -> dict:
+    """
+    Every user lookup goes through the canonical top-level `email` (normalized, unique index).
+    While older documents keyed only by personal.email remain, they are matched too;
+    `python -m app.migrations.user_email` backfills them.
+    """
+    normalized_email = email.strip().lower()
+    if legacy_email_lookup if legacy is None else legacy:
+        return {"$or": [{"email": normalized_email}, {"personal.email": normalized_email}]}
+    return {"email": normalized_email}
+
+async def detect_legacy_user_emails() -> bool:
+    """
+    Run at startup: keep the personal.email fallback (and its index) only while some
+    document still lacks the canonical key. Returns whether the fallback is on.
+    """
+    global legacy_email_lookup
+    legacy_email_lookup = await user_collection.find_one(LEGACY_EMAIL_QUERY, {"_id": 1}) is not None
+    if legacy_email_lookup:
+        await create_legacy_user_email_index()
+        print("[MongoDB] ⚠️ Users without the canonical email key found; run `python -m app.migrations.user_email`")
+    return legacy_email_lookup
+
+# ---------- Projections ----------
+
+# Named read projections: the subtrees each consumer actually uses, so large fields
+# (rawUserInfo, rawResume.extractedText, finalAnalysis, unrelated partials) stay on the server.
+USER_PROJECTIONS = {
+    "exists": ("_id",),
+    "aptitude": ("tests", "interests"),
+    "cross_exam": (
+        "email", "personalInfo", "interests", "strengthsAndWeaknesses",
+        "learningRoadmap", "optionalFields",
+    ),
+    "finalization": ("email", "personalInfo", "optionalFields", "aiInsights.partials"),
+}
+
+def projection_paths(fields=None):
+    """Dotted paths for `fields`: a name from USER_PROJECTIONS or an iterable of paths (None: everything)."""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        if fields not in USER_PROJECTIONS:
+            raise ValueError(f"Unknown user projection '{fields}'")
+        return USER_PROJECTIONS[fields]
+    return tuple(fields)
+
+def user_projection(fields=None):
+    """Mongo projection for `fields` (see projection_paths). None means the whole document."""
+    paths = projection_paths(fields)
+    return None if paths is None else {path: 1 for path in paths}
+
 def remove_empty_fields(data: dict) -> dict:
     """Recursively remove keys with None or empty values."""
     if not isinstance(data, dict):
@@ -29,7 +90,7 @@ async def update_user_by_email(email: str, update_data: dict, create_if_missing:
         return None
 
     result = await user_collection.update_one(
-        {"$or": [{"email": normalized_email}, {"personal.email": normalized_email}]},
+        user_filter(normalized_email),
         {"$set": clean_data, "$setOnInsert": {"email": normalized_email}},
         upsert=create_if_missing
     )
@@ -41,20 +102,132 @@ async def update_user_by_email(email: str, update_data: dict, create_if_missing:
     else:
         print(f"[MongoDB] ✅ Updated user {normalized_email} with {clean_data.keys()}")
 
+    identity_map = current_identity_map()
+    if identity_map and (result.matched_count or result.upserted_id):
+        identity_map.record_write(normalized_email, clean_data, created=bool(result.upserted_id))
+
     return result
 
-async def get_user_by_email(email: str):
-    """Fetch full user document by email."""
+async def get_user_by_email(email: str, fields=None):
+    """
+    Fetch a user document by email; `fields` (see user_projection) limits what is returned.
+    Inside a request the document comes from the identity map when it already holds those fields.
+    """
     normalized_email = email.strip().lower()
-    user = await user_collection.find_one(
-        {"$or": [{"email": normalized_email}, {"personal.email": normalized_email}]}
-    )
+    paths = projection_paths(fields)
+    identity_map = current_identity_map()
+    if identity_map:
+        cached = identity_map.lookup(normalized_email, paths)
+        if cached is not MISS:
+            return cached
+
+    user = await user_collection.find_one(user_filter(normalized_email), user_projection(paths))
     if not user:
         print(f"[MongoDB] ❌ No user found with {normalized_email}")
     else:
         print(f"[MongoDB] ✅ Retrieved user {normalized_email}")
+    if identity_map:
+        user = identity_map.store(normalized_email, user, paths)
     return user
 
+async def find_and_update_user(
+    email: str, update_data: dict, create_if_missing: bool = True, fields=None
+):
+    """
+    Atomic update-and-return: applies the $set and returns the user document as it is
+    *after* the write, in one round trip (None when no user matched and none was created).
+    `fields` (see user_projection) limits what is sent back.
+    """
+    paths = projection_paths(fields)
+    normalized_email = email.strip().lower()
+    clean_data = remove_empty_fields(update_data)
+
+    if not clean_data:
+        print(f"[MongoDB] ⚠️ Nothing to update for {normalized_email} (all fields empty)")
+        return await get_user_by_email(normalized_email, paths)
+
+    user = await user_collection.find_one_and_update(
+        user_filter(normalized_email),
+        {"$set": clean_data, "$setOnInsert": {"email": normalized_email}},
+        projection=user_projection(paths),
+        upsert=create_if_missing,
+        return_document=ReturnDocument.AFTER,
+    )
+
+    if user is None:
+        print(f"[MongoDB] ❌ No user found/created for {normalized_email}")
+    else:
+        print(f"[MongoDB] ✅ Updated user {normalized_email} with {clean_data.keys()}")
+
+    identity_map = current_identity_map()
+    if identity_map and user is not None:
+        # apply the write to the cached copy, then fold in what came back
+        identity_map.record_write(normalized_email, clean_data, created=False)
+        user = identity_map.store(normalized_email, user, paths)
+    return user
+
+def _merge_set(fields: dict, path: str, value):
+    """Add one $set path, folding it into / over overlapping paths (Mongo rejects both 'a' and 'a.b')."""
+    for existing in list(fields):
+        if path.startswith(existing + "."):
+            # already setting the parent: write inside that value
+            parent = fields[existing]
+            target = fields[existing] = dict(parent) if isinstance(parent, dict) else {}
+            keys = path[len(existing) + 1:].split(".")
+            for key in keys[:-1]:
+                child = target.get(key)
+                target[key] = dict(child) if isinstance(child, dict) else {}
+                target = target[key]
+            target[keys[-1]] = value
+            return
+        if existing.startswith(path + ".") or existing == path:
+            # the new value replaces that whole subtree
+            del fields[existing]
+    fields[path] = value
+
+class UserUnitOfWork:
+    """
+    Request-scoped unit of work for one user: every set() is merged into a single $set
+    that is written with one find_one_and_update.
+
+        async with UserUnitOfWork(email) as uow:
+            uow.set({"rawUserInfo": data})
+            ...
+            uow.set({"aiInsights.partials.learning": summary})
+
+    Leaving the block commits. Fields staged before an error are still written,
+    so inputs saved early in a request are not lost when a later step fails.
+    """
+
+    def __init__(self, email: str, create_if_missing: bool = True):
+        self.email = email
+        self.create_if_missing = create_if_missing
+        self.fields = {}
+
+    def set(self, update_data: dict):
+        for path, value in update_data.items():
+            _merge_set(self.fields, path, value)
+        return self
+
+    async def commit(self, fields=None):
+        """Write the staged fields; returns the updated document (None if nothing was staged)."""
+        if not self.fields:
+            return None
+        staged, self.fields = self.fields, {}
+        return await find_and_update_user(self.email, staged, self.create_if_missing, fields)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.commit()
+            return
+        try:
+            await self.commit()
+        except Exception as e:
+            print(f"[MongoDB] ❌ Could not save staged fields for {self.email}: {e}")
+
 # ---------- Cross Exam Specific Helpers ----------
 
 async def save_cross_exam_questions(email: str, questions: list):
@@ -70,6 +243,36 @@ async def save_cross_exam_followups(email: str, followups: list):
     return await update_user_by_email(email, {"crossExam.followups": followups})
 
 
+# ---------- Resume Cache (by content hash) ----------
+
+async def get_cached_resume(content_hash: str):
+    """
+    Parsed resume + analysis for a file seen before (same bytes, any user).
+    analysis_version is the ResumeAnalyzer prompt template that produced the analysis.
+    """
+    doc = await resume_cache.find_one_and_update(
+        {"_id": content_hash},
+        {"$set": {"last_seen_at": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+        projection={"parsed": 1, "analysis": 1, "analysis_version": 1},
+    )
+    if doc:
+        print(f"[MongoDB] ♻️ Resume cache hit {content_hash[:12]}")
+    return doc
+
+async def save_cached_resume(
+    content_hash: str, parsed: dict, analysis: dict, content_type: str, size: int, analysis_version: str = None
+):
+    now = datetime.now(timezone.utc)
+    return await resume_cache.update_one(
+        {"_id": content_hash},
+        {
+            "$set": {"parsed": parsed, "analysis": analysis, "analysis_version": analysis_version, "last_seen_at": now},
+            "$setOnInsert": {"content_type": content_type, "size": size, "created_at": now, "hits": 0},
+        },
+        upsert=True,
+    )
+
+
 # ---------- Final Career Analysis ----------
 
 async def update_final_analysis(email: str, analysis: dict):
@@ -118,5 +321,125 @@ async def update_career_task(task_id: str, updates: dict):
         print(f"[MongoDB] ❌ Failed to update task {task_id}")
     else:
         print(f"[MongoDB] ✅ Updated task {task_id} with {updates.keys()}")
+        _publish_task_update(task_id, updates)
 
     return result
+
+
+def _publish_task_update(task_id: str, updates: dict):
+    """Push task changes to SSE subscribers (change-stream mode publishes from Mongo instead)."""
+    if TASK_EVENTS_BACKEND == "memory":
+        task_events.publish(task_id, updates)
+
+
+# ---------- Career Task Queue (claim / lease) ----------
+
+def _runnable_task_filter(now: datetime) -> dict:
+    return {"$or": [
+        {"status": "queued", "available_at": {"$lte": now}},
+        {"status": "running", "lease_expires_at": {"$lt": now}},
+    ]}
+
+def _attempts_left(max_attempts: int) -> dict:
+    """$expr: attempts < max_attempts (tasks without their own limit use the queue default)."""
+    return {"$lt": [{"$ifNull": ["$attempts", 0]}, {"$ifNull": ["$max_attempts", max_attempts]}]}
+
+
+async def fail_exhausted_career_tasks(max_attempts: int) -> int:
+    """
+    Fail runnable tasks that have used up their attempts. Attempts are counted
+    at claim time, so this catches a job whose run keeps killing its worker
+    (OOM, segfault): its lease expires without _handle_failure ever running.
+    """
+    now = datetime.now(timezone.utc)
+    exhausted = {**_runnable_task_filter(now), "$expr": {"$not": [_attempts_left(max_attempts)]}}
+    tasks = await career_tasks.find(exhausted, {"attempts": 1}).to_list(length=100)
+
+    failed = 0
+    for task in tasks:
+        updates = {
+            "status": "failed",
+            "error": f"Gave up after {task.get('attempts', 0)} attempts (worker stopped while running it)",
+            "finished_at": now,
+        }
+        result = await career_tasks.update_one(
+            {"_id": task["_id"], **exhausted},
+            {"$set": updates, "$unset": {"lease_owner": "", "lease_expires_at": ""}},
+        )
+        if result.modified_count:
+            failed += 1
+            print(f"[MongoDB] ❌ Career task {task['_id']} exhausted its attempts")
+            _publish_task_update(task["_id"], updates)
+    return failed
+
+
+async def claim_career_task(worker_id: str, lease_seconds: float, max_attempts: int):
+    """
+    Atomically claim the oldest runnable task: a queued task whose backoff has
+    elapsed, or a running task whose lease expired (its worker died) — as long
+    as it has attempts left. Exhausted ones are failed first.
+    """
+    await fail_exhausted_career_tasks(max_attempts)
+    now = datetime.now(timezone.utc)
+    task = await career_tasks.find_one_and_update(
+        {**_runnable_task_filter(now), "$expr": _attempts_left(max_attempts)},
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "started_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+    if task:
+        _publish_task_update(task["_id"], {"status": "running", "attempts": task["attempts"]})
+    return task
+
+
+async def renew_career_task_lease(task_id: str, worker_id: str, lease_seconds: float) -> bool:
+    """Extend a lease; returns False if this worker no longer owns the task."""
+    result = await career_tasks.update_one(
+        {"_id": task_id, "status": "running", "lease_owner": worker_id},
+        {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}},
+    )
+    return result.matched_count == 1
+
+
+async def finish_career_task(task_id: str, worker_id: str, updates: dict):
+    """Write the final/retry state of a task and drop the lease, if still owned."""
+    updates = {**updates, "finished_at": datetime.now(timezone.utc)}
+    result = await career_tasks.update_one(
+        {"_id": task_id, "lease_owner": worker_id},
+        {
+            "$set": updates,
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        },
+    )
+    if result.matched_count:
+        _publish_task_update(task_id, updates)
+    return result
+
+
+async def recover_stale_career_tasks() -> int:
+    """
+    Put tasks whose lease has expired back in the queue.
+    Also covers legacy tasks left 'running' without any lease.
+    """
+    now = datetime.now(timezone.utc)
+    result = await career_tasks.update_many(
+        {"status": "running", "$or": [
+            {"lease_expires_at": {"$lt": now}},
+            {"lease_expires_at": {"$exists": False}},
+        ]},
+        {
+            "$set": {"status": "queued", "available_at": now},
+            "$unset": {"lease_owner": "", "lease_expires_at": ""},
+        },
+    )
+    if result.modified_count:
+        print(f"[MongoDB] ♻️ Re-queued {result.modified_count} stale career tasks")
+    return result.modified_count
@@ -0,0 +1,177 @@
+# app/services/prompt_builder.py
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.llm.token_estimate import estimate_tokens
+
+logger = logging.getLogger("prompt_builder")
+
+_EMPTY = (None, "", [], {}, ())
+
+# Prompt size per agent: {"calls", "total_tokens", "max_tokens", "truncated_sections"}
+prompt_stats: Dict[str, Dict[str, int]] = {}
+
+
+def compact(value: Any) -> Any:
+    """Recursively drop None / empty values; dict keys are sorted so output is deterministic."""
+    if isinstance(value, dict):
+        cleaned = {str(k): compact(v) for k, v in value.items()}
+        return {k: cleaned[k] for k in sorted(cleaned) if cleaned[k] not in _EMPTY}
+    if isinstance(value, (list, tuple, set)):
+        items = [compact(v) for v in value]
+        return [v for v in items if v not in _EMPTY]
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (bytes, bytearray)):
+        # Uploaded files never belong in a prompt
+        return None
+    return value
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return " ".join(str(value).split())
+
+
+def serialize(value: Any, indent: int = 0) -> str:
+    """
+    Compact, YAML-like rendering (no quotes, braces or reprs):
+        key: value
+        list_key: a, b, c
+        nested:
+          key: value
+    """
+    value = compact(value)
+    pad = "  " * indent
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            if isinstance(item, dict) or (isinstance(item, list) and any(isinstance(i, (dict, list)) for i in item)):
+                lines.append(f"{pad}{key}:")
+                lines.append(serialize(item, indent + 1))
+            elif isinstance(item, list):
+                lines.append(f"{pad}{key}: {', '.join(_scalar(i) for i in item)}")
+            else:
+                lines.append(f"{pad}{key}: {_scalar(item)}")
+        return "\n".join(lines)
+    if isinstance(value, list):
+        lines = []
+        for item in value:
+            if isinstance(item, (dict, list)):
+                body = serialize(item, indent + 1).lstrip()
+                lines.append(f"{pad}- {body}")
+            else:
+                lines.append(f"{pad}- {_scalar(item)}")
+        return "\n".join(lines)
+    return f"{pad}{_scalar(value)}" if value not in _EMPTY else ""
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut text to roughly `budget` tokens, preferring whole lines."""
+    if estimate_tokens(text) <= budget:
+        return text
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            remaining = budget - used
+            if remaining > 8:
+                kept.append(line[: remaining * 4].rstrip() + "…")
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+class PromptBuilder:
+    """
+    Assemble an agent prompt from instruction text and data sections.
+    Data is compacted + serialized deterministically, each section can carry
+    its own token budget, and the final size is logged per agent.
+    """
+
+    def __init__(self, agent: str, version: Optional[str] = None):
+        self.agent = agent
+        self.version = version
+        self.parts: List[str] = []
+        self.truncated: List[str] = []
+
+    def text(self, block: str) -> "PromptBuilder":
+        self.parts.append(block.strip("\n"))
+        return self
+
+    def section(self, title: str, data: Any, budget: Optional[int] = None) -> "PromptBuilder":
+        body = data if isinstance(data, str) else serialize(data)
+        body = body.strip()
+        if not body:
+            body = "(not provided)"
+        if budget is not None:
+            limited = truncate_to_tokens(body, budget)
+            if limited != body:
+                self.truncated.append(title)
+            body = limited
+        self.parts.append(f"{title}:\n{body}")
+        return self
+
+    def render(self) -> str:
+        """Joined text without recording it as a prompt (for context shared by several prompts)."""
+        return "\n\n".join(self.parts)
+
+    def build(self) -> str:
+        prompt = self.render()
+        tokens = estimate_tokens(prompt)
+
+        stats = prompt_stats.setdefault(
+            self.agent, {"calls": 0, "total_tokens": 0, "max_tokens": 0, "truncated_sections": 0}
+        )
+        stats["calls"] += 1
+        stats["total_tokens"] += tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+        stats["truncated_sections"] += len(self.truncated)
+        if self.version:
+            stats["version"] = self.version
+
+        logger.info(
+            f"[prompt] {self.agent}"
+            + (f" ({self.version})" if self.version else "")
+            + f": ~{tokens} tokens, {len(prompt)} chars"
+            + (f", truncated {self.truncated}" if self.truncated else "")
+        )
+        return prompt
+
+
+USER_DATA_HEADER = "================ USER DATA ================="
+
+
+class PromptTemplate:
+    """
+    Versioned static instruction prefix for one agent.
+
+    Everything that does not depend on the user lives in `instructions` and is
+    emitted first, byte-for-byte identical on every call, so provider-side
+    prefix caching (OpenAI / Gemini / Groq) can skip re-processing it. The
+    user-specific sections are appended after USER_DATA_HEADER.
+
+    Bump `version` whenever the instructions or the expected output change;
+    it is recorded with cached LLM responses and cached analyses.
+    """
+
+    def __init__(self, agent: str, version: str, instructions: str):
+        self.agent = agent
+        self.version = version
+        self.instructions = instructions.strip("\n")
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.instructions}\n\n{USER_DATA_HEADER}"
+
+    def builder(self) -> PromptBuilder:
+        return PromptBuilder(self.agent, version=self.version).text(self.prefix)
+
+
+def prompt_size_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        agent: {**s, "avg_tokens": round(s["total_tokens"] / s["calls"], 1) if s["calls"] else 0}
+        for agent, s in prompt_stats.items()
+    }
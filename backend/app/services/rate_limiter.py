@@ -0,0 +1,198 @@
+# app/services/rate_limiter.py
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Request priority: interactive routes go ahead of background finalization
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_llm_priority: ContextVar[int] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+def set_llm_priority(priority: int):
+    """Set the priority of every LLM call made from the current task."""
+    _llm_priority.set(priority)
+
+
+def current_llm_priority() -> int:
+    return _llm_priority.get()
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens per minute.
+    Acquisition is serialised (asyncio.Lock is FIFO), so callers are served
+    in the order they reached the bucket.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def refund(self, amount: float):
+        """Give back tokens that were reserved but not used."""
+        if amount <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ProviderLimiter:
+    """
+    Bulkhead for one LLM provider: a concurrency cap with a priority queue in
+    front of it, plus requests-per-minute and tokens-per-minute buckets.
+
+    Waiters are FIFO within a priority. A background waiter that has waited
+    longer than `promote_after` seconds is served before new interactive work,
+    so finalization cannot starve under sustained interactive load.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, rpm: int = 0, tpm: int = 0, promote_after: float = 30.0):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm = TokenBucket(rpm) if rpm > 0 else None
+        self.tpm = TokenBucket(tpm) if tpm > 0 else None
+        self.promote_after = promote_after
+
+        self._active = 0
+        self._queues = {INTERACTIVE: deque(), BACKGROUND: deque()}
+        self._waits = {
+            p: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            for p in self._queues
+        }
+
+    # ---------- concurrency slot ----------
+
+    def _has_waiters(self) -> bool:
+        return any(self._queues.values())
+
+    def _next_queue(self) -> Optional[deque]:
+        interactive, background = self._queues[INTERACTIVE], self._queues[BACKGROUND]
+        if background and time.monotonic() - background[0][0] >= self.promote_after:
+            return background
+        if interactive:
+            return interactive
+        return background or None
+
+    def _grant_next(self):
+        while self._active < self.max_concurrency:
+            queue = self._next_queue()
+            if queue is None:
+                return
+            _, future = queue.popleft()
+            if future.done():  # waiter was cancelled
+                continue
+            self._active += 1
+            future.set_result(True)
+
+    async def _acquire_slot(self, priority: int):
+        if self._active < self.max_concurrency and not self._has_waiters():
+            self._active += 1
+            return
+
+        entry = (time.monotonic(), asyncio.get_running_loop().create_future())
+        self._queues[priority].append(entry)
+        try:
+            await entry[1]
+        except asyncio.CancelledError:
+            if entry[1].done() and not entry[1].cancelled():
+                # Slot was granted just as we were cancelled: hand it on
+                self._release_slot()
+            else:
+                try:
+                    self._queues[priority].remove(entry)
+                except ValueError:
+                    pass
+            raise
+
+    def _release_slot(self):
+        self._active -= 1
+        self._grant_next()
+
+    # ---------- public API ----------
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int, priority: Optional[int] = None):
+        """
+        Hold one concurrency slot (and rate budget) for the duration of a call.
+        Yields a reservation dict; set reservation["used_tokens"] after the call
+        so unused TPM budget is returned to the bucket.
+        """
+        priority = current_llm_priority() if priority is None else priority
+        if priority not in self._queues:
+            priority = BACKGROUND
+        enqueued = time.monotonic()
+
+        await self._acquire_slot(priority)
+        reservation: Dict[str, Any] = {"estimated_tokens": estimated_tokens, "used_tokens": None}
+        try:
+            if self.rpm:
+                await self.rpm.acquire(1)
+            if self.tpm:
+                await self.tpm.acquire(estimated_tokens)
+            self._record_wait(priority, time.monotonic() - enqueued)
+
+            yield reservation
+        finally:
+            if self.tpm and reservation["used_tokens"] is not None:
+                self.tpm.refund(estimated_tokens - reservation["used_tokens"])
+            self._release_slot()
+
+    def _record_wait(self, priority: int, seconds: float):
+        waits = self._waits[priority]
+        waits["count"] += 1
+        waits["total_seconds"] += seconds
+        waits["max_seconds"] = max(waits["max_seconds"], seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": {PRIORITY_NAMES[p]: len(q) for p, q in self._queues.items()},
+            "wait": {
+                PRIORITY_NAMES[p]: {
+                    "count": w["count"],
+                    "avg_seconds": round(w["total_seconds"] / w["count"], 4) if w["count"] else 0.0,
+                    "max_seconds": round(w["max_seconds"], 4),
+                }
+                for p, w in self._waits.items()
+            },
+            "rpm_available": round(self.rpm.tokens, 1) if self.rpm else None,
+            "tpm_available": round(self.tpm.tokens, 1) if self.tpm else None,
+        }
+
+
+def build_limiters(limits: Dict[str, Dict[str, Any]], promote_after: float) -> Dict[str, ProviderLimiter]:
+    return {
+        name: ProviderLimiter(
+            name,
+            max_concurrency=cfg["max_concurrency"],
+            rpm=cfg["rpm"],
+            tpm=cfg["tpm"],
+            promote_after=promote_after,
+        )
+        for name, cfg in limits.items()
+    }
@@ -6,89 +6,104 @@ from app.agents.learning_roadmap_agent import LearningRoadmapAgent
 from app.agents.resume_analyzer import ResumeAnalyzerAgent
 from app.agents.socioeconomic_agent import SocioEconomicAgent
 from app.schemas.user_data import UserData
+from app.services.identity_map import parse_user
+from app.services.task_graph import Stage, GraphRun, run_graph
+from app.config import ORCHESTRATOR_SETTINGS
 from typing import Dict, Any
-import asyncio
+
+# cross_questions feeds the user, not the report: the report does not wait for it
+FINAL_REPORT_INPUTS = ["socio_summary", "resume_summary", "aptitude_summary", "learning_summary"]
 
 class CareerGuidanceOrchestrator:
-    def __init__(self):
+    def __init__(self, settings: Dict[str, Any] = None):
         self.socio_agent = SocioEconomicAgent()
         self.resume_agent = ResumeAnalyzerAgent()
         self.aptitude_agent = AptitudeInterestAgent()
         self.learning_agent = LearningRoadmapAgent()
         self.cross_agent = CrossExamAgent()
         self.gap_agent = GapAnalyzerAgent()
+        self.settings = settings or ORCHESTRATOR_SETTINGS
 
-    async def run(self, user_data: dict) -> Dict[str, Any]:
-        user = UserData(**user_data)
-        insights: Dict[str, Any] = {}
+    def _build_stages(self, user: UserData) -> list:
+        personal_info = user.personalInfo.dict() if user.personalInfo else {}
+        optional_fields = user.optionalFields.dict() if user.optionalFields else {}
+        strengths_weaknesses = user.strengthsAndWeaknesses.dict() if user.strengthsAndWeaknesses else {}
+        timeout = self.settings["stage_timeout"]
 
         # 1️⃣ Socio-economic summary
-        try:
-            insights["socio_summary"] = await self.socio_agent.generate_summary(
-                personal_info=user.personalInfo.dict() if user.personalInfo else {},
-                optional_fields=user.optionalFields.dict() if user.optionalFields else {}
+        async def socio(run: GraphRun):
+            return await self.socio_agent.generate_summary(
+                personal_info=personal_info,
+                optional_fields=optional_fields
             )
-        except Exception as e:
-            insights["socio_summary"] = {"error": str(e)}
 
         # 2️⃣ Resume analysis (only if resume exists)
-        try:
-            if user.resume and user.resume.extractedText:
-                insights["resume_summary"] = await self.resume_agent.analyze_resume(
-                    resume_text=user.resume.extractedText,
-                    strengths_and_weaknesses=user.strengthsAndWeaknesses.dict() if user.strengthsAndWeaknesses else {},
-                    preferred_role=user.interests.preferredRole if user.interests else ""
-                )
-            else:
-                insights["resume_summary"] = {}
-        except Exception as e:
-            insights["resume_summary"] = {"error": str(e)}
+        async def resume(run: GraphRun):
+            if not (user.resume and user.resume.extractedText):
+                return {}
+            return await self.resume_agent.analyze_resume(
+                resume_text=user.resume.extractedText,
+                strengths_and_weaknesses=strengths_weaknesses,
+                preferred_role=user.interests.preferredRole if user.interests else ""
+            )
 
         # 3️⃣ Aptitude & interest analysis (tests + interests)
-        try:
-            tests_dict = user.tests.dict() if user.tests else {}
-            interests_dict = user.interests.dict() if user.interests else {}
-            insights["aptitude_summary"] = await self.aptitude_agent.analyze_tests(
-                tests=tests_dict,
-                interests=interests_dict,
-                personal_info=user.personalInfo.dict() if user.personalInfo else {}
+        async def aptitude(run: GraphRun):
+            return await self.aptitude_agent.analyze_tests(
+                tests=user.tests.dict() if user.tests else {},
+                interests=user.interests.dict() if user.interests else {},
+                personal_info=personal_info
             )
-        except Exception as e:
-            insights["aptitude_summary"] = {"error": str(e)}
 
         # 4️⃣ Learning roadmap analysis
-        try:
-            learning_data = user.learningRoadmap.dict() if user.learningRoadmap else {}
-            strengths_weaknesses = user.strengthsAndWeaknesses.dict() if user.strengthsAndWeaknesses else {}
-            insights["learning_summary"] = await self.learning_agent.analyze_learning(
-                learning_data=learning_data,
+        async def learning(run: GraphRun):
+            return await self.learning_agent.analyze_learning(
+                learning_data=user.learningRoadmap.dict() if user.learningRoadmap else {},
                 strengths_and_weaknesses=strengths_weaknesses
             )
-        except Exception as e:
-            insights["learning_summary"] = {"error": str(e)}
 
-        # 5️⃣ Cross-examination analysis
-        try:
-            cross_questions = await self.cross_agent.generate_questions(user_data)
-            insights["cross_questions"] = cross_questions
-            # Optionally you can analyze answers if provided
-            # insights["cross_summary"] = await self.cross_agent.analyze_answers(user_data, answers)
-        except Exception as e:
-            insights["cross_questions"] = []
-            insights["cross_summary"] = {"error": str(e)}
+        # 5️⃣ Cross-examination questions
+        # Optionally you can analyze answers if provided
+        # insights["cross_summary"] = await self.cross_agent.analyze_answers(user, answers)
+        async def cross(run: GraphRun):
+            return await self.cross_agent.generate_questions(user)
 
-        # 6️⃣ Gap & final report consolidation
-        try:
-            insights["final_report"] = await self.gap_agent.generate_final_report(
-                socio_summary=insights.get("socio_summary", {}),
-                resume_summary=insights.get("resume_summary", {}),
-                learning_summary=insights.get("learning_summary", {}),
-                aptitude_summary=insights.get("aptitude_summary", {}),
-                cross_summary=insights.get("cross_summary", {}),
-                personal_info=user.personalInfo.dict() if user.personalInfo else {},
-                optional_fields=user.optionalFields.dict() if user.optionalFields else {}
+        # 6️⃣ Gap & final report consolidation — starts once the four summaries are ready
+        async def final_report(run: GraphRun):
+            return await self.gap_agent.generate_final_report(
+                socio_summary=run.results.get("socio_summary", {}),
+                resume_summary=run.results.get("resume_summary", {}),
+                learning_summary=run.results.get("learning_summary", {}),
+                aptitude_summary=run.results.get("aptitude_summary", {}),
+                cross_summary={},
+                personal_info=personal_info,
+                optional_fields=optional_fields
             )
-        except Exception as e:
-            insights["final_report"] = {"error": str(e)}
 
+        return [
+            Stage("socio_summary", socio, timeout=timeout),
+            Stage("resume_summary", resume, timeout=timeout),
+            Stage("aptitude_summary", aptitude, timeout=timeout),
+            Stage("learning_summary", learning, timeout=timeout),
+            Stage("cross_questions", cross, timeout=timeout, on_error=lambda e: []),
+            Stage(
+                "final_report",
+                final_report,
+                depends_on=FINAL_REPORT_INPUTS,
+                timeout=self.settings["final_stage_timeout"]
+            ),
+        ]
+
+    async def run(self, user_data: dict) -> Dict[str, Any]:
+        user = parse_user(user_data)
+
+        run = await run_graph(
+            self._build_stages(user),
+            max_concurrency=self.settings["max_concurrency"]
+        )
+
+        insights: Dict[str, Any] = dict(run.results)
+        if "cross_questions" in run.errors:
+            insights["cross_summary"] = {"error": run.errors["cross_questions"]}
+        insights["_stages"] = {"timings": run.timings, "errors": run.errors}
         return insights
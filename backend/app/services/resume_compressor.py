@@ -0,0 +1,154 @@
+# app/services/resume_compressor.py
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from app.llm.token_estimate import estimate_tokens
+
+# Section → heading keywords (matched against short lines only)
+SECTION_HEADINGS = {
+    "summary": ["summary", "objective", "profile", "about me"],
+    "experience": ["experience", "work history", "employment", "internship", "internships", "professional background"],
+    "projects": ["projects", "project", "academic projects", "personal projects"],
+    "skills": ["skills", "technical skills", "technologies", "tech stack", "tools", "core competencies"],
+    "education": ["education", "academic", "academics", "qualifications"],
+    "certifications": ["certifications", "certification", "certificates", "courses", "licenses"],
+    "achievements": ["achievements", "awards", "honors", "honours", "accomplishments", "publications"],
+}
+
+# Share of the token budget per section; unused share flows to the others
+SECTION_SHARES = {
+    "experience": 0.30,
+    "projects": 0.25,
+    "skills": 0.15,
+    "education": 0.10,
+    "summary": 0.05,
+    "certifications": 0.05,
+    "achievements": 0.05,
+    "other": 0.05,
+}
+
+_HEADING_LOOKUP = {kw: section for section, kws in SECTION_HEADINGS.items() for kw in kws}
+_WORD = re.compile(r"[a-z][a-z0-9+#.]*")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9])|\s*[•▪●◦■]\s*(?=\S)")
+_NUMBER = re.compile(r"\d")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it of on or our that the their this to was were with "
+    "i me my we you your he she they them his her its also using used use".split()
+)
+
+
+def _heading_section(line: str) -> str:
+    """Section name if the line looks like a heading ("EXPERIENCE", "Projects:"), else ''."""
+    cleaned = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if not cleaned or len(cleaned) > 40 or len(line.split()) > 4:
+        return ""
+    return _HEADING_LOOKUP.get(cleaned, "")
+
+
+def split_sections(text: str) -> Dict[str, List[str]]:
+    """Group resume lines into sections by detecting heading lines."""
+    sections: Dict[str, List[str]] = {}
+    current = "summary"
+    for raw in text.split("\n"):
+        line = raw.strip()
+        if not line:
+            continue
+        heading = _heading_section(line)
+        if heading:
+            current = heading
+            continue
+        sections.setdefault(current if current in SECTION_SHARES else "other", []).append(line)
+    return sections
+
+
+def _sentences(lines: List[str]) -> List[str]:
+    units = []
+    for line in lines:
+        for part in _SENTENCE_SPLIT.split(line):
+            part = part.strip(" \t-•")
+            if len(part) > 2:
+                units.append(part)
+    return units
+
+
+def _tokens(sentence: str) -> List[str]:
+    return [w for w in _WORD.findall(sentence.lower()) if w not in _STOPWORDS]
+
+
+def _score_sentences(sentences: List[Tuple[str, str]]) -> List[float]:
+    """
+    TF-IDF salience: a sentence scores high when it carries terms that are
+    rare across the resume. Normalised by sqrt(length) so long lines do not win
+    by size alone; sentences with figures (impact, dates, grades) get a boost.
+    """
+    docs = [_tokens(s) for _, s in sentences]
+    df = Counter(term for doc in docs for term in set(doc))
+    n = len(docs)
+    scores = []
+    for (_, sentence), doc in zip(sentences, docs):
+        if not doc:
+            scores.append(0.0)
+            continue
+        tf = Counter(doc)
+        weight = sum(count * (math.log((1 + n) / (1 + df[term])) + 1) for term, count in tf.items())
+        score = weight / math.sqrt(len(doc))
+        if _NUMBER.search(sentence):
+            score *= 1.2
+        scores.append(score)
+    return scores
+
+
+def compress_resume(text: str, token_budget: int = 600) -> str:
+    """
+    Extractive compression: keep the most informative sentences of each
+    section within the token budget, in their original order, under
+    section labels. Text that already fits is returned unchanged.
+    """
+    if not text or estimate_tokens(text) <= token_budget:
+        return text or ""
+
+    sections = split_sections(text)
+    candidates: List[Tuple[str, str]] = []
+    seen = set()
+    for section, lines in sections.items():
+        for sentence in _sentences(lines):
+            key = " ".join(sentence.lower().split())
+            if key not in seen:
+                seen.add(key)
+                candidates.append((section, sentence))
+    if not candidates:
+        return text[: token_budget * 4]
+
+    scores = _score_sentences(candidates)
+    costs = [estimate_tokens(s) + 1 for _, s in candidates]
+
+    # Section budgets from shares, renormalised over the sections present
+    present = {section for section, _ in candidates}
+    total_share = sum(SECTION_SHARES[s] for s in present)
+    budgets = {s: token_budget * SECTION_SHARES[s] / total_share for s in present}
+
+    chosen = set()
+    ranked = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+    # Pass 1: best sentences within each section's own budget
+    for i in ranked:
+        section = candidates[i][0]
+        if costs[i] <= budgets[section]:
+            budgets[section] -= costs[i]
+            chosen.add(i)
+    # Pass 2: leftover budget goes to the best remaining sentences anywhere
+    leftover = sum(budgets.values())
+    for i in ranked:
+        if i not in chosen and costs[i] <= leftover:
+            leftover -= costs[i]
+            chosen.add(i)
+
+    lines, last_section = [], None
+    for i in sorted(chosen):
+        section, sentence = candidates[i]
+        if section != last_section:
+            lines.append(f"[{section.upper()}]")
+            last_section = section
+        lines.append(sentence)
+    return "\n".join(lines)
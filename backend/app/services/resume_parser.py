@@ -1,70 +1,76 @@
 # app/services/resume_parser.py
 import io
-import re
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Union
 
 import pdfplumber
 import docx
 
+from app.services.skill_matcher import get_skill_matcher
 
-def parse_resume(file_content: bytes, content_type: str) -> Dict[str, Any]:
-    text = ""
+DOCX_TYPES = [
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/msword",
+]
 
-    # ------------------ Extract text ------------------
-    if content_type == "application/pdf":
-        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-
-    elif content_type in [
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword",
-    ]:
-        doc = docx.Document(io.BytesIO(file_content))
-        for para in doc.paragraphs:
-            text += para.text + "\n"
 
+def _open_source(source: Union[bytes, str]):
+    """Parsers accept a path or a file object; wrap raw bytes in a stream."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _iter_pdf_pages(source, max_pages: int) -> Iterator[str]:
+    with pdfplumber.open(_open_source(source)) as pdf:
+        for page in pdf.pages[:max_pages]:  # pages past the limit are never extracted
+            yield page.extract_text() or ""
+            page.close()  # drop pdfplumber's per-page object cache as we go
+
+
+def _iter_docx_paragraphs(source) -> Iterator[str]:
+    doc = docx.Document(_open_source(source))
+    for para in doc.paragraphs:
+        yield para.text
+
+
+def extract_text(source: Union[bytes, str], content_type: str, max_pages: int = 10, max_chars: int = 40000) -> str:
+    """
+    Extract text page by page (paragraph by paragraph for DOCX), stopping as
+    soon as the page or character budget is reached. Pieces are collected in
+    a list and joined once.
+    """
+    if content_type == "application/pdf":
+        units = _iter_pdf_pages(source, max_pages)
+    elif content_type in DOCX_TYPES:
+        units = _iter_docx_paragraphs(source)
     else:
         raise ValueError(f"Unsupported file type: {content_type}")
 
+    parts = []
+    total_chars = 0
+    for unit in units:
+        parts.append(unit[: max_chars - total_chars])
+        total_chars += len(parts[-1]) + 1
+        if total_chars >= max_chars:
+            break
+    units.close()  # release the open document when stopping early
+
+    return "\n".join(parts)
+
+
+def parse_resume(source: Union[bytes, str], content_type: str, max_pages: int = 10, max_chars: int = 40000) -> Dict[str, Any]:
+    # ------------------ Extract text ------------------
+    text = extract_text(source, content_type, max_pages=max_pages, max_chars=max_chars)
+
     text = text.strip()
 
-    # ------------------ Skills extraction (very basic) ------------------
-    predefined_skills = [
-        "Python", "Java", "C++", "SQL", "HTML", "CSS", "JavaScript", "React",
-        "Node.js", "Django", "Flask", "Machine Learning", "Deep Learning",
-        "Data Analysis", "AWS", "Docker", "Kubernetes"
-    ]
-    skills = [s for s in predefined_skills if re.search(rf"\b{s}\b", text, re.IGNORECASE)]
-
-    # ------------------ Projects extraction ------------------
-    projects = []
-    if "project" in text.lower():
-        project_lines = [
-            line.strip()
-            for line in text.split("\n")
-            if re.search(r"(project|developed|built)", line, re.IGNORECASE)
-        ]
-        projects.extend(project_lines[:5])  # limit to 5
-
-    # ------------------ Certifications extraction ------------------
-    certifications = []
-    if "certification" in text.lower() or "certificate" in text.lower():
-        cert_lines = [
-            line.strip()
-            for line in text.split("\n")
-            if re.search(r"(certification|certificate)", line, re.IGNORECASE)
-        ]
-        certifications.extend(cert_lines[:5])  # limit to 5
-
-    # ------------------ Work experience check ------------------
-    has_experience = "Yes" if "experience" in text.lower() else "No"
+    # ------------------ Skills, projects, certifications, experience ------------------
+    # One pass over the lines with the taxonomy compiled once per process
+    signals = get_skill_matcher().scan(text)
 
     # ------------------ Final result ------------------
     return {
         "extractedText": text,
-        "skills": skills,
-        "projects": projects,
-        "certifications": certifications,
-        "hasExperience": has_experience,
+        "skills": signals["skills"],
+        "projects": signals["projects"],
+        "certifications": signals["certifications"],
+        "hasExperience": signals["hasExperience"],
     }
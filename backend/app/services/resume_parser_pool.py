@@ -0,0 +1,129 @@
+# app/services/resume_parser_pool.py
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Union
+
+from app.config import RESUME_PARSER_SETTINGS
+from app.services.resume_parser import parse_resume
+
+logger = logging.getLogger("resume_parser_pool")
+
+
+class ResumeParseError(Exception):
+    """A resume was rejected; status_code is what the route should answer with."""
+
+    def __init__(self, message: str, status_code: int = 422):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _limit_worker_memory(memory_limit_mb: int):
+    """Process-pool initializer: cap the address space of each parser process."""
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:  # not available on every platform
+        logger.warning(f"Could not set resume parser memory limit: {e}")
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# A crash breaks every parse in flight, so the file that caused it is unknown:
+# the first caller to see it retries once before blaming its file.
+MAX_CRASH_RETRIES = 1
+# Resubmits after the pool was replaced because of some other file
+MAX_POOL_REBUILD_RESUBMITS = 3
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        settings = RESUME_PARSER_SETTINGS
+        _executor = ProcessPoolExecutor(
+            max_workers=settings["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_limit_worker_memory,
+            initargs=(settings["memory_limit_mb"],),
+            max_tasks_per_child=settings["max_tasks_per_child"],
+        )
+    return _executor
+
+
+def _kill_executor(executor: ProcessPoolExecutor):
+    """
+    Throw away the pool after a timeout or crash: a stuck parser process cannot
+    be cancelled, only terminated (and losing one worker breaks the whole pool).
+    Parses still in flight on it get BrokenProcessPool and are resubmitted by
+    parse_resume_in_pool to the next pool.
+    """
+    global _executor
+    if executor is not _executor:
+        return  # already replaced by another caller
+    _executor = None
+    for process in list(getattr(executor, "_processes", {}).values()):
+        process.terminate()
+    # no cancel_futures: queued parses must fail with BrokenProcessPool (→ resubmitted),
+    # not look like a cancelled request
+    executor.shutdown(wait=False)
+
+
+def shutdown_parser_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def parse_resume_in_pool(source: Union[bytes, str], content_type: str) -> Dict[str, Any]:
+    """
+    Run parse_resume in the process pool with a per-file timeout and memory cap.
+    `source` is the file's bytes or a path to it (see upload_spool.SpooledUpload).
+    """
+    settings = RESUME_PARSER_SETTINGS
+    if isinstance(source, (bytes, bytearray)) and len(source) > settings["max_file_bytes"]:
+        raise ResumeParseError(
+            f"Resume is larger than {settings['max_file_bytes'] // 1024} KB", status_code=413
+        )
+
+    call = functools.partial(
+        parse_resume,
+        source,
+        content_type,
+        max_pages=settings["max_pages"],
+        max_chars=settings["max_chars"],
+    )
+    loop = asyncio.get_running_loop()
+    crashes = rebuilds = 0
+
+    while True:
+        executor = _get_executor()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(executor, call), settings["timeout_seconds"])
+        except asyncio.TimeoutError:
+            _kill_executor(executor)
+            raise ResumeParseError(
+                f"Resume took longer than {settings['timeout_seconds']:.0f}s to parse", status_code=422
+            )
+        except MemoryError:
+            raise ResumeParseError("Resume needs too much memory to parse", status_code=422)
+        except BrokenProcessPool:
+            if executor is not _executor:
+                # torn down because of another file (its timeout or crash): not this file's fault
+                rebuilds += 1
+                if rebuilds > MAX_POOL_REBUILD_RESUBMITS:
+                    raise ResumeParseError("Resume parser is busy, please try again", status_code=503)
+                logger.info("Resume parser pool was rebuilt, resubmitting")
+                continue
+            # We saw the crash first; any in-flight file may have caused it, so retry once
+            _kill_executor(executor)
+            crashes += 1
+            if crashes > MAX_CRASH_RETRIES:
+                raise ResumeParseError("Resume parser crashed on this file", status_code=422)
+            logger.warning("Resume parser pool crashed, retrying on a fresh pool")
+        except ValueError as e:  # unsupported file type
+            raise ResumeParseError(str(e), status_code=415)
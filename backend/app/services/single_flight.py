@@ -0,0 +1,56 @@
+# app/services/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key: the first caller starts the
+    work, later callers await the same task and receive the same result.
+
+    The shared task is shielded, so cancelling one waiter (e.g. a client that
+    disconnected) never cancels the call for the others. Only when the last
+    waiter goes away is the upstream call itself cancelled.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.counters = {
+            "started": 0,       # upstream calls actually made
+            "coalesced": 0,     # callers served by an in-flight call (calls saved)
+            "abandoned": 0,     # upstream calls cancelled because every waiter left
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+            self.counters["started"] += 1
+        else:
+            self.counters["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # forget it first: a caller arriving before the task unwinds starts a fresh call
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.counters["abandoned"] += 1
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "in_flight": len(self._flights)}
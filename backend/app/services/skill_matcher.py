@@ -0,0 +1,176 @@
+# app/services/skill_matcher.py
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+TAXONOMY_PATH = Path(__file__).resolve().parent.parent / "data" / "skills_taxonomy.json"
+
+# A term may not be glued to letters/digits or to symbols that are part of
+# skill names ("C" must not match inside "C++", "R" not inside "R&D").
+_LEFT_BOUNDARY = r"(?<![\w+#&.])"
+_RIGHT_BOUNDARY = r"(?![\w+#&])"
+
+_PROJECT_WORD = re.compile(r"project", re.IGNORECASE)
+_PROJECT_LINE = re.compile(r"project|developed|built", re.IGNORECASE)
+_CERT_LINE = re.compile(r"certification|certificate", re.IGNORECASE)
+_EXPERIENCE = re.compile(r"experience", re.IGNORECASE)
+
+# Words that make a line read as technical, so an ambiguous skill on it
+# ("Go", "R", "Spring") is taken at face value
+_TECH_CUE = re.compile(
+    r"\b(?:languages?|programming|coding|code|developer|development|software|backend|frontend|"
+    r"full[- ]?stack|stack|tech|technologies|technical|proficient|frameworks?|libraries|tools|skills)\b",
+    re.IGNORECASE,
+)
+_ALNUM = re.compile(r"[^\W_]")
+# Skills in these categories don't vouch for an ambiguous term next to them
+_NON_TECH_CATEGORIES = {"business", "soft_skills", "domain_science"}
+
+
+def _normalize(term: str) -> str:
+    return " ".join(term.split())
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """
+    Compile terms into a trie-shaped regex, e.g. ["java", "javascript"] →
+    "java(?:script)?". Matching is then proportional to the length of the
+    matched term, not to the number of terms (Aho-Corasick-style prefix sharing).
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        is_end = "" in node
+        # Each branch starts with a distinct character, so at most one can match;
+        # the trailing "?" is greedy, which makes the longest term win
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items(), key=lambda kv: kv[0])
+            if ch != ""
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if is_end else group
+
+    return build(trie)
+
+
+class SkillMatcher:
+    """
+    Finds skills (from a taxonomy with aliases), project lines, certification
+    lines and the experience flag in a single pass over the resume lines.
+    The taxonomy is compiled once into one regex.
+    """
+
+    def __init__(self, skills: List[Dict[str, Any]], max_projects: int = 5, max_certifications: int = 5):
+        self.max_projects = max_projects
+        self.max_certifications = max_certifications
+        self._ci_terms: Dict[str, str] = {}   # lowercased term → canonical name
+        self._cs_terms: Dict[str, str] = {}   # exact term → canonical name
+        self._needs_context: Set[str] = set()  # everyday words: only count on a technical line
+        self._technical: Set[str] = set()      # unambiguous skills that make a line technical
+
+        for skill in skills:
+            if skill.get("needs_context"):
+                self._needs_context.add(skill["name"])
+            elif skill.get("category") not in _NON_TECH_CATEGORIES:
+                self._technical.add(skill["name"])
+            for term in [skill["name"], *skill.get("aliases", [])]:
+                term = _normalize(term)
+                if skill.get("case_sensitive") or len(term) <= 2:
+                    self._cs_terms.setdefault(term, skill["name"])
+                else:
+                    self._ci_terms.setdefault(term.lower(), skill["name"])
+
+        alternatives = []
+        if self._ci_terms:
+            alternatives.append("(?i:" + _trie_regex(self._ci_terms) + ")")
+        if self._cs_terms:
+            alternatives.append(_trie_regex(self._cs_terms))
+        self.pattern = re.compile(_LEFT_BOUNDARY + "(?:" + "|".join(alternatives) + ")" + _RIGHT_BOUNDARY)
+
+    @classmethod
+    def from_file(cls, path: Path = TAXONOMY_PATH, **kwargs) -> "SkillMatcher":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["skills"], **kwargs)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._ci_terms) + len(self._cs_terms)
+
+    def _canonical(self, matched: str) -> str:
+        term = _normalize(matched)
+        return self._cs_terms.get(term) or self._ci_terms.get(term.lower()) or term
+
+    def _line_skills(self, line: str) -> List[str]:
+        """
+        Canonical skills on one line. A needs_context skill ("Go", "R") only
+        counts when the line is technical: it also names an unambiguous
+        technical skill, contains a cue word ("languages", "frameworks"), or
+        is nothing but a list of skills. So "Go to market" yields nothing
+        while "Skills: Go, Python" and "Go, Rust" yield the languages.
+        """
+        matches = list(self.pattern.finditer(line))
+        names = [self._canonical(m.group()) for m in matches]
+        if not any(name in self._needs_context for name in names):
+            return names
+        if (
+            any(name in self._technical for name in names)
+            or _TECH_CUE.search(line)
+            or not _ALNUM.search(self.pattern.sub("", line))
+        ):
+            return names
+        return [name for name in names if name not in self._needs_context]
+
+    def find_skills(self, text: str) -> List[str]:
+        """Canonical skill names, in order of first appearance."""
+        found: Dict[str, None] = {}
+        for line in text.split("\n"):
+            for name in self._line_skills(line):
+                found.setdefault(name, None)
+        return list(found)
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        skills: Dict[str, None] = {}
+        projects: List[str] = []
+        certifications: List[str] = []
+        has_experience = False
+        mentions_projects = False
+
+        for line in text.split("\n"):
+            for name in self._line_skills(line):
+                skills.setdefault(name, None)
+
+            stripped = line.strip()
+            if len(projects) < self.max_projects and _PROJECT_LINE.search(line):
+                projects.append(stripped)
+            if not mentions_projects and _PROJECT_WORD.search(line):
+                mentions_projects = True
+            if len(certifications) < self.max_certifications and _CERT_LINE.search(line):
+                certifications.append(stripped)
+            if not has_experience and _EXPERIENCE.search(line):
+                has_experience = True
+
+        return {
+            "skills": list(skills),
+            # "developed"/"built" lines only count when the resume talks about projects at all
+            "projects": projects if mentions_projects else [],
+            "certifications": certifications,
+            "hasExperience": "Yes" if has_experience else "No",
+        }
+
+
+@lru_cache(maxsize=1)
+def get_skill_matcher() -> SkillMatcher:
+    """Compiled once per process (each resume parser worker builds its own)."""
+    return SkillMatcher.from_file()
@@ -0,0 +1,71 @@
+# app/services/task_events.py
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger("task_events")
+
+
+class TaskEventBroker:
+    """
+    In-process pub/sub for career task updates.
+    Each subscriber gets its own bounded queue; a slow client drops
+    intermediate events rather than holding up the publisher.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(task_id)
+        if not subscribers:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[task_id]
+
+    def publish(self, task_id: str, updates: Dict[str, Any]):
+        for queue in self._subscribers.get(task_id, ()):
+            try:
+                queue.put_nowait(updates)
+            except asyncio.QueueFull:
+                # Keep the newest state: drop the oldest queued update
+                queue.get_nowait()
+                queue.put_nowait(updates)
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return task_id in self._subscribers
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+
+task_events = TaskEventBroker()
+
+
+async def watch_career_task_changes(collection, broker: Optional[TaskEventBroker] = None):
+    """
+    Feed the broker from a Mongo change stream on career_tasks, so updates
+    written by a separate worker process reach SSE clients on this API process.
+    Requires a replica set; runs until cancelled.
+    """
+    broker = broker or task_events
+    pipeline = [{"$match": {"operationType": "update"}}]
+    while True:
+        try:
+            async with collection.watch(pipeline) as stream:
+                async for change in stream:
+                    task_id = change["documentKey"]["_id"]
+                    if broker.has_subscribers(task_id):
+                        broker.publish(task_id, change["updateDescription"]["updatedFields"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"career_tasks change stream failed, restarting: {e}")
+            await asyncio.sleep(5)
@@ -0,0 +1,99 @@
+# app/services/task_graph.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("task_graph")
+
+
+class Stage:
+    """
+    One node of the graph.
+    `fn` receives the running GraphRun and returns the stage output.
+    If the stage fails or times out, `on_error(exc)` provides its fallback output.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[["GraphRun"], Awaitable[Any]],
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        on_error: Optional[Callable[[BaseException], Any]] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.on_error = on_error or (lambda e: {"error": str(e)})
+
+
+class GraphRun:
+    """Results, errors and timings of one graph execution."""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+
+def _check_graph(stages: List[Stage]):
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("Duplicate stage names in graph")
+    for stage in stages:
+        missing = [d for d in stage.depends_on if d not in names]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    # Kahn's algorithm: every stage must be reachable without a cycle
+    pending = {s.name: set(s.depends_on) for s in stages}
+    while pending:
+        ready = [n for n, deps in pending.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle detected between stages: {sorted(pending)}")
+        for n in ready:
+            del pending[n]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+async def run_graph(stages: List[Stage], max_concurrency: int = 4) -> GraphRun:
+    """
+    Run stages as soon as their dependencies finish, at most `max_concurrency`
+    at a time. A failing stage never aborts the graph: its fallback output is
+    stored and dependants still run.
+    """
+    _check_graph(stages)
+
+    run = GraphRun()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    done: Dict[str, asyncio.Event] = {s.name: asyncio.Event() for s in stages}
+
+    async def execute(stage: Stage):
+        try:
+            for dep in stage.depends_on:
+                await done[dep].wait()
+
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    run.results[stage.name] = await asyncio.wait_for(stage.fn(run), stage.timeout)
+                except asyncio.TimeoutError:
+                    error = asyncio.TimeoutError(f"{stage.name} timed out after {stage.timeout}s")
+                    run.errors[stage.name] = str(error)
+                    run.results[stage.name] = stage.on_error(error)
+                except Exception as e:
+                    run.errors[stage.name] = str(e)
+                    run.results[stage.name] = stage.on_error(e)
+                finally:
+                    run.timings[stage.name] = round(time.perf_counter() - started, 3)
+
+            if stage.name in run.errors:
+                logger.warning(f"Stage {stage.name} failed: {run.errors[stage.name]}")
+        finally:
+            done[stage.name].set()
+
+    await asyncio.gather(*(execute(s) for s in stages))
+    return run
@@ -0,0 +1,184 @@
+# app/services/upload_spool.py
+import hashlib
+import io
+import os
+import tempfile
+from typing import Dict, Optional, Tuple, Union
+
+from fastapi import Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024   # boundaries, part headers and the small text fields
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload is larger than {max_bytes // 1024} KB")
+        self.max_bytes = max_bytes
+
+
+class BadUpload(Exception):
+    """The body is not a usable form; status_code is what the route should answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SpooledUpload:
+    """
+    Upload copied chunk by chunk into memory, rolling over to a named temp
+    file once it passes `spool_bytes`. The named file lets a parser process
+    open it by path instead of receiving a pickled copy of the bytes.
+    A SHA-256 of the content is computed on the way in.
+    """
+
+    def __init__(self, spool_bytes: int):
+        self.spool_bytes = spool_bytes
+        self.filename = ""
+        self.content_type = ""
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self._buffer is not None and self.size > self.spool_bytes:
+            self._file = tempfile.NamedTemporaryFile(prefix="resume-", delete=False)
+            self._file.write(self._buffer.getvalue())
+            self._buffer = None
+        if self._buffer is not None:
+            self._buffer.write(chunk)
+        else:
+            self._file.write(chunk)
+
+    @property
+    def sha256(self) -> str:
+        """Content fingerprint, computed while the upload was streamed in."""
+        return self._hash.hexdigest()
+
+    def source(self) -> Union[bytes, str]:
+        """Bytes for small uploads, a file path for spooled ones."""
+        if self._buffer is not None:
+            return self._buffer.getvalue()
+        self._file.flush()
+        return self._file.name
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except FileNotFoundError:
+                pass
+            self._file = None
+        self._buffer = None
+
+
+class _FormSink:
+    """python-multipart callbacks: text fields into a dict, the file part into a SpooledUpload."""
+
+    def __init__(self, file_field: str, spooled: SpooledUpload, max_bytes: int):
+        self.file_field = file_field
+        self.spooled = spooled
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.has_file = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._name = None
+        self._value = bytearray()
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._name = None
+        self._value = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if self._name == self.file_field:
+            if self.has_file:
+                raise BadUpload(f"Only one '{self.file_field}' file is accepted")
+            self.has_file = True
+            self.spooled.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+            self.spooled.content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._name != self.file_field:
+            self._value += data[start:end]
+        elif self.spooled.size + (end - start) > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        else:
+            self.spooled.write(data[start:end])
+
+    def on_part_end(self):
+        if self._name != self.file_field:
+            self.fields[self._name] = self._value.decode("utf-8", "replace")
+
+
+async def spool_multipart(
+    request: Request, file_field: str, max_bytes: int, spool_bytes: int
+) -> Tuple[Dict[str, str], SpooledUpload]:
+    """
+    Parse a multipart/form-data body straight off request.stream(): text
+    fields are collected, the `file_field` part goes into a SpooledUpload.
+    Nothing reads the body ahead of this, so an oversized upload is refused
+    from its Content-Length before any of it is read, and otherwise aborted
+    as soon as the file (or the body as a whole) passes its cap.
+    """
+    body_limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > body_limit:
+        raise UploadTooLarge(max_bytes)
+
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise BadUpload("Expected a multipart/form-data body")
+
+    spooled = SpooledUpload(spool_bytes)
+    sink = _FormSink(file_field, spooled, max_bytes)
+    parser = MultipartParser(boundary, sink.callbacks())
+    received = 0
+    try:
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > body_limit:
+                    raise UploadTooLarge(max_bytes)
+                parser.write(chunk)
+            parser.finalize()
+        except MultipartParseError as e:
+            raise BadUpload(f"Malformed multipart body: {e}")
+        if not sink.has_file:
+            raise BadUpload(f"Missing file field '{file_field}'", status_code=422)
+    except BaseException:
+        spooled.close()
+        raise
+    return sink.fields, spooled
@@ -0,0 +1,38 @@
+# app/worker.py
+# Standalone finalization worker: `python -m app.worker`
+# Use with JOB_QUEUE_MODE=external so API processes only enqueue jobs.
+import asyncio
+import signal
+
+from app.utils.logger import logger
+from app.database import create_indexes, open_client as open_mongo_client, close_client as close_mongo_client
+from app.services.llm_service import open_llm_clients, close_llm_clients
+from app.services.job_queue import JobWorkerPool
+from app.services import mongo_service
+from app.routes.final_analysis import finalization_job
+
+
+async def main():
+    open_mongo_client()
+    await create_indexes()
+    await mongo_service.detect_legacy_user_emails()
+    await open_llm_clients()
+
+    pool = JobWorkerPool(finalization_job)
+    await pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Career finalization worker running")
+    await stop.wait()
+
+    await pool.drain()
+    await close_llm_clients()
+    close_mongo_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
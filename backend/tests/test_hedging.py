@@ -0,0 +1,72 @@
+import asyncio
+
+from app.services.hedging import Hedger
+
+SETTINGS = {
+    "min_samples": 3,
+    "default_delay_seconds": 0.02,
+    "min_delay_seconds": 0.01,
+    "window_size": 10,
+    "budget_ratio": 0.5,
+    "budget_burst": 1,
+}
+POLICIES = {"socio": {"percentile": 95}}
+
+
+def call(seconds, result, log=None):
+    async def fn():
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(result)
+            raise
+        return result
+    return fn
+
+
+def test_fast_primary_sends_no_backup():
+    hedger = Hedger(POLICIES, SETTINGS)
+    assert asyncio.run(hedger.run("socio", call(0, "primary"), call(0, "backup"))) == "primary"
+    assert hedger.counters == {"eligible": 1, "fired": 0, "won": 0, "budget_denied": 0}
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    hedger = Hedger(POLICIES, SETTINGS)
+    cancelled = []
+    result = asyncio.run(hedger.run("socio", call(1, "primary", cancelled), call(0, "backup")))
+    assert result == "backup"
+    assert cancelled == ["primary"]
+    assert hedger.counters["fired"] == 1 and hedger.counters["won"] == 1
+
+
+def test_failed_backup_falls_back_to_primary():
+    async def broken():
+        raise RuntimeError("backup failed")
+
+    hedger = Hedger(POLICIES, SETTINGS)
+    assert asyncio.run(hedger.run("socio", call(0.05, "primary"), broken)) == "primary"
+    assert hedger.counters["won"] == 0
+
+
+def test_budget_caps_backup_calls():
+    hedger = Hedger(POLICIES, {**SETTINGS, "budget_ratio": 0.0, "budget_burst": 1})
+
+    async def scenario():
+        for _ in range(3):
+            await hedger.run("socio", call(0.04, "primary"), call(0, "backup"))
+
+    asyncio.run(scenario())
+    assert hedger.counters["fired"] == 1
+    assert hedger.counters["budget_denied"] == 2
+
+
+def test_delay_follows_observed_latency_once_sampled():
+    hedger = Hedger(POLICIES, SETTINGS)
+    assert hedger.delay_for("socio") == SETTINGS["default_delay_seconds"]
+    for seconds in (0.5, 0.6, 2.0):
+        hedger.observe("socio", seconds)
+    assert hedger.delay_for("socio") == 2.0
+    for _ in range(10):
+        hedger.observe("socio", 0.001)
+    assert hedger.delay_for("socio") == SETTINGS["min_delay_seconds"]
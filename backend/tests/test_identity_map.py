@@ -0,0 +1,56 @@
+from app.services.identity_map import MISS, UserIdentityMap, identity_map_scope, current_identity_map, parse_user
+
+
+def test_lookup_misses_until_a_covering_read_is_stored():
+    identity = UserIdentityMap()
+    assert identity.lookup("a@b.c", ["personalInfo"]) is MISS
+
+    doc = identity.store("a@b.c", {"_id": 1, "personalInfo": {"city": "Pune"}}, ["personalInfo"])
+    assert identity.lookup("a@b.c", ["personalInfo"]) is doc
+    assert identity.lookup("a@b.c", ["personalInfo.city"]) is doc
+    # fields outside the first projection need another read
+    assert identity.lookup("a@b.c", ["interests"]) is MISS
+    assert identity.lookup("a@b.c", None) is MISS
+
+
+def test_wider_read_merges_into_the_same_dict():
+    identity = UserIdentityMap()
+    doc = identity.store("a@b.c", {"_id": 1, "personalInfo": {"city": "Pune"}}, ["personalInfo"])
+    again = identity.store("a@b.c", {"_id": 1, "interests": {"favoriteSubjects": "Math"}}, ["interests"])
+    assert again is doc
+    assert doc == {"_id": 1, "personalInfo": {"city": "Pune"}, "interests": {"favoriteSubjects": "Math"}}
+
+    full = identity.store("a@b.c", {"_id": 1, "email": "a@b.c"}, None)
+    assert full is doc and doc == {"_id": 1, "email": "a@b.c"}
+    assert identity.lookup("a@b.c", ["anything"]) is doc
+
+
+def test_missing_user_is_remembered_for_every_projection():
+    identity = UserIdentityMap()
+    assert identity.store("x@b.c", None, ["personalInfo"]) is None
+    assert identity.lookup("x@b.c", ["interests"]) is None
+
+
+def test_writes_update_the_cached_dict_in_place():
+    identity = UserIdentityMap()
+    doc = identity.store("a@b.c", {"_id": 1, "personalInfo": {"city": "Pune"}}, None)
+    identity.record_write("a@b.c", {"personalInfo.city": "Delhi", "resume.skills": ["Go"]}, created=False)
+    assert doc["personalInfo"]["city"] == "Delhi"
+    assert doc["resume"] == {"skills": ["Go"]}
+
+    # a created document is only partly known: drop it so the next read loads it
+    identity.record_write("a@b.c", {"email": "a@b.c"}, created=True)
+    assert identity.lookup("a@b.c", None) is MISS
+
+
+def test_parse_user_reuses_the_model_until_the_dict_changes():
+    with identity_map_scope() as identity:
+        assert current_identity_map() is identity
+        doc = identity.store("a@b.c", {"personalInfo": {"city": "Pune"}}, None)
+        first = parse_user(doc)
+        assert parse_user(doc) is first
+        identity.record_write("a@b.c", {"personalInfo.city": "Delhi"}, created=False)
+        second = parse_user(doc)
+        assert second is not first
+        assert second.personalInfo.city == "Delhi"
+    assert current_identity_map() is None
@@ -0,0 +1,146 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import job_queue, mongo_service
+from app.services.job_queue import JobWorkerPool, PermanentJobError
+
+SETTINGS = {
+    "mode": "inprocess",
+    "workers": 1,
+    "lease_seconds": 1,
+    "heartbeat_seconds": 0.01,
+    "poll_interval_seconds": 0.01,
+    "max_attempts": 3,
+    "backoff_base_seconds": 5,
+    "backoff_max_seconds": 300,
+    "drain_timeout_seconds": 1,
+}
+
+
+class FakeTasks:
+    """Stands in for the career_tasks functions of mongo_service."""
+
+    def __init__(self, queued=(), renewals=()):
+        self.queued = list(queued)
+        self.renewals = list(renewals)   # results (or exceptions) of successive lease renewals
+        self.renew_calls = 0
+        self.finished = []               # (task_id, worker_id, fields)
+
+    async def recover_stale_career_tasks(self):
+        return 0
+
+    async def claim_career_task(self, worker_id, lease_seconds, max_attempts):
+        return self.queued.pop(0) if self.queued else None
+
+    async def renew_career_task_lease(self, task_id, worker_id, lease_seconds):
+        self.renew_calls += 1
+        outcome = self.renewals.pop(0) if self.renewals else True
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def finish_career_task(self, task_id, worker_id, fields):
+        self.finished.append((task_id, worker_id, fields))
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    fake = FakeTasks()
+    for name in ("recover_stale_career_tasks", "claim_career_task", "renew_career_task_lease", "finish_career_task"):
+        monkeypatch.setattr(mongo_service, name, getattr(fake, name))
+    return fake
+
+
+def task(attempts=1, max_attempts=3):
+    return {"_id": "t1", "email": "a@b.c", "attempts": attempts, "max_attempts": max_attempts}
+
+
+def test_successful_job_is_completed(tasks):
+    async def handler(_task):
+        await asyncio.sleep(0.03)
+
+    asyncio.run(JobWorkerPool(handler, SETTINGS)._run_job(task(), "w#0"))
+    assert tasks.renew_calls >= 1
+    assert tasks.finished == [("t1", "w#0", {"status": "completed", "error": None})]
+
+
+def test_lost_lease_cancels_the_run_and_requeues(tasks):
+    tasks.renewals = [True, False]
+    cancelled = False
+
+    async def handler(_task):
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    asyncio.run(asyncio.wait_for(JobWorkerPool(handler, SETTINGS)._run_job(task(), "w#0"), 2))
+    assert cancelled
+    assert tasks.renew_calls == 2
+    [(_, _, fields)] = tasks.finished
+    assert fields["status"] == "queued"
+
+
+def test_transient_renewal_errors_do_not_cancel_the_run(tasks):
+    tasks.renewals = [RuntimeError("mongo unreachable"), RuntimeError("mongo unreachable"), True]
+
+    async def handler(_task):
+        await asyncio.sleep(0.08)
+
+    asyncio.run(JobWorkerPool(handler, SETTINGS)._run_job(task(), "w#0"))
+    assert tasks.renew_calls >= 3
+    assert tasks.finished == [("t1", "w#0", {"status": "completed", "error": None})]
+
+
+def test_failure_is_retried_with_backoff(tasks):
+    async def handler(_task):
+        raise RuntimeError("LLM down")
+
+    before = datetime.now(timezone.utc)
+    asyncio.run(JobWorkerPool(handler, SETTINGS)._run_job(task(attempts=2), "w#0"))
+    [(_, _, fields)] = tasks.finished
+    assert fields["status"] == "queued"
+    assert fields["error"] == "LLM down"
+    # attempt 2: 5s * 2, with +-20% jitter
+    delay = (fields["available_at"] - before).total_seconds()
+    assert 7.9 <= delay <= 12.1
+
+
+def test_retries_exhausted_marks_failed(tasks):
+    async def handler(_task):
+        raise RuntimeError("still down")
+
+    asyncio.run(JobWorkerPool(handler, SETTINGS)._run_job(task(attempts=3, max_attempts=3), "w#0"))
+    assert tasks.finished == [("t1", "w#0", {"status": "failed", "error": "still down"})]
+
+
+def test_permanent_error_is_not_retried(tasks):
+    async def handler(_task):
+        raise PermanentJobError("user deleted")
+
+    asyncio.run(JobWorkerPool(handler, SETTINGS)._run_job(task(attempts=1), "w#0"))
+    assert tasks.finished == [("t1", "w#0", {"status": "failed", "error": "user deleted"})]
+
+
+def test_drain_requeues_jobs_that_outlive_the_timeout(tasks):
+    tasks.queued = [task()]
+    started = asyncio.Event()
+
+    async def handler(_task):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def scenario():
+        pool = JobWorkerPool(handler, SETTINGS)
+        await pool.start()
+        await asyncio.wait_for(started.wait(), 1)
+        await pool.drain(timeout=0.05)
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert [fields["status"] for _, _, fields in tasks.finished] == ["queued"]
+    assert pool not in job_queue._local_pools
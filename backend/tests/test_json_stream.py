@@ -0,0 +1,94 @@
+import json
+import time
+
+from app.services.json_stream import JSONStreamParser, extract_json
+
+
+def test_extracts_value_from_prose_and_fences():
+    result = extract_json('Sure! Here it is:\n```json\n{"a": [1, 2], "b": "x"}\n```\nHope that helps.')
+    assert result.status == "complete"
+    assert result.value == {"a": [1, 2], "b": "x"}
+    assert result.trailing_text
+
+
+def test_skips_invalid_braces_in_prose():
+    result = extract_json("Use {name} as a placeholder, then {'bad': 1} and finally {\"ok\": true}")
+    assert result.status == "complete"
+    assert result.value == {"ok": True}
+
+
+def test_takes_valid_inner_container_of_an_invalid_one():
+    result = extract_json('{"outer": {"inner": 1}, trailing garbage}')
+    assert result.status == "complete"
+    assert result.value == {"inner": 1}
+
+
+def test_expect_skips_values_of_the_other_kind():
+    result = extract_json('See [1] and then {"k": "v"}', expect="object")
+    assert result.value == {"k": "v"}
+
+
+def test_truncated_string_value_is_closed():
+    result = extract_json('{"summary": "Strong analytical ski')
+    assert result.status == "repaired"
+    assert result.value == {"summary": "Strong analytical ski"}
+    assert result.truncated_at == ("summary",)
+
+
+def test_truncated_member_is_trimmed_to_last_complete_one():
+    result = extract_json('{"a": 1, "b": [1, 2], "c": tr')
+    assert result.status == "repaired"
+    assert result.value == {"a": 1, "b": [1, 2]}
+    assert result.dropped_chars > 0
+
+
+def test_truncated_nested_containers_are_closed():
+    result = extract_json('{"top_careers": [{"name": "Data Engineer", "merits": ["pay"]}, {"name": "Ana')
+    assert result.status == "repaired"
+    assert result.value["top_careers"][0] == {"name": "Data Engineer", "merits": ["pay"]}
+    assert result.value["top_careers"][1] == {"name": "Ana"}
+
+
+def test_unrecoverable_text_fails_without_raising():
+    for text in ["", "no json here", "{'single': 'quotes'}", "[1, 2,, 3]"]:
+        assert extract_json(text).status == "failed"
+
+
+def test_bare_opener_is_repaired_to_an_empty_container():
+    for text in ["{", '{"a": ']:
+        result = extract_json(text)
+        assert (result.status, result.value) == ("repaired", {})
+
+
+def test_deeply_nested_input_neither_raises_nor_hangs():
+    depth = 20000
+    started = time.perf_counter()
+    # too deep for json.loads: reported as failed instead of a RecursionError
+    assert extract_json("[" * depth + "]" * depth).status == "failed"
+    assert extract_json('{"a": ' + "[" * depth).status == "failed"
+    assert extract_json("[" * 50 + "]" * 50).status == "complete"
+    assert time.perf_counter() - started < 5
+
+
+def test_stream_events_fire_once_per_completed_member():
+    text = json.dumps({"friendly_summary": "hi", "top_careers": [{"name": "A"}, {"name": "B"}]})
+    parser = JSONStreamParser(expect="object")
+    events = []
+    for i in range(0, len(text), 3):
+        events.extend(parser.feed(text[i:i + 3]))
+
+    assert (("friendly_summary",), "hi") in events
+    assert (("top_careers", 0), {"name": "A"}) in events
+    assert (("top_careers", 1), {"name": "B"}) in events
+    paths = [path for path, _ in events]
+    assert len(paths) == len(set(paths))
+    assert parser.finish().value == json.loads(text)
+
+
+def test_chunking_does_not_change_the_result():
+    text = 'prefix {"a": "x\\"y", "b": [true, null, -1.5e3], "c": {"d": "\\u00e9"}} suffix'
+    whole = extract_json(text)
+    parser = JSONStreamParser()
+    for ch in text:
+        parser.feed(ch)
+    assert parser.finish().value == whole.value == {"a": 'x"y', "b": [True, None, -1500.0], "c": {"d": "é"}}
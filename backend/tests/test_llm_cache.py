@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from app.services.llm_cache import LLMResponseCache, LRUCache, make_cache_key
+
+SETTINGS = {
+    "enabled": True,
+    "memory_max_entries": 2,
+    "memory_ttl_seconds": 60,
+    "shared_enabled": True,
+    "shared_ttl_seconds": 3600,
+}
+
+
+def test_key_covers_provider_model_params_prompt_and_version():
+    key = make_cache_key("groq", "llama", {"temperature": 0.7, "max_tokens": 512}, "prompt", "v1")
+    assert key == make_cache_key("groq", "llama", {"max_tokens": 512, "temperature": 0.7}, "prompt", "v1")
+    assert len({
+        key,
+        make_cache_key("openai", "llama", {"temperature": 0.7, "max_tokens": 512}, "prompt", "v1"),
+        make_cache_key("groq", "other", {"temperature": 0.7, "max_tokens": 512}, "prompt", "v1"),
+        make_cache_key("groq", "llama", {"temperature": 0.2, "max_tokens": 512}, "prompt", "v1"),
+        make_cache_key("groq", "llama", {"temperature": 0.7, "max_tokens": 512}, "prompt!", "v1"),
+        make_cache_key("groq", "llama", {"temperature": 0.7, "max_tokens": 512}, "prompt", "v2"),
+    }) == 6
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"   # b is now the oldest
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert len(cache) == 2
+
+
+def test_lru_entries_expire():
+    cache = LRUCache(max_entries=2, ttl_seconds=0.01)
+    cache.set("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.docs = {}
+        self.fail = fail
+
+    async def find_one(self, query, projection=None):
+        if self.fail:
+            raise ConnectionError("mongo down")
+        doc = self.docs.get(query["_id"])
+        return doc if doc and doc["expiresAt"] > query["expiresAt"]["$gt"] else None
+
+    async def update_one(self, query, update, upsert=False):
+        if self.fail:
+            raise ConnectionError("mongo down")
+        self.docs[query["_id"]] = {"_id": query["_id"], **update["$set"]}
+
+
+def cache_with(collection, **overrides) -> LLMResponseCache:
+    cache = LLMResponseCache({**SETTINGS, **overrides})
+    cache._collection = lambda: collection
+    return cache
+
+
+def test_memory_hit_then_shared_hit_across_workers():
+    collection = FakeCollection()
+    writer, reader = cache_with(collection), cache_with(collection)
+
+    async def scenario():
+        assert await writer.get("k") is None
+        await writer.set("k", '{"a": 1}')
+        assert await writer.get("k") == '{"a": 1}'
+        # another worker: not in its memory tier, found in Mongo and promoted
+        assert await reader.get("k") == '{"a": 1}'
+        assert await reader.get("k") == '{"a": 1}'
+
+    asyncio.run(scenario())
+    assert writer.counters["misses"] == 1 and writer.counters["memory_hits"] == 1
+    assert reader.counters["shared_hits"] == 1 and reader.counters["memory_hits"] == 1
+    assert reader.stats()["hit_ratio"] == 1.0
+
+
+def test_shared_tier_errors_degrade_to_a_miss():
+    cache = cache_with(FakeCollection(fail=True))
+
+    async def scenario():
+        await cache.set("k", "v")          # memory write still happens
+        assert await cache.get("k") == "v"
+        assert await cache.get("other") is None
+
+    asyncio.run(scenario())
+    assert cache.counters["shared_errors"] == 2
+    assert cache.counters["misses"] == 1
+
+
+def test_shared_tier_can_be_disabled():
+    collection = FakeCollection()
+    cache = cache_with(collection, shared_enabled=False)
+    asyncio.run(cache.set("k", "v"))
+    assert collection.docs == {}
@@ -0,0 +1,89 @@
+import time
+
+from app.services.llm_router import CLOSED, HALF_OPEN, OPEN, LLMRouter, ProviderHealth
+
+SETTINGS = {
+    "window_seconds": 60,
+    "min_calls": 4,
+    "error_rate_threshold": 0.5,
+    "slow_call_seconds": 5,
+    "slow_call_rate_threshold": 0.5,
+    "open_seconds": 30,
+    "probe_timeout_seconds": 120,
+}
+
+
+def opened_health(**overrides) -> ProviderHealth:
+    health = ProviderHealth("groq", {**SETTINGS, **overrides})
+    for _ in range(4):
+        health.record(0.1, ok=False)
+    assert health.state == OPEN
+    return health
+
+
+def elapse(health: ProviderHealth, seconds: float):
+    """Pretend the breaker opened `seconds` ago."""
+    health.opened_at = time.monotonic() - seconds
+
+
+def test_opens_on_error_rate_and_rejects_calls():
+    health = opened_health()
+    assert health.allow() is False
+    assert health.times_opened == 1
+
+
+def test_slow_calls_open_the_breaker():
+    health = ProviderHealth("groq", SETTINGS)
+    for _ in range(4):
+        health.record(10.0, ok=True)
+    assert health.state == OPEN
+
+
+def test_half_open_lets_exactly_one_probe_through():
+    health = opened_health()
+    elapse(health, 31)
+    assert health.allow() is True
+    assert health.state == HALF_OPEN
+    assert health.allow() is False
+
+
+def test_successful_probe_closes_and_failed_probe_reopens():
+    health = opened_health()
+    elapse(health, 31)
+    assert health.allow()
+    health.record(0.2, ok=True)
+    assert health.state == CLOSED
+    assert health.allow()
+
+    health = opened_health()
+    elapse(health, 31)
+    assert health.allow()
+    health.record(0.2, ok=False)
+    assert health.state == OPEN
+    assert health.allow() is False
+
+
+def test_released_probe_frees_the_slot_for_the_next_caller():
+    health = opened_health()
+    elapse(health, 31)
+    assert health.allow()
+    # the probe was cancelled while queued for a limiter slot: no outcome to record
+    health.release_probe()
+    assert health.state == HALF_OPEN
+    assert health.allow() is True
+
+
+def test_probe_that_never_reports_is_written_off():
+    health = opened_health(probe_timeout_seconds=0.01)
+    elapse(health, 31)
+    assert health.allow()
+    assert health.allow() is False
+    time.sleep(0.02)
+    assert health.allow() is True
+
+
+def test_router_orders_requested_provider_then_agent_failover():
+    router = LLMRouter(["groq", "gemini", "openai"], {"socio": ["openai", "groq"]}, SETTINGS)
+    assert router.candidates("gemini", "socio") == ["gemini", "openai", "groq"]
+    assert router.candidates("groq") == ["groq", "gemini", "openai"]
+    assert router.allow("unknown") is True
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE, ProviderLimiter, TokenBucket
+
+
+async def hold(limiter, order, name, priority, release):
+    async with limiter.slot(10, priority=priority):
+        order.append(name)
+        await release.wait()
+
+
+def test_concurrency_cap_and_interactive_first():
+    async def scenario():
+        limiter = ProviderLimiter("groq", max_concurrency=1)
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, order, "holder", INTERACTIVE, release))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(hold(limiter, order, "background", BACKGROUND, release))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(hold(limiter, order, "interactive", INTERACTIVE, release))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queue_depth"] == {"interactive": 1, "background": 1}
+        release.set()
+        await asyncio.gather(holder, background, interactive)
+        return limiter, order
+
+    limiter, order = asyncio.run(scenario())
+    assert order == ["holder", "interactive", "background"]
+    assert limiter.stats()["active"] == 0
+
+
+def test_background_waiter_is_promoted_after_waiting_too_long():
+    async def scenario():
+        limiter = ProviderLimiter("groq", max_concurrency=1, promote_after=0.01)
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, order, "holder", INTERACTIVE, release))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(hold(limiter, order, "background", BACKGROUND, release))
+        await asyncio.sleep(0.02)
+        interactive = asyncio.create_task(hold(limiter, order, "interactive", INTERACTIVE, release))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, background, interactive)
+        return order
+
+    assert asyncio.run(scenario()) == ["holder", "background", "interactive"]
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        limiter = ProviderLimiter("groq", max_concurrency=1)
+        order, release = [], asyncio.Event()
+        holder = asyncio.create_task(hold(limiter, order, "holder", INTERACTIVE, release))
+        await asyncio.sleep(0)
+        quitter = asyncio.create_task(hold(limiter, order, "quitter", INTERACTIVE, release))
+        await asyncio.sleep(0)
+        quitter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await quitter
+        release.set()
+        await holder
+        await asyncio.wait_for(hold(limiter, order, "next", INTERACTIVE, release), 1)
+        return limiter, order
+
+    limiter, order = asyncio.run(scenario())
+    assert order == ["holder", "next"]
+    assert limiter.stats()["active"] == 0
+    assert limiter.stats()["queue_depth"] == {"interactive": 0, "background": 0}
+
+
+def test_token_bucket_waits_for_refill_and_takes_refunds():
+    async def scenario():
+        bucket = TokenBucket(per_minute=600)   # 10 per second
+        await bucket.acquire(600)
+        started = time.monotonic()
+        await bucket.acquire(1)
+        waited = time.monotonic() - started
+        bucket.refund(50)
+        return bucket, waited
+
+    bucket, waited = asyncio.run(scenario())
+    assert 0.05 <= waited < 1
+    assert 49 <= bucket.tokens <= 52
+
+
+def test_unused_token_estimate_is_refunded():
+    async def scenario():
+        limiter = ProviderLimiter("groq", max_concurrency=2, tpm=1000)
+        async with limiter.slot(400, priority=INTERACTIVE) as reservation:
+            reservation["used_tokens"] = 100
+        return limiter
+
+    assert asyncio.run(scenario()).tpm.tokens == pytest.approx(900, abs=1)
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+        return flights, calls, results
+
+    flights, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert flights.stats() == {"started": 1, "coalesced": 4, "abandoned": 0, "in_flight": 0}
+
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flights.do("k", fetch))
+        second = asyncio.create_task(flights.do("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return flights, first, await second
+
+    flights, first, result = asyncio.run(scenario())
+    assert first.cancelled()
+    assert result == "result"
+    assert flights.counters["abandoned"] == 0
+
+
+def test_abandoned_flight_is_cancelled_and_forgotten_at_once():
+    async def scenario():
+        flights = SingleFlight()
+        upstream_cancelled = asyncio.Event()
+
+        async def stuck():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # still unwinding when the next caller arrives
+                await asyncio.sleep(0.01)
+                upstream_cancelled.set()
+                raise
+
+        async def fresh():
+            return "fresh"
+
+        waiter = asyncio.create_task(flights.do("k", stuck))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # the abandoned call is no longer joinable: a new caller starts its own
+        assert flights.stats()["in_flight"] == 0
+        result = await flights.do("k", fresh)
+        await asyncio.wait_for(upstream_cancelled.wait(), 1)
+        return flights, result
+
+    flights, result = asyncio.run(scenario())
+    assert result == "fresh"
+    assert flights.counters["abandoned"] == 1
+    assert flights.counters["started"] == 2
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(flights.do("k", boom), flights.do("k", boom), return_exceptions=True)
+        return flights, results
+
+    flights, results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.stats()["in_flight"] == 0
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from app.services.skill_matcher import TAXONOMY_PATH, SkillMatcher, get_skill_matcher
+
+SKILLS = [
+    {"name": "Python", "category": "programming_language", "aliases": ["python3"]},
+    {"name": "Java", "category": "programming_language", "aliases": []},
+    {"name": "JavaScript", "category": "programming_language", "aliases": ["JS"]},
+    {"name": "C", "category": "programming_language", "aliases": [], "needs_context": True},
+    {"name": "C++", "category": "programming_language", "aliases": ["cpp"]},
+    {"name": "R", "category": "programming_language", "aliases": [], "needs_context": True},
+    {"name": "Go", "category": "programming_language", "aliases": ["golang"], "case_sensitive": True, "needs_context": True},
+    {"name": "Machine Learning", "category": "data_ml", "aliases": ["ML"]},
+    {"name": "Go-to-Market", "category": "business", "aliases": ["go to market"]},
+    {"name": "Negotiation", "category": "business", "aliases": []},
+]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return SkillMatcher(SKILLS)
+
+
+def test_aliases_resolve_to_canonical_names_in_order(matcher):
+    text = "Built ML models in python3 and JavaScript; some java too"
+    assert matcher.find_skills(text) == ["Machine Learning", "Python", "JavaScript", "Java"]
+
+
+def test_longest_term_wins_and_symbols_are_boundaries(matcher):
+    assert matcher.find_skills("C++ and cpp") == ["C++"]
+    assert matcher.find_skills("Java, JavaScript") == ["Java", "JavaScript"]
+    assert matcher.find_skills("R&D budget") == []
+
+
+def test_short_terms_are_case_sensitive(matcher):
+    assert matcher.find_skills("Languages: JS") == ["JavaScript"]
+    assert matcher.find_skills("it's just a js file, ok") == []
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("Go to market plan for the launch", ["Go-to-Market"]),
+    ("Let's go and Go again", []),
+    ("Skills: Go, Python", ["Go", "Python"]),
+    ("Go, R, C", ["Go", "R", "C"]),
+    ("- Go", ["Go"]),
+    ("Programming languages: C and R", ["C", "R"]),
+    ("Grade C in statistics", []),
+    ("Negotiation and Go", ["Negotiation"]),
+])
+def test_ambiguous_terms_need_a_technical_line(matcher, line, expected):
+    assert matcher.find_skills(line) == expected
+
+
+def test_context_is_judged_per_line(matcher):
+    assert matcher.find_skills("Python developer\nGo for it") == ["Python"]
+
+
+def test_scan_collects_projects_certifications_and_experience(matcher):
+    text = "\n".join([
+        "Experience: 2 years",
+        "Project: chat app in Go and Python",
+        "Developed a billing service",
+        "AWS certification, 2023",
+    ])
+    result = matcher.scan(text)
+    assert result["skills"] == ["Go", "Python"]
+    assert result["projects"] == ["Project: chat app in Go and Python", "Developed a billing service"]
+    assert result["certifications"] == ["AWS certification, 2023"]
+    assert result["hasExperience"] == "Yes"
+
+
+def test_developed_lines_need_a_projects_mention(matcher):
+    assert matcher.scan("Developed a billing service")["projects"] == []
+
+
+def test_shipped_taxonomy_is_consistent():
+    with open(TAXONOMY_PATH, encoding="utf-8") as f:
+        skills = json.load(f)["skills"]
+    names = [s["name"].lower() for s in skills]
+    assert len(names) == len(set(names))
+    assert len(skills) >= 3000
+    assert all(s["category"] and isinstance(s["aliases"], list) for s in skills)
+
+    matcher = get_skill_matcher()
+    assert matcher.find_skills("Tech stack: Go, Kubernetes, PostgreSQL") == ["Go", "Kubernetes", "PostgreSQL"]
+    assert matcher.find_skills("Spring 2023: led the Go to market push") == ["Go-to-Market"]
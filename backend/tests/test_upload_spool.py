@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.services.upload_spool import BadUpload, UploadTooLarge, spool_multipart
+
+BOUNDARY = "----testboundary"
+
+
+def multipart(fields=None, file=None, field_name="file") -> bytes:
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    if file is not None:
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{field_name}"; filename="cv.pdf"\r\n'
+            f"Content-Type: application/pdf\r\n\r\n".encode() + file + b"\r\n"
+        )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+class FakeRequest:
+    """The slice of starlette's Request that spool_multipart uses."""
+
+    def __init__(self, body: bytes, content_length=True, content_type=None, chunk_size=1000):
+        self.headers = {"content-type": content_type or f"multipart/form-data; boundary={BOUNDARY}"}
+        if content_length:
+            self.headers["content-length"] = str(len(body))
+        self.body = body
+        self.chunk_size = chunk_size
+        self.streamed = 0
+
+    async def stream(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            chunk = self.body[i:i + self.chunk_size]
+            self.streamed += len(chunk)
+            yield chunk
+
+
+def spool(request, max_bytes=10_000, spool_bytes=1_000):
+    return asyncio.run(spool_multipart(request, "file", max_bytes, spool_bytes))
+
+
+def test_small_upload_stays_in_memory():
+    content = b"%PDF-1.4 small"
+    fields, upload = spool(FakeRequest(multipart({"email": "a@b.c"}, content)))
+    try:
+        assert fields == {"email": "a@b.c"}
+        assert upload.filename == "cv.pdf"
+        assert upload.content_type == "application/pdf"
+        assert upload.source() == content
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+    finally:
+        upload.close()
+
+
+def test_large_upload_rolls_over_to_a_temp_file():
+    content = os.urandom(5_000)
+    _, upload = spool(FakeRequest(multipart({}, content)))
+    path = upload.source()
+    try:
+        assert isinstance(path, str)
+        with open(path, "rb") as f:
+            assert f.read() == content
+        assert upload.size == len(content)
+    finally:
+        upload.close()
+    assert not os.path.exists(path)
+
+
+def test_declared_oversized_body_is_refused_before_reading():
+    request = FakeRequest(multipart({}, b"x" * 200_000))
+    with pytest.raises(UploadTooLarge):
+        spool(request)
+    assert request.streamed == 0
+
+
+def test_oversized_file_is_aborted_while_streaming():
+    # no Content-Length (chunked): the running cap on the file part stops it
+    request = FakeRequest(multipart({}, b"x" * 30_000), content_length=False)
+    with pytest.raises(UploadTooLarge):
+        spool(request)
+    assert request.streamed < len(request.body)
+
+
+def test_missing_file_field_is_a_422():
+    with pytest.raises(BadUpload) as info:
+        spool(FakeRequest(multipart({"email": "a@b.c"})))
+    assert info.value.status_code == 422
+
+
+def test_non_multipart_body_is_a_400():
+    with pytest.raises(BadUpload) as info:
+        spool(FakeRequest(b"{}", content_type="application/json"))
+    assert info.value.status_code == 400
+
+
+def test_second_file_part_is_rejected():
+    body = multipart({}, b"one")[:-len(f"--{BOUNDARY}--\r\n")] + multipart({}, b"two")
+    with pytest.raises(BadUpload):
+        spool(FakeRequest(body))
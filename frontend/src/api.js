@@ -11,11 +11,14 @@
 // src/api.js
 const API_BASE_URL = import.meta.env.VITE_API_URL;
 
+// Ensure exactly ONE slash between base and endpoint
+export function apiUrl(endpoint) {
+  const base = API_BASE_URL.endsWith("/") ? API_BASE_URL : API_BASE_URL + "/";
+  return base + endpoint.replace(/^\/+/, "");
+}
+
 export async function fetchFromAPI(endpoint, options = {}) {
-  // Ensure exactly ONE slash between base and endpoint
-  const url = API_BASE_URL.endsWith("/")
-    ? API_BASE_URL + endpoint
-    : API_BASE_URL + "/" + endpoint;
+  const url = apiUrl(endpoint);
 
   const res = await fetch(url, options);
 
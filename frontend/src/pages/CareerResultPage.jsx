@@ -3,7 +3,7 @@ import { useLocation, useNavigate } from "react-router-dom";
 import { toast } from "react-hot-toast";
 import axios from "axios";
 import jsPDF from "jspdf";
-import { fetchFromAPI } from "../api"; 
+import { fetchFromAPI, apiUrl } from "../api"; 
 
 const stages = [
   "Analyzing your answers...",
@@ -48,36 +48,86 @@ export default function CareerResultPage() {
     startFinalization();
   }, [email, navigate]);
 
-  // Poll backend for status
+  // Apply a task update ($set fields, possibly dotted like "partial_report.final_report")
+  const applyTaskUpdate = (task, updates) => {
+    const next = { ...task };
+    Object.entries(updates).forEach(([path, value]) => {
+      const keys = path.split(".");
+      let node = next;
+      keys.slice(0, -1).forEach((key) => {
+        node[key] = { ...(node[key] || {}) };
+        node = node[key];
+      });
+      node[keys[keys.length - 1]] = value;
+    });
+    return next;
+  };
+
+  // Stream status from the backend (SSE), falling back to polling
   useEffect(() => {
     if (!taskId) return;
 
-    const interval = setInterval(async () => {
-      try {
-        const data = await fetchFromAPI(`finalize-career-path/status/${taskId}`);
-        setLoadingStage(data.current_stage || 0);
-        if (data.partial_report) {
-          setResult(data.partial_report.final_report || data.partial_report);
-        }
+    let task = {};
+    let interval = null;
+    let finished = false;
 
-        if (data.status === "completed") {
-          clearInterval(interval);
-          setLoading(false);
-          toast.success("Career report generated!");
-        } else if (data.status === "failed") {
+    const handleTask = (data) => {
+      setLoadingStage(data.current_stage || 0);
+      if (data.partial_report) {
+        setResult(data.partial_report.final_report || data.partial_report);
+      }
+
+      if (data.status === "completed") {
+        finished = true;
+        setLoading(false);
+        toast.success("Career report generated!");
+      } else if (data.status === "failed") {
+        finished = true;
+        setLoading(false);
+        toast.error(data.error || "Failed to generate career report.");
+      }
+    };
+
+    const startPolling = () => {
+      interval = setInterval(async () => {
+        try {
+          const data = await fetchFromAPI(`finalize-career-path/status/${taskId}`);
+          handleTask(data);
+          if (finished) clearInterval(interval);
+        } catch (err) {
+          console.error(err);
           clearInterval(interval);
           setLoading(false);
-          toast.error(data.error || "Failed to generate career report.");
+          toast.error("Error fetching report status.");
         }
-      } catch (err) {
-        console.error(err);
-        clearInterval(interval);
-        setLoading(false);
-        toast.error("Error fetching report status.");
-      }
-    }, 1500);
+      }, 1500);
+    };
 
-    return () => clearInterval(interval);
+    if (!window.EventSource) {
+      startPolling();
+      return () => clearInterval(interval);
+    }
+
+    const source = new EventSource(apiUrl(`finalize-career-path/stream/${taskId}`));
+
+    source.addEventListener("snapshot", (e) => {
+      task = JSON.parse(e.data);
+      handleTask(task);
+    });
+    source.addEventListener("update", (e) => {
+      task = applyTaskUpdate(task, JSON.parse(e.data));
+      handleTask(task);
+    });
+    source.addEventListener("done", () => source.close());
+    source.onerror = () => {
+      source.close();
+      if (!finished) startPolling();
+    };
+
+    return () => {
+      source.close();
+      clearInterval(interval);
+    };
   }, [taskId]);
 
   const downloadPDF = () => {
@@ -167,7 +217,7 @@ export default function CareerResultPage() {
 
           <section className="bg-indigo-50 p-4 rounded-lg shadow-inner">
             <h2 className="text-xl font-semibold">Friendly Summary</h2>
-            <p className="text-gray-800">{result?.friendly_summary || "No summary available."}</p>
+            <p className="text-gray-800">{result?.friendly_summary || (loading ? "Generating..." : "No summary available.")}</p>
           </section>
 
           {result?.top_careers?.map((career, idx) => (
@@ -187,11 +237,13 @@ export default function CareerResultPage() {
               <ul className="list-disc pl-6 text-gray-800">
                 {Array.isArray(result?.[key]) && result[key].length > 0
                   ? result[key].map((item,i)=><li key={i}>{item}</li>)
-                  : <li className="text-gray-500">No data available</li>}
+                  : <li className="text-gray-500">{loading ? "Generating..." : "No data available"}</li>}
               </ul>
             </section>
           ))}
 
+          {/* Sections stream in one by one; actions appear once the report is complete */}
+          {!loading && (
           <div className="flex justify-center space-x-4 mt-6">
             <button
               onClick={() => navigate("/")}
@@ -206,6 +258,7 @@ export default function CareerResultPage() {
               Download PDF
             </button>
           </div>
+          )}
         </div>
       ) : (
         <p>Initializing...</p>